@@ -0,0 +1,205 @@
+"""
+Command line tools for the Dollar Tracker API.
+
+    python -m app.cli generate --days 30 --seed 7 --output ticks.ndjson
+    python -m app.cli generate --days 30 --to-db
+    python -m app.cli export --from 2026-01-01 --to 2026-02-01 --format csv --output ticks.csv
+    python -m app.cli backfill ticks.csv more.ndjson --workers 8
+
+Recorded tick files can be replayed through the running service by setting
+REPLAY_FILE (and REPLAY_SPEED) before starting it.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from app.config import DEFAULT_PAIR
+from app.database import Database, price_history_service, spread_rollup_service
+from app.services.archive import iter_federated, open_archive
+from app.services.backfill import backfill
+from app.services.market_data import MarketDataGenerator, write_ticks_ndjson
+from app.utils.encoding import FormatUnavailable
+from app.utils.export import (
+    EXPORT_FORMATS,
+    ROLLUP_SCHEMA,
+    TICK_SCHEMA,
+    check_export_format,
+    encode_export,
+    rollup_batches,
+)
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+# ============================================
+# generate
+# ============================================
+
+async def _generate_to_db(generator: MarketDataGenerator, start: datetime, end: datetime, batch_size: int) -> int:
+    await Database.connect()
+    if not Database.is_connected():
+        raise SystemExit("MongoDB not connected")
+    total = 0
+    try:
+        for batch in generator.batches(start, end, batch_size):
+            total += await price_history_service.store_many(batch)
+    finally:
+        await Database.disconnect()
+    return total
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    end = args.end or datetime.utcnow()
+    start = args.start or end - timedelta(days=args.days)
+    generator = MarketDataGenerator(seed=args.seed, tick_seconds=args.tick_seconds)
+
+    began = perf_counter()
+    if args.to_db:
+        total = asyncio.run(_generate_to_db(generator, start, end, args.batch_size))
+        target = "MongoDB"
+    else:
+        total = write_ticks_ndjson(args.output, generator.batches(start, end, args.batch_size))
+        target = args.output
+    elapsed = perf_counter() - began
+
+    print(f"Generated {total} ticks ({start.isoformat()} .. {end.isoformat()}) into {target} in {elapsed:.1f}s")
+    return 0
+
+
+# ============================================
+# export
+# ============================================
+
+async def _export(args: argparse.Namespace, start: datetime, end: datetime, fh) -> int:
+    await Database.connect()
+    if not Database.is_connected():
+        raise SystemExit("MongoDB not connected")
+    if args.dataset == "ticks":
+        schema = TICK_SCHEMA
+        batches = iter_federated(
+            open_archive(args.pair), start, end, args.exchanges, batch_size=args.batch_size, pair=args.pair
+        )
+    else:
+        schema = ROLLUP_SCHEMA
+        batches = rollup_batches(spread_rollup_service.iter_range(start, end, batch_size=args.batch_size))
+    written = 0
+    try:
+        async for chunk in encode_export(batches, schema, args.format):
+            fh.write(chunk)
+            written += len(chunk)
+    finally:
+        await Database.disconnect()
+    return written
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    end = args.end or datetime.utcnow()
+    start = args.start or end - timedelta(days=args.days)
+    try:
+        check_export_format(args.format)
+    except FormatUnavailable as e:
+        raise SystemExit(str(e))
+
+    began = perf_counter()
+    if args.output == "-":
+        written = asyncio.run(_export(args, start, end, sys.stdout.buffer))
+    else:
+        with open(args.output, "wb") as fh:
+            written = asyncio.run(_export(args, start, end, fh))
+    elapsed = perf_counter() - began
+
+    print(
+        f"Exported {args.dataset} ({start.isoformat()} .. {end.isoformat()}) as {args.format}: "
+        f"{written} bytes in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+# ============================================
+# backfill
+# ============================================
+
+async def _backfill(args: argparse.Namespace):
+    await Database.connect()
+    if not Database.is_connected():
+        raise SystemExit("MongoDB not connected")
+    try:
+        # The unique tick index must exist before parallel upserts
+        await Database.ensure_indexes()
+        return await backfill(args.files, args.batch_size, args.workers, rebuild_rollups=not args.no_rollups)
+    finally:
+        await Database.disconnect()
+
+
+def cmd_backfill(args: argparse.Namespace) -> int:
+    began = perf_counter()
+    try:
+        result = asyncio.run(_backfill(args))
+    except (FormatUnavailable, ValueError) as e:
+        raise SystemExit(str(e))
+    elapsed = perf_counter() - began
+
+    if result.start is None:
+        print("No ticks found")
+        return 0
+    print(
+        f"Read {result.read} ticks ({result.start.isoformat()} .. {result.end.isoformat()}), "
+        f"wrote {result.written}, rebuilt {result.rollups} spread rollups in {elapsed:.1f}s"
+    )
+    return 0
+
+
+def _parse_exchanges(value: str) -> list[str]:
+    return [e.strip().lower() for e in value.split(",") if e.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Dollar Tracker API tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="generate deterministic synthetic tick data")
+    generate.add_argument("--days", type=float, default=7.0, help="length of the generated window")
+    generate.add_argument("--start", type=_parse_datetime, help="window start (ISO, UTC); default end - days")
+    generate.add_argument("--end", type=_parse_datetime, help="window end (ISO, UTC); default now")
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("--tick-seconds", type=float, default=5.0, help="seconds between refreshes")
+    generate.add_argument("--batch-size", type=int, default=10_000)
+    target = generate.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="write an NDJSON recording to this path")
+    target.add_argument("--to-db", action="store_true", help="insert directly into price_history")
+    generate.set_defaults(func=cmd_generate)
+
+    export = commands.add_parser("export", help="stream ticks or spread rollups out of MongoDB")
+    export.add_argument("--dataset", choices=["ticks", "rollups"], default="ticks")
+    export.add_argument("--days", type=float, default=1.0, help="length of the exported window")
+    export.add_argument("--from", dest="start", type=_parse_datetime, help="range start (ISO, UTC); default end - days")
+    export.add_argument("--to", dest="end", type=_parse_datetime, help="range end, exclusive (ISO, UTC); default now")
+    export.add_argument("--exchanges", type=_parse_exchanges, help="comma-separated exchanges (ticks only)")
+    export.add_argument("--pair", type=str.upper, default=DEFAULT_PAIR, help="asset/fiat pair (ticks only)")
+    export.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    export.add_argument("--batch-size", type=int, default=5000, help="documents read per cursor batch")
+    export.add_argument("--output", default="-", help="output path ('-' for stdout)")
+    export.set_defaults(func=cmd_export)
+
+    backfill_parser = commands.add_parser("backfill", help="import historical ticks (idempotent upserts)")
+    backfill_parser.add_argument("files", nargs="+", help=".csv, .ndjson/.jsonl or .parquet tick files")
+    backfill_parser.add_argument("--batch-size", type=int, default=10_000, help="ticks per bulk write")
+    backfill_parser.add_argument("--workers", type=int, default=4, help="concurrent bulk writes")
+    backfill_parser.add_argument("--no-rollups", action="store_true", help="skip rebuilding spread rollups")
+    backfill_parser.set_defaults(func=cmd_backfill)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
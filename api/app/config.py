@@ -1,6 +1,12 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
+from app.utils.logs import level_number
+
+# Pair of the history stored before multi-pair support (documents without a `pair` field)
+DEFAULT_PAIR = "USDT/BOB"
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -13,23 +19,99 @@ class Settings(BaseSettings):
     
     # Cache
     cache_ttl: int = 60  # seconds
+    cache_max_entries: int = 1024  # oldest entries are evicted beyond this
+    
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "json"  # json or text
+    log_rate_limit_burst: int = 10  # records per message key per window (0 disables)
+    log_rate_limit_window: float = 60.0  # seconds
+    log_rate_limit_exempt_level: str = "ERROR"  # records at this level or above are never limited
     
     # Database
     mongo_url: str = "mongodb://localhost:27017"
     mongo_db_name: str = "dollar_tracker"
+    mongo_timeout_ms: int = 5000  # server selection timeout, bounds the startup ping
     
-    # External APIs
     # External APIs
     dolar_api_url: str = "https://bo.dolarapi.com/v1"
     exchange_rate_api_url: str = "https://api.exchangerate-api.com/v4"
+    dolarblue_api_url: str = "https://api.dolarbluebolivia.click"
+    binance_p2p_url: str = "https://p2p.binance.com/bapi/c2c/v2/friendly/c2c/adv/search"
+    okx_p2p_url: str = "https://www.okx.com/v3/c2c/tradingOrders/books"
+    
+    # Asset/fiat pairs fetched every refresh, comma-separated; the first is the primary
+    # pair (spreads, alerts and the default of every endpoint). AirTM, Wallbit, Takenos
+    # and BCB only quote USD/BOB and are attached to the primary pair when it is in BOB
+    pairs: str = DEFAULT_PAIR
+    
+    # P2P books: pages of `p2p_page_rows` ads fetched concurrently per side, and the
+    # estimator for the published price: weighted_median, trimmed_mean or depth
+    p2p_book_pages: int = 3
+    p2p_page_rows: int = 20
+    p2p_estimator: str = "weighted_median"
+    p2p_trim: float = 0.2  # fraction dropped at each end by trimmed_mean
+    p2p_depth_amount: float = 500.0  # USDT filled by the depth estimator
+    depth_snapshot_seconds: int = 0  # persist book depth every N seconds (0 disables)
+    
+    # Tiered storage: raw ticks older than `hot_days` (whole days) move from MongoDB
+    # to per exchange, per day compressed files; with no archive_dir they are deleted
+    hot_days: int = 7
+    archive_dir: str = "data/archive"
+    
+    # Warm restart: last prices and recent ticks saved on shutdown, reloaded on boot
+    warm_state_file: str = "data/warm_state.json"  # empty disables
+    warm_state_max_age: int = 3600  # seconds; older state is ignored
+    tick_buffer_size: int = 10_000  # recent ticks kept in memory (and saved)
+    
+    # Event bus: snapshots queued per internal consumer (storage, analytics) before
+    # the refresh waits, and per /prices/stream client before the oldest is dropped
+    event_queue_size: int = 100
+    stream_queue_size: int = 8
+    
+    # Worker pool for CPU-bound aggregation and serialization: threads, jobs waiting
+    # beyond them (then 503), and the size (ticks or points) below which work stays inline
+    worker_pool_size: int = 2
+    worker_pool_queue: int = 32
+    worker_pool_min_items: int = 5000
+    
+    # Replay (feed a recorded NDJSON tick file instead of fetching upstream)
+    replay_file: str = ""
+    replay_speed: float = 1.0  # 0 = as fast as possible
+    
+    # Alerts
+    alerts_max: int = 50_000
+    alert_queue_size: int = 10_000  # pending webhook deliveries; also per stream subscriber
+    alert_webhook_workers: int = 4
+    alert_webhook_timeout: float = 5.0  # seconds
+    alert_webhook_token: str = ""  # required (X-Webhook-Token) to register webhooks; empty disables them
+    alert_webhook_hosts: str = ""  # comma separated allowed webhook hosts (empty: any public host)
+    
+    # Admin (profiling endpoints are disabled while empty)
+    admin_token: str = ""
     
     # CORS
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
     
+    @field_validator("log_rate_limit_exempt_level")
+    @classmethod
+    def _check_exempt_level(cls, value: str) -> str:
+        level_number(value)
+        return value.upper()
+    
     @property
     def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    @property
+    def pairs_list(self) -> list[str]:
+        pairs = [pair.strip().upper() for pair in self.pairs.split(",") if pair.strip()]
+        return list(dict.fromkeys(pairs)) or [DEFAULT_PAIR]
+    
+    @property
+    def primary_pair(self) -> str:
+        return self.pairs_list[0]
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -2,11 +2,17 @@
 MongoDB database connection and price history storage.
 """
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, ReadPreference, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 import logging
 
-from app.config import get_settings
+from app.config import DEFAULT_PAIR, get_settings
+from app.models.schemas import Alert
+from app.models.ticks import Tick, TICK_PROJECTION
+from app.utils.metrics import MONGO_OPERATION_SECONDS
+from app.utils.profiling import span
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +21,21 @@ settings = get_settings()
 MONGO_URL = settings.mongo_url
 DB_NAME = settings.mongo_db_name
 
-logger.info(f"Database config loaded - URL: {MONGO_URL[:30]}..., DB: {DB_NAME}")
+logger.info("Database config loaded - URL: %s..., DB: %s", MONGO_URL[:30], DB_NAME)
+
+
+def pair_query(pair: str):
+    """
+    price_history condition matching the ticks of `pair`. History stored before
+    multi-pair support has no `pair` field and belongs to DEFAULT_PAIR.
+    """
+    return {"$in": [pair, None]} if pair == DEFAULT_PAIR else pair
+
+
+# Identity of a stored tick
+TICK_KEY_INDEX = [("pair", 1), ("exchange", 1), ("timestamp", -1)]
+TICK_KEY_INDEX_NAME = "pair_1_exchange_1_timestamp_-1"
+DUPLICATE_KEY = 11000
 
 
 class Database:
@@ -26,28 +46,90 @@ class Database:
     
     @classmethod
     async def connect(cls):
-        """Connect to MongoDB."""
+        """
+        Connect to MongoDB.
+        Only pings the server; indexes are created by ensure_indexes(), off the startup path.
+        """
         try:
-            cls.client = AsyncIOMotorClient(MONGO_URL)
+            cls.client = AsyncIOMotorClient(
+                MONGO_URL, serverSelectionTimeoutMS=settings.mongo_timeout_ms
+            )
             cls.db = cls.client[DB_NAME]
 
             # Verify connection is actually working (ping the server)
             await cls.client.admin.command('ping')
-            logger.info(f"MongoDB ping successful!")
-
-            # Create indexes for price_history collection
-            await cls.db.price_history.create_index([("timestamp", -1)])
-            await cls.db.price_history.create_index([("exchange", 1), ("timestamp", -1)])
-
-            # Count existing documents
-            count = await cls.db.price_history.count_documents({})
-            logger.info(f"Connected to MongoDB at {MONGO_URL}")
-            logger.info(f"Database: {DB_NAME}, Collection price_history has {count} documents")
+            logger.info("Connected to MongoDB at %s (database %s)", MONGO_URL, DB_NAME)
         except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
+            logger.error("Failed to connect to MongoDB: %s", e)
             cls.client = None
             cls.db = None
     
+    @classmethod
+    async def ensure_indexes(cls):
+        """
+        Create indexes (no-ops when they exist) and log an estimated collection size.
+        Run as a background task so a large collection does not delay startup.
+        """
+        if not cls.is_connected():
+            return
+        
+        try:
+            await cls.migrate_price_history()
+            with MONGO_OPERATION_SECONDS.labels("create_index").time():
+                # Every history query is scoped to one pair, so the pair leads both keys;
+                # the second is the tick identity, unique so concurrent upserts cannot duplicate
+                await cls.db.price_history.create_index([("pair", 1), ("timestamp", -1)])
+                await cls.db.price_history.create_index(TICK_KEY_INDEX, unique=True)
+                await cls.db.spread_rollups.create_index([("timestamp", 1)], unique=True)
+                await cls.db.alerts.create_index([("id", 1)], unique=True)
+                await cls.db.depth_snapshots.create_index([("pair", 1), ("exchange", 1), ("timestamp", -1)])
+
+            # Collection metadata, not a scan
+            count = await cls.db.price_history.estimated_document_count()
+            logger.info("MongoDB indexes ready, price_history has ~%s documents", count)
+        except Exception as e:
+            logger.error("Failed to create MongoDB indexes: %s", e)
+    
+    @classmethod
+    async def migrate_price_history(cls):
+        """
+        One-off steps before the unique tick index can be built: stamp documents
+        stored before multi-pair support with DEFAULT_PAIR, remove duplicate
+        (pair, exchange, timestamp) ticks and drop the earlier non-unique index.
+        Skipped once the unique index exists.
+        """
+        collection = cls.db.price_history
+        indexes = await collection.index_information()
+        existing = indexes.get(TICK_KEY_INDEX_NAME)
+        if existing and existing.get("unique"):
+            return
+        
+        with MONGO_OPERATION_SECONDS.labels("migrate").time():
+            await collection.update_many({"pair": {"$exists": False}}, {"$set": {"pair": DEFAULT_PAIR}})
+            
+            duplicates = collection.aggregate([
+                {"$group": {
+                    "_id": {"pair": "$pair", "exchange": "$exchange", "timestamp": "$timestamp"},
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1},
+                }},
+                {"$match": {"count": {"$gt": 1}}},
+            ], allowDiskUse=True)
+            removed = 0
+            requests = []
+            async for group in duplicates:
+                # Keep the first stored copy
+                requests.append(DeleteMany({"_id": {"$in": group["ids"][1:]}}))
+                if len(requests) >= 1000:
+                    removed += (await collection.bulk_write(requests, ordered=False)).deleted_count
+                    requests = []
+            if requests:
+                removed += (await collection.bulk_write(requests, ordered=False)).deleted_count
+            
+            if existing:
+                await collection.drop_index(TICK_KEY_INDEX_NAME)
+        logger.info("Migrated price_history to a unique tick index (%s duplicates removed)", removed)
+    
     @classmethod
     async def disconnect(cls):
         """Disconnect from MongoDB."""
@@ -77,7 +159,7 @@ class PriceHistoryService:
         Returns the inserted document ID or None if failed.
         """
         if not Database.is_connected():
-            logger.warning(f"MongoDB not connected, skipping price storage for {exchange}")
+            logger.warning("MongoDB not connected, skipping price storage for %s", exchange)
             return None
 
         try:
@@ -89,13 +171,67 @@ class PriceHistoryService:
                 "timestamp": datetime.utcnow(),
                 "source": source
             }
-            result = await Database.db.price_history.insert_one(doc)
-            logger.debug(f"Stored price for {exchange}: {last} (ID: {result.inserted_id})")
+            with MONGO_OPERATION_SECONDS.labels("insert").time():
+                result = await Database.db.price_history.insert_one(doc)
+            logger.debug("Stored price for %s: %s (ID: %s)", exchange, last, result.inserted_id)
             return str(result.inserted_id)
         except Exception as e:
-            logger.error(f"Failed to store price for {exchange}: {e}", exc_info=True)
+            logger.error("Failed to store price for %s: %s", exchange, e, exc_info=True)
             return None
     
+    @staticmethod
+    async def store_many(ticks: List[Tick]) -> int:
+        """
+        Store a batch of ticks with a single unordered insert_many.
+        Returns the number of inserted documents.
+        """
+        if not ticks:
+            return 0
+        if not Database.is_connected():
+            logger.warning("MongoDB not connected, skipping storage of %s prices", len(ticks))
+            return 0
+
+        try:
+            docs = [tick.to_document() for tick in ticks]
+            with MONGO_OPERATION_SECONDS.labels("insert_many").time():
+                result = await Database.db.price_history.insert_many(docs, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Ticks already stored (e.g. by a backfill) hit the unique index; the rest are inserted
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                logger.error("Failed to store %s prices: %s", len(ticks), errors[:1])
+            return e.details.get("nInserted", 0)
+        except Exception as e:
+            logger.error("Failed to store %s prices: %s", len(ticks), e)
+            return 0
+    
+    @staticmethod
+    async def upsert_many(ticks: List[Tick]) -> int:
+        """
+        Idempotently store a batch of ticks keyed on (pair, exchange, timestamp), for backfills.
+        The filter matches the unique tick index exactly, so the server retries an upsert
+        that races another insert of the same key instead of duplicating it.
+        Returns the number of documents inserted or changed; errors propagate to the caller.
+        """
+        if not ticks:
+            return 0
+        if not Database.is_connected():
+            logger.warning("MongoDB not connected, skipping upsert of %s prices", len(ticks))
+            return 0
+
+        requests = [
+            UpdateOne(
+                {"pair": tick.pair, "exchange": tick.exchange, "timestamp": tick.timestamp},
+                {"$set": tick.to_document()},
+                upsert=True,
+            )
+            for tick in ticks
+        ]
+        with MONGO_OPERATION_SECONDS.labels("upsert_many").time():
+            result = await Database.db.price_history.bulk_write(requests, ordered=False)
+        return result.upserted_count + result.modified_count
+    
     @staticmethod
     async def get_price_24h_ago(exchange: str = None) -> Optional[float]:
         """
@@ -117,46 +253,101 @@ class PriceHistoryService:
             if exchange:
                 query["exchange"] = exchange
             
-            doc = await Database.db.price_history.find_one(
-                query,
-                sort=[("timestamp", -1)]
-            )
+            with MONGO_OPERATION_SECONDS.labels("find_one").time(), span("mongo"):
+                doc = await Database.db.price_history.find_one(
+                    query,
+                    sort=[("timestamp", -1)]
+                )
             
             if doc:
                 return doc.get("last")
             return None
         except Exception as e:
-            logger.error(f"Failed to get 24h ago price: {e}")
+            logger.error("Failed to get 24h ago price: %s", e)
             return None
     
     @staticmethod
     async def get_history(
         exchange: str = None,
-        hours: int = 24
-    ) -> List[dict]:
+        hours: int = 24,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        exchanges: Optional[List[str]] = None,
+        pair: str = DEFAULT_PAIR,
+    ) -> List[Tick]:
         """
-        Get price history for the specified time range.
-        Returns list of price documents.
+        Get price history of one pair for the specified time range.
+        The range is [start, end); `start` defaults to `hours` ago and `end` to now.
+        With an exchange (or a list of `exchanges`) the query is served by the
+        (pair, exchange, timestamp) index, otherwise by (pair, timestamp).
+        Returns list of ticks ordered by timestamp.
         """
         if not Database.is_connected():
             return []
         
         try:
-            since = datetime.utcnow() - timedelta(hours=hours)
-            query = {"timestamp": {"$gte": since}}
+            if start is None:
+                start = datetime.utcnow() - timedelta(hours=hours)
+            time_range = {"$gte": start}
+            if end is not None:
+                time_range["$lt"] = end
+            query = {"pair": pair_query(pair), "timestamp": time_range}
             if exchange:
                 query["exchange"] = exchange
+            elif exchanges:
+                query["exchange"] = {"$in": list(exchanges)}
             
             cursor = Database.db.price_history.find(
                 query,
+                TICK_PROJECTION,
                 sort=[("timestamp", 1)]
             )
             
-            return await cursor.to_list(length=1000)
+            with MONGO_OPERATION_SECONDS.labels("find").time(), span("mongo"):
+                docs = await cursor.to_list(length=None)
+            return [Tick.from_document(doc) for doc in docs]
         except Exception as e:
-            logger.error(f"Failed to get history: {e}")
+            logger.error("Failed to get history: %s", e)
             return []
     
+    @staticmethod
+    async def iter_history(
+        start: datetime,
+        end: Optional[datetime] = None,
+        exchanges: Optional[List[str]] = None,
+        batch_size: int = 5000,
+        prefer_secondary: bool = True,
+        pair: str = DEFAULT_PAIR,
+    ) -> AsyncIterator[List[Tick]]:
+        """
+        Stream the ticks of `pair` in [start, end) ordered by timestamp, `batch_size` at a time.
+        Reads prefer a secondary so bulk exports do not load the primary
+        (pass prefer_secondary=False to read your own recent writes).
+        Memory use is bounded by one batch regardless of the range.
+        """
+        if not Database.is_connected():
+            return
+        
+        time_range = {"$gte": start}
+        if end is not None:
+            time_range["$lt"] = end
+        query = {"pair": pair_query(pair), "timestamp": time_range}
+        if exchanges:
+            query["exchange"] = {"$in": list(exchanges)}
+        
+        collection = Database.db.price_history
+        if prefer_secondary:
+            collection = collection.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+        cursor = collection.find(query, TICK_PROJECTION, sort=[("timestamp", 1)], batch_size=batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(Tick.from_document(doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
     @staticmethod
     async def calculate_24h_change(current_price: float, exchange: str = None) -> Optional[float]:
         """
@@ -172,23 +363,178 @@ class PriceHistoryService:
         return None
     
     @staticmethod
-    async def cleanup_old_data(days_to_keep: int = 30):
+    async def delete_before(cutoff: datetime, pair: str = DEFAULT_PAIR) -> int:
         """
-        Remove price data older than specified days.
+        Remove price data of `pair` older than `cutoff` (when archiving is disabled).
+        Served by the (pair, timestamp) index. Returns the number of deleted documents.
         """
         if not Database.is_connected():
-            return
+            return 0
+        
+        try:
+            query = {"pair": pair_query(pair), "timestamp": {"$lt": cutoff}}
+            with MONGO_OPERATION_SECONDS.labels("delete").time():
+                result = await Database.db.price_history.delete_many(query)
+            logger.info("Removed %s %s price records before %s", result.deleted_count, pair, cutoff)
+            return result.deleted_count
+        except Exception as e:
+            logger.error("Failed to remove old price records: %s", e)
+            return 0
+
+    @staticmethod
+    async def delete_ticks(exchange: str, timestamps: List[datetime], pair: str = DEFAULT_PAIR) -> int:
+        """
+        Remove the given ticks (by timestamp) of one exchange and pair once they have been
+        archived; other documents of the same range are kept. Returns the number deleted.
+        """
+        if not timestamps or not Database.is_connected():
+            return 0
+        
+        try:
+            query = {"pair": pair_query(pair), "exchange": exchange, "timestamp": {"$in": timestamps}}
+            with MONGO_OPERATION_SECONDS.labels("delete").time():
+                result = await Database.db.price_history.delete_many(query)
+            return result.deleted_count
+        except Exception as e:
+            logger.error("Failed to remove archived price records: %s", e)
+            return 0
+
+
+class SpreadRollupService:
+    """Service for per-minute spread analytics rollups."""
+    
+    @staticmethod
+    async def store_many(docs: List[dict]) -> int:
+        """
+        Upsert rollup documents keyed by timestamp.
+        Returns the number of documents written.
+        """
+        if not docs or not Database.is_connected():
+            return 0
+        
+        try:
+            requests = [
+                ReplaceOne({"timestamp": doc["timestamp"]}, doc, upsert=True)
+                for doc in docs
+            ]
+            with MONGO_OPERATION_SECONDS.labels("rollup_write").time():
+                result = await Database.db.spread_rollups.bulk_write(requests, ordered=False)
+            return result.upserted_count + result.modified_count
+        except Exception as e:
+            logger.error("Failed to store %s spread rollups: %s", len(docs), e)
+            return 0
+    
+    @staticmethod
+    async def get_range(start: datetime, end: Optional[datetime] = None) -> List[dict]:
+        """Get rollups in [start, end) ordered by timestamp."""
+        if not Database.is_connected():
+            return []
         
         try:
-            cutoff = datetime.utcnow() - timedelta(days=days_to_keep)
-            result = await Database.db.price_history.delete_many(
-                {"timestamp": {"$lt": cutoff}}
+            time_range = {"$gte": start}
+            if end is not None:
+                time_range["$lt"] = end
+            cursor = Database.db.spread_rollups.find(
+                {"timestamp": time_range},
+                {"_id": 0},
+                sort=[("timestamp", 1)]
             )
-            logger.info(f"Cleaned up {result.deleted_count} old price records")
+            with MONGO_OPERATION_SECONDS.labels("rollup_find").time(), span("mongo"):
+                return await cursor.to_list(length=None)
+        except Exception as e:
+            logger.error("Failed to get spread rollups: %s", e)
+            return []
+    
+    @staticmethod
+    async def iter_range(
+        start: datetime,
+        end: Optional[datetime] = None,
+        batch_size: int = 5000,
+    ) -> AsyncIterator[List[dict]]:
+        """Stream rollups in [start, end) ordered by timestamp, `batch_size` at a time (secondary preferred)."""
+        if not Database.is_connected():
+            return
+        
+        time_range = {"$gte": start}
+        if end is not None:
+            time_range["$lt"] = end
+        collection = Database.db.spread_rollups.with_options(
+            read_preference=ReadPreference.SECONDARY_PREFERRED
+        )
+        cursor = collection.find({"timestamp": time_range}, {"_id": 0}, sort=[("timestamp", 1)], batch_size=batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class DepthSnapshotService:
+    """Low-cadence persistence of P2P order book depth."""
+    
+    @staticmethod
+    async def store_many(docs: List[dict]) -> int:
+        if not docs or not Database.is_connected():
+            return 0
+        
+        try:
+            with MONGO_OPERATION_SECONDS.labels("depth_insert").time():
+                result = await Database.db.depth_snapshots.insert_many(docs, ordered=False)
+            return len(result.inserted_ids)
+        except Exception as e:
+            logger.error("Failed to store %s depth snapshots: %s", len(docs), e)
+            return 0
+
+
+class AlertStore:
+    """Persistence of registered alerts so they survive restarts."""
+    
+    @staticmethod
+    async def save_many(alerts: List[Alert]) -> None:
+        if not alerts or not Database.is_connected():
+            return
+        
+        try:
+            requests = [
+                ReplaceOne({"id": alert.id}, alert.model_dump(), upsert=True)
+                for alert in alerts
+            ]
+            with MONGO_OPERATION_SECONDS.labels("alert_write").time():
+                await Database.db.alerts.bulk_write(requests, ordered=False)
+        except Exception as e:
+            logger.error("Failed to store %s alerts: %s", len(alerts), e)
+    
+    @staticmethod
+    async def delete(alert_id: str) -> None:
+        if not Database.is_connected():
+            return
+        
+        try:
+            with MONGO_OPERATION_SECONDS.labels("alert_delete").time():
+                await Database.db.alerts.delete_one({"id": alert_id})
+        except Exception as e:
+            logger.error("Failed to delete alert %s: %s", alert_id, e)
+    
+    @staticmethod
+    async def load_all() -> List[Alert]:
+        if not Database.is_connected():
+            return []
+        
+        try:
+            with MONGO_OPERATION_SECONDS.labels("alert_find").time():
+                docs = await Database.db.alerts.find({}, {"_id": 0}).to_list(length=None)
+            return [Alert.model_validate(doc) for doc in docs]
         except Exception as e:
-            logger.error(f"Failed to cleanup old data: {e}")
+            logger.error("Failed to load alerts: %s", e)
+            return []
 
 
 # Singleton instances
 db = Database()
 price_history_service = PriceHistoryService()
+spread_rollup_service = SpreadRollupService()
+depth_snapshot_service = DepthSnapshotService()
+alert_store = AlertStore()
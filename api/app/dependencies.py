@@ -1,5 +1,12 @@
-from fastapi import Request
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, Query, Request
+
+from app.config import get_settings
 from app.services.exchange_service import ExchangeService
+from app.services.alerts import AlertEngine
+from app.services.events import EventBus
 
 def get_exchange_service(request: Request) -> ExchangeService:
     """
@@ -7,3 +14,42 @@ def get_exchange_service(request: Request) -> ExchangeService:
     This ensures that the API uses the exact same instance created during startup.
     """
     return request.app.state.exchange_service
+
+
+def get_alert_engine(request: Request) -> AlertEngine:
+    """Retrieve the AlertEngine instance from app.state."""
+    return request.app.state.alert_engine
+
+
+def get_event_bus(request: Request) -> EventBus:
+    """Retrieve the internal EventBus instance from app.state."""
+    return request.app.state.event_bus
+
+
+def get_pair(
+    pair: Optional[str] = Query(
+        default=None,
+        description="Asset/fiat pair, e.g. USDT/BOB (default: the primary configured pair)",
+    ),
+) -> str:
+    """The requested pair, checked against settings.pairs (case-insensitive)."""
+    pairs = get_settings().pairs_list
+    if pair is None:
+        return pairs[0]
+    pair = pair.strip().upper()
+    if pair not in pairs:
+        raise HTTPException(status_code=400, detail="Supported pairs: " + ", ".join(pairs))
+    return pair
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """
+    Guard for admin endpoints.
+    Admin endpoints are hidden (404) unless ADMIN_TOKEN is configured,
+    and require a matching X-Admin-Token header.
+    """
+    admin_token = get_settings().admin_token
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -1,110 +1,234 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 import asyncio
-import time
+from datetime import datetime, timedelta
 
 from app.config import get_settings
-from app.routes import prices_router, stats_router, health_router
-from app.database import Database, price_history_service
+from app.routes import prices_router, stats_router, health_router, metrics_router, admin_router, alerts_router, export_router, dashboard_router
+from app.database import (
+    Database,
+    price_history_service,
+    spread_rollup_service,
+    depth_snapshot_service,
+    alert_store,
+)
 from app.services import ExchangeService
+from app.services.alerts import AlertEngine
+from app.services.archive import TickArchive, compact_history
+from app.services.events import EventBus, consume, consume_batches
+from app.services.warm_state import load_warm_state, save_warm_state
+from app.services.workers import WorkerPoolFull
+from app.models.ticks import PriceSnapshot, Tick
+from app.services.market_data import read_ticks_ndjson, replay_ticks
+from app.middleware import MetricsMiddleware
+from app.utils.profiling import ServerTimingMiddleware
+from app.utils.logs import configure_logging, shutdown_logging
+from app.utils.webhooks import webhook_hosts
+
+# Get settings
+settings = get_settings()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+configure_logging(
+    level=settings.log_level,
+    fmt=settings.log_format,
+    burst=settings.log_rate_limit_burst,
+    window=settings.log_rate_limit_window,
+    exempt_level=settings.log_rate_limit_exempt_level,
 )
 logger = logging.getLogger(__name__)
 
-# Get settings
-settings = get_settings()
+
+async def save_triggered_alerts(alert_engine: AlertEngine, events: list):
+    """Persist the state (active/triggered_at) of alerts that just fired."""
+    alerts = [alert_engine.get(alert_id) for alert_id in {e.alert_id for e in events}]
+    await alert_store.save_many([alert for alert in alerts if alert is not None])
+
+
+async def process_snapshot(exchange_service: ExchangeService, alert_engine: AlertEngine, ticks: list[Tick]):
+    """
+    Feed a refresh snapshot to the spread analytics and alerts; store rollups,
+    depth snapshots (when due) and triggered alerts.
+    """
+    rollups = exchange_service.spreads.update(ticks)
+    if rollups:
+        await spread_rollup_service.store_many(rollups)
+
+    if settings.depth_snapshot_seconds:
+        for books in exchange_service.pair_books.values():
+            if books.snapshot_due(settings.depth_snapshot_seconds):
+                await depth_snapshot_service.store_many(books.snapshot_documents())
+
+    route = exchange_service.spreads.best_route()
+    events = alert_engine.on_ticks(ticks, route.spread_percent if route else None)
+    if events:
+        await save_triggered_alerts(alert_engine, events)
+
 
 # Background task for fetching prices from APIs (every 5 seconds)
-async def fetch_prices_background(exchange_service: ExchangeService, shared_state: dict):
-    """Background task to fetch prices from external APIs every 5 seconds."""
+async def fetch_prices_background(exchange_service: ExchangeService, bus: EventBus):
+    """Background task to fetch prices from external APIs every 5 seconds and publish each snapshot."""
     while True:
         try:
-            # Force fresh fetch by invalidating cache
-            exchange_service._cache.clear()
-            exchange_service._cache_time.clear()
-
-            response = await exchange_service.get_current_prices()
-            shared_state["prices"] = response
-            shared_state["last_fetch"] = time.time()
-            logger.info(f"[Fetch Task] Updated {len(response.prices)} prices from APIs")
+            # Always a fresh fetch; refresh() also updates the response cache
+            ticks, response = await exchange_service.refresh()
+            await bus.publish(PriceSnapshot(ticks, response, live=response.source != "Mock Data"))
+            logger.debug("[Fetch Task] Published %s prices from APIs", len(response.prices))
         except Exception as e:
-            logger.error(f"[Fetch Task] Error: {e}")
+            logger.error("[Fetch Task] Error: %s", e)
 
         # Fetch every 5 seconds
         await asyncio.sleep(5)
 
 
-# Background task for storing prices to MongoDB (every 1 second)
-async def store_prices_background(shared_state: dict):
-    """Background task to store cached prices to MongoDB every 1 second."""
-    iteration = 0
+# Background task replaying a recorded tick file instead of fetching (replay mode)
+async def replay_prices_background(exchange_service: ExchangeService, bus: EventBus):
+    """Feed recorded ticks through the live pipeline at settings.replay_speed x."""
+
+    async def publish(snapshot: list[Tick]):
+        responses = {}
+        for pair in dict.fromkeys(tick.pair for tick in snapshot):
+            pair_ticks = [tick for tick in snapshot if tick.pair == pair]
+            responses[pair] = exchange_service.build_current_prices(pair_ticks, "Replay", pair)
+            exchange_service._set_cache(f"current_prices:{pair}", responses[pair])
+        response = responses.get(exchange_service.primary_pair) or next(iter(responses.values()))
+        await bus.publish(PriceSnapshot(snapshot, response))
+
+    try:
+        count = await replay_ticks(
+            read_ticks_ndjson(settings.replay_file), publish, speed=settings.replay_speed
+        )
+        logger.info("[Replay Task] Finished replaying %s snapshots from %s", count, settings.replay_file)
+    except Exception as e:
+        logger.error("[Replay Task] Error: %s", e)
+
+
+# Consumer storing published snapshots to MongoDB
+async def store_snapshots(snapshots: list[PriceSnapshot]):
+    """Store every tick of the queued snapshots with one insert_many."""
+    ticks = [tick for snapshot in snapshots for tick in snapshot.ticks]
+    stored = await price_history_service.store_many(ticks)
+    logger.debug("[Store] Stored %s prices from %s snapshots", stored, len(snapshots))
+
+
+# Consumer feeding live snapshots to analytics and alerts (primary pair only)
+def analyze_snapshot(exchange_service: ExchangeService, alert_engine: AlertEngine):
+    async def handler(snapshot: PriceSnapshot):
+        if not snapshot.live:
+            return
+        exchange_service.recent_ticks.extend(snapshot.ticks)
+        primary = exchange_service.primary_pair
+        await process_snapshot(
+            exchange_service, alert_engine, [tick for tick in snapshot.ticks if tick.pair == primary]
+        )
+    return handler
+
+
+# Background task checking the volatility rating for alerts (every 60 seconds)
+async def volatility_alerts_background(exchange_service: ExchangeService, alert_engine: AlertEngine):
+    """Feed the 24h volatility rating to the alert engine, off the refresh path."""
     while True:
-        iteration += 1
         try:
-            response = shared_state.get("prices")
-
-            if response and response.prices:
-                for price in response.prices:
-                    await price_history_service.store_price(
-                        exchange=price.exchange,
-                        bid=price.bid,
-                        ask=price.ask,
-                        last=price.last,
-                        source="realtime"
-                    )
-
-                # Log every 10 iterations (every 10 seconds)
-                if iteration % 10 == 0:
-                    logger.info(f"[Store Task] Iteration {iteration} - Stored {len(response.prices)} prices")
-
-            # Cleanup old data every 3600 iterations (~1 hour)
-            if iteration % 3600 == 0:
-                await price_history_service.cleanup_old_data(7)  # Keep 7 days
-                logger.info("[Store Task] Cleaned up old data")
+            volatility = await exchange_service.get_volatility("24h")
+            events = alert_engine.on_volatility(volatility.rating)
+            if events:
+                await save_triggered_alerts(alert_engine, events)
+        except Exception as e:
+            logger.error("[Volatility Alerts] Error: %s", e)
+
+        await asyncio.sleep(60)
+
 
+# Background task moving aged price history to the cold archives (every hour)
+async def tiering_background(archives: dict[str, TickArchive]):
+    """Background task compacting ticks older than settings.hot_days into each pair's archive every hour."""
+    while True:
+        try:
+            if archives:
+                for pair, archive in archives.items():
+                    archived = await compact_history(archive, settings.hot_days)
+                    logger.info("[Tiering Task] Archived %s %s ticks", archived, pair)
+            else:
+                # Per pair: the (pair, timestamp) index serves the range, not a collection scan
+                cutoff = datetime.utcnow() - timedelta(days=settings.hot_days)
+                for pair in settings.pairs_list:
+                    await price_history_service.delete_before(cutoff, pair=pair)
         except Exception as e:
-            logger.error(f"[Store Task] Error: {e}")
+            logger.error("[Tiering Task] Error: %s", e)
 
-        # Store every 1 second
-        await asyncio.sleep(1)
+        await asyncio.sleep(3600)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
-    logger.info(f"Starting {settings.api_title} v{settings.api_version}")
-    logger.info(f"CORS origins: {settings.cors_origins_list}")
+    logger.info("Starting %s v%s", settings.api_title, settings.api_version)
+    logger.info("CORS origins: %s", settings.cors_origins_list)
 
     # Initialize Exchange Service Singleton
     service = ExchangeService()
     app.state.exchange_service = service
     logger.info("Initialized ExchangeService singleton in app.state")
 
-    # Connect to MongoDB
+    # Warm start: serve the prices saved at the last shutdown until the first refresh
+    warm_state_file = "" if settings.replay_file else settings.warm_state_file
+    if warm_state_file:
+        state = load_warm_state(warm_state_file, settings.warm_state_max_age)
+        if state:
+            service.restore(*state)
+            logger.info("Restored warm state from %s (%s ticks)", warm_state_file, len(state[1]))
+
+    # Connect to MongoDB (ping only; indexes are created in the background)
     await Database.connect()
 
-    # Shared state for communication between tasks
-    shared_state = {"prices": None, "last_fetch": 0}
+    # Alerts registered before the restart
+    alert_engine = AlertEngine(
+        settings.alerts_max, settings.alert_queue_size, webhook_hosts(settings.alert_webhook_hosts)
+    )
+    for alert in await alert_store.load_all():
+        alert_engine.add(alert)
+    app.state.alert_engine = alert_engine
+
+    # Each refresh is published once on the bus; consumers subscribe to it
+    bus = EventBus()
+    app.state.event_bus = bus
+
+    # Start background tasks (alert delivery always, fetch/store only if MongoDB connected)
+    tasks = [
+        asyncio.create_task(Database.ensure_indexes()),
+        asyncio.create_task(alert_engine.run_webhooks(
+            settings.alert_webhook_workers, settings.alert_webhook_timeout
+        )),
+        asyncio.create_task(volatility_alerts_background(service, alert_engine)),
+        asyncio.create_task(consume(
+            bus.subscribe("analytics", settings.event_queue_size),
+            analyze_snapshot(service, alert_engine),
+        )),
+    ]
+    if settings.replay_file:
+        # Replay mode: recorded ticks replace the upstream fetch
+        replay_task = asyncio.create_task(replay_prices_background(service, bus))
+        tasks.append(replay_task)
+        logger.info("Started replay of %s at %sx", settings.replay_file, settings.replay_speed)
 
-    # Start background tasks (only if MongoDB connected)
-    tasks = []
     if Database.is_connected():
-        # Task 1: Fetch from APIs every 5 seconds
-        fetch_task = asyncio.create_task(fetch_prices_background(service, shared_state))
-        tasks.append(fetch_task)
-        logger.info("Started background fetch task (every 5 seconds)")
+        # Producer: fetch from APIs every 5 seconds
+        if not settings.replay_file:
+            fetch_task = asyncio.create_task(fetch_prices_background(service, bus))
+            tasks.append(fetch_task)
+            logger.info("Started background fetch task (every 5 seconds)")
 
-        # Task 2: Store to MongoDB every 1 second
-        store_task = asyncio.create_task(store_prices_background(shared_state))
+        # Consumer: store each published snapshot (batched while MongoDB is behind)
+        store_task = asyncio.create_task(consume_batches(
+            bus.subscribe("storage", settings.event_queue_size), store_snapshots
+        ))
         tasks.append(store_task)
-        logger.info("Started background store task (every 1 second)")
+        tasks.append(asyncio.create_task(tiering_background(service.archives)))
+        logger.info("Started storage consumer")
     else:
         logger.warning("MongoDB not connected - price history disabled")
 
@@ -118,8 +242,18 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+    response = service.latest_prices()
+    if warm_state_file and response is not None and response.source != "Mock Data":
+        try:
+            count = save_warm_state(warm_state_file, response, service.recent_ticks)
+            logger.info("Saved warm state to %s (%s ticks)", warm_state_file, count)
+        except Exception as e:
+            logger.error("Failed to save warm state: %s", e)
+
+    service.workers.shutdown()
     await Database.disconnect()
     logger.info("Shutting down Dollar Tracker API")
+    shutdown_logging()
 
 
 # Create FastAPI app with lifespan
@@ -163,10 +297,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Full worker pool: 503 instead of an unbounded wait
+@app.exception_handler(WorkerPoolFull)
+async def worker_pool_full_handler(request: Request, exc: WorkerPoolFull):
+    """Every aggregation worker is busy and the wait queue is full: ask the client to retry."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+# Request latency metrics and (admin-enabled) Server-Timing
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(prices_router, prefix="/api/v1")
 app.include_router(stats_router, prefix="/api/v1")
+app.include_router(alerts_router, prefix="/api/v1")
+app.include_router(export_router, prefix="/api/v1")
+app.include_router(dashboard_router, prefix="/api/v1")
+app.include_router(admin_router)
 
 
 # Root endpoint
@@ -178,5 +333,6 @@ async def root():
         "version": settings.api_version,
         "docs": "/docs",
         "health": "/health",
+        "metrics": "/metrics",
         "sources": ["Binance P2P", "OKX P2P"],
     }
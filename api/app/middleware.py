@@ -0,0 +1,42 @@
+"""
+ASGI middleware for request instrumentation.
+"""
+from time import perf_counter
+
+from app.utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    """
+    Record request latency and status per route template.
+
+    Implemented as a plain ASGI middleware (rather than BaseHTTPMiddleware)
+    so it adds no extra task or body buffering per request. Routes are
+    labelled by their path template to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.labels(method, template).observe(perf_counter() - start)
+            HTTP_REQUESTS.labels(method, template, str(status)).inc()
@@ -1,17 +1,27 @@
 from app.models.schemas import (
     CurrentPricesResponse,
+    QuoteResponse,
     PriceHistoryResponse,
+    PriceCompareResponse,
     VolatilityResponse,
+    IndicatorsResponse,
+    SpreadsResponse,
     SourcesResponse,
+    DashboardResponse,
     HealthResponse,
     ErrorResponse,
 )
 
 __all__ = [
     "CurrentPricesResponse",
+    "QuoteResponse",
     "PriceHistoryResponse",
+    "PriceCompareResponse",
     "VolatilityResponse",
+    "IndicatorsResponse",
+    "SpreadsResponse",
     "SourcesResponse",
+    "DashboardResponse",
     "HealthResponse",
     "ErrorResponse",
 ]
@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from app.config import DEFAULT_PAIR
 
 
 # ============================================
@@ -28,6 +30,7 @@ class BestPrice(BaseModel):
 class CurrentPricesResponse(BaseModel):
     """Response for current prices endpoint."""
     timestamp: datetime
+    pair: str = DEFAULT_PAIR
     base_currency: str = "USD"
     quote_currency: str = "BOB"
     prices: list[ExchangePrice]
@@ -37,6 +40,28 @@ class CurrentPricesResponse(BaseModel):
     source: str = Field(..., description="Data source name")
 
 
+class ExchangeQuote(BaseModel):
+    """Cost of filling an amount on one exchange's book."""
+    exchange: str
+    name: str
+    filled: float = Field(..., description="USDT filled (less than requested if the book is too thin)")
+    total: float = Field(..., description="BOB paid (buy) or received (sell)")
+    average_price: float
+    worst_price: float
+    levels: int = Field(..., description="Ads used")
+    complete: bool
+    updated_at: datetime
+
+
+class QuoteResponse(BaseModel):
+    """Response for the quote endpoint."""
+    amount: float
+    side: str
+    pair: str = DEFAULT_PAIR
+    quotes: list[ExchangeQuote]
+    best: Optional[ExchangeQuote] = None
+
+
 # ============================================
 # History Models
 # ============================================
@@ -69,6 +94,24 @@ class PriceHistoryResponse(BaseModel):
     summary: PriceHistorySummary
 
 
+class ExchangeSeries(BaseModel):
+    """OHLC columns of one exchange on a shared timestamp axis (null where no ticks)."""
+    exchange: str
+    name: str
+    open: list[Optional[float]]
+    high: list[Optional[float]]
+    low: list[Optional[float]]
+    close: list[Optional[float]]
+
+
+class PriceCompareResponse(BaseModel):
+    """Response for the history comparison endpoint."""
+    interval: str
+    bucket: str
+    timestamps: list[datetime]
+    series: list[ExchangeSeries]
+
+
 # ============================================
 # Stats Models
 # ============================================
@@ -88,6 +131,123 @@ class VolatilityResponse(BaseModel):
     range: PriceRange
 
 
+class IndicatorSeries(BaseModel):
+    """One indicator with its parameters; each output aligned with `timestamps` (None before a full window)."""
+    indicator: str
+    params: dict[str, float]
+    values: dict[str, list[Optional[float]]]
+
+
+class IndicatorsResponse(BaseModel):
+    """Response for the indicators endpoint."""
+    pair: str = DEFAULT_PAIR
+    exchange: str
+    interval: str
+    bucket: str
+    timestamps: list[datetime]
+    close: list[float]
+    indicators: list[IndicatorSeries]
+
+
+class SpreadRouteInfo(BaseModel):
+    """Buy on one exchange at its ask and sell on another at its bid."""
+    buy_exchange: str
+    sell_exchange: str
+    buy_price: float
+    sell_price: float
+    spread: float = Field(..., description="BOB gained per USD (negative when the route loses)")
+    spread_percent: float
+
+
+class SpreadRollup(BaseModel):
+    """Per-minute rollup of spread metrics."""
+    timestamp: datetime
+    samples: int
+    best_spread_percent_avg: float
+    best_spread_percent_max: float
+    best_route: Optional[SpreadRouteInfo] = None
+    reference: Optional[float] = None
+    premiums: dict[str, float] = Field(default_factory=dict)
+
+
+class SpreadsResponse(BaseModel):
+    """Response for the spread analytics endpoint."""
+    timestamp: Optional[datetime] = None
+    reference: Optional[float] = Field(default=None, description="Official BCB rate")
+    premiums: dict[str, float] = Field(default_factory=dict, description="Premium over the official rate (%)")
+    matrix: dict[str, dict[str, float]] = Field(
+        default_factory=dict, description="matrix[buy][sell]: sell bid minus buy ask"
+    )
+    best_route: Optional[SpreadRouteInfo] = None
+    history: list[SpreadRollup] = Field(default_factory=list)
+
+
+# ============================================
+# Alert Models
+# ============================================
+
+class AlertCreate(BaseModel):
+    """Alert registration."""
+    kind: Literal["price", "spread", "volatility"]
+    exchange: Optional[str] = Field(default=None, description="Exchange for price alerts (all exchanges if omitted)")
+    threshold: Optional[float] = Field(default=None, description="Price (BOB) or best-route spread (%)")
+    direction: Literal["above", "below", "cross"] = "above"
+    rating: Optional[Literal["low", "medium", "high"]] = Field(
+        default=None, description="Volatility rating to watch for (any change if omitted)"
+    )
+    webhook_url: Optional[str] = Field(default=None, description="POST deliveries to this URL")
+    once: bool = Field(default=True, description="Deactivate after the first trigger")
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if self.kind in ("price", "spread") and self.threshold is None:
+            raise ValueError(f"{self.kind} alerts require a threshold")
+        if self.webhook_url and not self.webhook_url.startswith(("http://", "https://")):
+            raise ValueError("webhook_url must be an http(s) URL")
+        return self
+
+
+class Alert(AlertCreate):
+    """Registered alert, as stored."""
+    id: str
+    created_at: datetime
+    active: bool = True
+    triggered_at: Optional[datetime] = None
+    secret_hash: Optional[str] = Field(default=None, description="SHA-256 of the secret required to delete it")
+
+
+class AlertInfo(BaseModel):
+    """Registered alert as shown to any client (no webhook URL or secret)."""
+    id: str
+    kind: str
+    exchange: Optional[str] = None
+    threshold: Optional[float] = None
+    direction: str
+    rating: Optional[str] = None
+    once: bool
+    created_at: datetime
+    active: bool = True
+    triggered_at: Optional[datetime] = None
+
+
+class AlertCreated(AlertInfo):
+    """Response to an alert registration."""
+    webhook_url: Optional[str] = None
+    secret: str = Field(..., description="Send as X-Alert-Secret to delete the alert; only returned here")
+
+
+class AlertEvent(BaseModel):
+    """A triggered alert, as delivered over the stream or webhook."""
+    alert_id: str
+    kind: str
+    exchange: Optional[str] = None
+    threshold: Optional[float] = None
+    value: Optional[float] = None
+    rating: Optional[str] = None
+    timestamp: datetime
+    message: str
+
+
 # ============================================
 # Source Models
 # ============================================
@@ -106,6 +266,18 @@ class SourcesResponse(BaseModel):
     sources: list[SourceInfo]
 
 
+# ============================================
+# Dashboard Models
+# ============================================
+
+class DashboardResponse(BaseModel):
+    """Response for the dashboard endpoint: one screen's data in one payload."""
+    current: CurrentPricesResponse
+    history: PriceHistoryResponse
+    volatility: VolatilityResponse
+    sources: SourcesResponse
+
+
 # ============================================
 # Error Models
 # ============================================
@@ -0,0 +1,102 @@
+"""
+Compact internal price records.
+
+The fetch → store → history pipeline passes these tuples around instead of
+Pydantic models; API models are only built at the response boundary.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from app.config import DEFAULT_PAIR
+from app.models.schemas import CurrentPricesResponse, PriceHistorySummary
+
+
+EXCHANGE_NAMES = {
+    "binance": "Binance P2P",
+    "okx": "OKX P2P",
+    "airtm": "AirTM",
+    "wallbit": "Wallbit",
+    "takenos": "Takenos",
+    "bcb": "BCB (Oficial)",
+}
+
+# P2P exchanges quote the pair's asset: their display names carry it
+P2P_EXCHANGES = ("binance", "okx")
+
+# Fields read from price_history documents
+TICK_PROJECTION = {"_id": 0, "exchange": 1, "bid": 1, "ask": 1, "last": 1, "timestamp": 1, "source": 1, "pair": 1}
+
+
+def split_pair(pair: str) -> tuple[str, str]:
+    """("USDT", "BOB") for "USDT/BOB"."""
+    asset, _, fiat = pair.partition("/")
+    if not asset or not fiat:
+        raise ValueError(f"Invalid pair: {pair!r} (expected ASSET/FIAT)")
+    return asset, fiat
+
+
+def exchange_name(exchange: str, pair: str = DEFAULT_PAIR) -> str:
+    """Display name of `exchange` quoting `pair`: "Binance P2P (USDT)" for USDT/BOB."""
+    name = EXCHANGE_NAMES.get(exchange, exchange)
+    if exchange in P2P_EXCHANGES:
+        return f"{name} ({split_pair(pair)[0]})"
+    return name
+
+
+class Tick(NamedTuple):
+    """One price observation from one exchange."""
+    exchange: str
+    bid: float
+    ask: float
+    last: float
+    timestamp: datetime
+    source: str = "api"
+    pair: str = DEFAULT_PAIR
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "Tick":
+        return cls(
+            doc["exchange"],
+            doc.get("bid", 0.0),
+            doc.get("ask", 0.0),
+            doc.get("last", 0.0),
+            doc["timestamp"],
+            doc.get("source", "api"),
+            doc.get("pair") or DEFAULT_PAIR,
+        )
+
+    def to_document(self) -> dict:
+        return self._asdict()
+
+
+class HistoryPoint(NamedTuple):
+    """One aggregated history bucket."""
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    reference_close: Optional[float] = None
+
+
+class HistorySeries(NamedTuple):
+    """Aggregated history for one request, before conversion to API models."""
+    exchange: str
+    interval: str
+    points: list[HistoryPoint]
+    summary: PriceHistorySummary
+
+
+class PriceSnapshot(NamedTuple):
+    """One refresh, as published on the event bus: the ticks of every pair, the primary pair's response."""
+    ticks: list[Tick]
+    response: CurrentPricesResponse
+    live: bool = True  # False for the mock fallback
+
+
+class BookLevel(NamedTuple):
+    """One P2P ad: price (fiat per asset), available asset and per-order limits in fiat."""
+    price: float
+    available: float
+    min_amount: float = 0.0
+    max_amount: float = 0.0
@@ -1,5 +1,19 @@
 from app.routes.prices import router as prices_router
 from app.routes.stats import router as stats_router
 from app.routes.health import router as health_router
+from app.routes.metrics import router as metrics_router
+from app.routes.admin import router as admin_router
+from app.routes.alerts import router as alerts_router
+from app.routes.export import router as export_router
+from app.routes.dashboard import router as dashboard_router
 
-__all__ = ["prices_router", "stats_router", "health_router"]
+__all__ = [
+    "prices_router",
+    "stats_router",
+    "health_router",
+    "metrics_router",
+    "admin_router",
+    "alerts_router",
+    "export_router",
+    "dashboard_router",
+]
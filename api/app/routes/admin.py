@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.dependencies import require_admin
+from app.utils.profiling import (
+    profiler,
+    enable_server_timing,
+    disable_server_timing,
+    server_timing_remaining,
+)
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post(
+    "/profiling/start",
+    summary="Start event loop sampling profiler",
+    description="Samples the event loop thread's stack for a bounded duration.",
+)
+async def start_profiling(
+    duration: float = Query(default=30.0, gt=0, le=300, description="Seconds to sample"),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000, description="Sampling interval"),
+):
+    """
+    Start a profiling session.
+
+    Only one session runs at a time. Download the result from
+    `/admin/profiling/profile` once it completes.
+    """
+    if not profiler.start(duration, interval_ms / 1000):
+        raise HTTPException(status_code=409, detail="Profiling session already running")
+    return {"status": "running", "duration": duration, "interval_ms": interval_ms}
+
+
+@router.get(
+    "/profiling/status",
+    summary="Profiling status",
+)
+async def profiling_status():
+    """Return the state of the profiler and Server-Timing collection."""
+    return {
+        "profiler_running": profiler.running,
+        "samples": profiler.samples,
+        "server_timing_remaining": round(server_timing_remaining(), 1),
+    }
+
+
+@router.get(
+    "/profiling/profile",
+    response_class=PlainTextResponse,
+    summary="Download profile",
+    description="Folded stacks (flamegraph.pl / speedscope compatible) from the last session.",
+)
+async def download_profile():
+    """Download the collected profile in folded-stack format."""
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiling session still running")
+    return PlainTextResponse(
+        profiler.folded(),
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+    )
+
+
+@router.post(
+    "/server-timing",
+    summary="Enable Server-Timing headers",
+    description="Adds per-request Mongo/aggregation/serialization timings for a bounded duration.",
+)
+async def start_server_timing(
+    duration: float = Query(default=300.0, gt=0, le=3600, description="Seconds to keep enabled"),
+):
+    """Enable Server-Timing response headers."""
+    enable_server_timing(duration)
+    return {"status": "enabled", "duration": duration}
+
+
+@router.delete(
+    "/server-timing",
+    summary="Disable Server-Timing headers",
+)
+async def stop_server_timing():
+    """Disable Server-Timing response headers."""
+    disable_server_timing()
+    return {"status": "disabled"}
@@ -0,0 +1,137 @@
+import asyncio
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
+from app.database import alert_store
+from app.dependencies import get_alert_engine
+from app.models.schemas import AlertCreate, AlertCreated, AlertInfo
+from app.models.ticks import EXCHANGE_NAMES
+from app.services.alerts import AlertEngine, AlertLimitExceeded
+from app.utils.profiling import TimedRoute
+from app.utils.webhooks import UnsafeWebhookURL, check_webhook_url, webhook_hosts
+
+router = APIRouter(prefix="/alerts", tags=["Alerts"], route_class=TimedRoute)
+
+# Seconds between keep-alive comments on idle streams
+STREAM_KEEPALIVE = 15.0
+
+
+@router.post(
+    "",
+    response_model=AlertCreated,
+    status_code=201,
+    summary="Register an alert",
+    description="Registers a price, spread or volatility alert. Webhooks require X-Webhook-Token.",
+)
+async def create_alert(
+    request: AlertCreate,
+    x_webhook_token: Optional[str] = Header(default=None),
+    engine: AlertEngine = Depends(get_alert_engine),
+):
+    """
+    Register an alert.
+    
+    Price alerts trigger when an exchange's price (or any exchange's, if
+    `exchange` is omitted) crosses `threshold`; spread alerts when the best
+    route spread (%) crosses it; volatility alerts when the 24h rating changes.
+    The returned `secret` is needed to delete the alert.
+    """
+    if request.exchange and request.exchange not in EXCHANGE_NAMES:
+        raise HTTPException(status_code=400, detail=f"Unknown exchange: {request.exchange}")
+    if request.webhook_url:
+        settings = get_settings()
+        if not settings.alert_webhook_token:
+            raise HTTPException(status_code=403, detail="Webhook alerts are disabled")
+        if not x_webhook_token or not secrets.compare_digest(x_webhook_token, settings.alert_webhook_token):
+            raise HTTPException(status_code=403, detail="Invalid webhook token")
+        try:
+            await check_webhook_url(request.webhook_url, webhook_hosts(settings.alert_webhook_hosts))
+        except UnsafeWebhookURL as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    secret = secrets.token_urlsafe(24)
+    try:
+        alert = engine.create(request, secret)
+    except AlertLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    await alert_store.save_many([alert])
+    return AlertCreated(**alert.model_dump(exclude={"secret_hash"}), secret=secret)
+
+
+@router.get(
+    "",
+    response_model=list[AlertInfo],
+    summary="List alerts",
+    description="Returns all registered alerts (without webhook URLs).",
+)
+async def list_alerts(engine: AlertEngine = Depends(get_alert_engine)):
+    """List registered alerts with their state."""
+    return engine.alerts()
+
+
+@router.get(
+    "/stream",
+    summary="Stream triggered alerts",
+    description="Server-Sent Events stream of triggered alerts.",
+)
+async def stream_alerts(engine: AlertEngine = Depends(get_alert_engine)):
+    """
+    Stream triggered alerts.
+    
+    Each event is an `AlertEvent` JSON document. Events are dropped for
+    clients that fall more than the configured queue size behind.
+    """
+    queue = engine.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: alert\ndata: {event.model_dump_json()}\n\n"
+        finally:
+            engine.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get(
+    "/{alert_id}",
+    response_model=AlertInfo,
+    summary="Get an alert",
+)
+async def get_alert(alert_id: str, engine: AlertEngine = Depends(get_alert_engine)):
+    """Get one alert by id."""
+    alert = engine.get(alert_id)
+    if alert is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
+
+@router.delete(
+    "/{alert_id}",
+    status_code=204,
+    summary="Delete an alert",
+    description="Deletes an alert; requires the secret returned at creation as X-Alert-Secret.",
+)
+async def delete_alert(
+    alert_id: str,
+    x_alert_secret: Optional[str] = Header(default=None),
+    engine: AlertEngine = Depends(get_alert_engine),
+):
+    """Delete an alert."""
+    alert = engine.get(alert_id)
+    if alert is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    if not engine.check_secret(alert, x_alert_secret):
+        raise HTTPException(status_code=403, detail="Invalid alert secret")
+    engine.remove(alert_id)
+    await alert_store.delete(alert_id)
+    return Response(status_code=204)
@@ -0,0 +1,55 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.dependencies import get_exchange_service, get_pair
+from app.utils.profiling import TimedRoute
+from app.services import ExchangeService
+from app.services.exchange_service import INTERVAL_HOURS
+from app.models import DashboardResponse
+from app.models.ticks import EXCHANGE_NAMES
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=TimedRoute)
+
+
+@router.get(
+    "",
+    response_model=DashboardResponse,
+    summary="Get dashboard data",
+    description="Returns current prices, price history, volatility and sources in one response.",
+)
+async def get_dashboard(
+    interval: str = Query(
+        default="24h",
+        description="History window, also the volatility period",
+        enum=list(INTERVAL_HOURS),
+    ),
+    exchange: Optional[str] = Query(default=None, description="Filter the history by exchange"),
+    max_points: Optional[int] = Query(
+        default=None,
+        ge=3,
+        le=10000,
+        description="Downsample history points to at most this many",
+    ),
+    downsample: str = Query(
+        default="lttb",
+        description="Downsampling algorithm used with max_points",
+        enum=["lttb", "minmax"],
+    ),
+    pair: str = Depends(get_pair),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Get dashboard data.
+    
+    Replaces separate current, history, volatility and sources requests
+    with one round trip. History and volatility come from a single history
+    read, and the payload is cached until the next price refresh.
+    """
+    if interval not in INTERVAL_HOURS:
+        raise HTTPException(status_code=400, detail="Supported intervals: " + ", ".join(INTERVAL_HOURS))
+    if downsample not in ("lttb", "minmax"):
+        raise HTTPException(status_code=400, detail="downsample must be 'lttb' or 'minmax'")
+    if exchange is not None and exchange not in EXCHANGE_NAMES:
+        raise HTTPException(status_code=400, detail=f"Unknown exchange: {exchange}")
+    return await service.get_dashboard(interval, exchange, max_points, downsample, pair)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import get_exchange_service, get_pair
+from app.database import Database, spread_rollup_service
+from app.models.ticks import EXCHANGE_NAMES
+from app.services.archive import iter_federated
+from app.services.exchange_service import ExchangeService
+from app.utils.encoding import FormatUnavailable
+from app.utils.export import (
+    ROLLUP_SCHEMA,
+    TICK_SCHEMA,
+    check_export_format,
+    encode_export,
+    rollup_batches,
+)
+from app.utils.helpers import naive_utc
+from app.utils.profiling import TimedRoute
+
+router = APIRouter(prefix="/export", tags=["Export"], route_class=TimedRoute)
+
+# Documents read from the cursor (and encoded) at a time
+EXPORT_BATCH_SIZE = 5000
+
+
+@router.get(
+    "",
+    summary="Export raw history",
+    description="Streams raw ticks or spread rollups for a time range as NDJSON, CSV or Parquet.",
+)
+async def export_history(
+    dataset: str = Query(default="ticks", description="ticks or rollups", enum=["ticks", "rollups"]),
+    start: Optional[datetime] = Query(default=None, alias="from", description="Range start (ISO 8601, default 24h ago)"),
+    end: Optional[datetime] = Query(default=None, alias="to", description="Range end, exclusive (ISO 8601, default now)"),
+    exchanges: Optional[str] = Query(default=None, description="Comma-separated exchanges (ticks only, default: all)"),
+    fmt: str = Query(default="ndjson", alias="format", enum=["ndjson", "csv", "parquet"]),
+    pair: str = Depends(get_pair),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Export raw history.
+    
+    The response is streamed from a batched database cursor (secondary
+    preferred), so memory use does not grow with the range. Ticks are
+    those of `pair`, read from the cold archive before its watermark;
+    rollups always cover the primary pair.
+    """
+    if dataset not in ("ticks", "rollups"):
+        raise HTTPException(status_code=400, detail="dataset must be 'ticks' or 'rollups'")
+    try:
+        media_type = check_export_format(fmt)
+    except FormatUnavailable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    if media_type is None:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson', 'csv' or 'parquet'")
+
+    selected = None
+    if exchanges:
+        selected = list(dict.fromkeys(e.strip().lower() for e in exchanges.split(",") if e.strip()))
+        unknown = [e for e in selected if e not in EXCHANGE_NAMES]
+        if unknown:
+            raise HTTPException(status_code=400, detail="Unknown exchanges: " + ", ".join(unknown))
+
+    end = naive_utc(end) or datetime.utcnow()
+    start = naive_utc(start) or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if not Database.is_connected():
+        raise HTTPException(status_code=503, detail="Price history storage is not available")
+
+    if dataset == "ticks":
+        schema = TICK_SCHEMA
+        batches = iter_federated(
+            service.archives.get(pair), start, end, selected, batch_size=EXPORT_BATCH_SIZE, pair=pair
+        )
+    else:
+        schema = ROLLUP_SCHEMA
+        batches = rollup_batches(spread_rollup_service.iter_range(start, end, batch_size=EXPORT_BATCH_SIZE))
+
+    filename = f"{dataset}_{start:%Y%m%dT%H%M%S}_{end:%Y%m%dT%H%M%S}.{fmt}"
+    return StreamingResponse(
+        encode_export(batches, schema, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
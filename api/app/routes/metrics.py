@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics",
+    description="Returns application metrics in Prometheus text exposition format.",
+)
+async def get_metrics():
+    """
+    Metrics endpoint.
+
+    Exposes fetch, cache, database and request latency metrics
+    for scraping by Prometheus-compatible collectors.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
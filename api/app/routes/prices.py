@@ -1,29 +1,129 @@
-from fastapi import APIRouter, Query, Depends
+import asyncio
+from fastapi import APIRouter, Query, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
 from typing import Optional
 
-from app.dependencies import get_exchange_service
+from app.config import get_settings
+from app.dependencies import get_exchange_service, get_event_bus, get_pair
+from app.utils.profiling import TimedRoute
+from app.utils.helpers import naive_utc
 from app.services import ExchangeService
-from app.models import CurrentPricesResponse, PriceHistoryResponse
+from app.services.events import EventBus
+from app.services.exchange_service import HISTORY_BUCKETS
+from app.models import CurrentPricesResponse, QuoteResponse, PriceHistoryResponse, PriceCompareResponse
+from app.models.ticks import EXCHANGE_NAMES
+from app.utils.encoding import (
+    HISTORY_FORMATS,
+    JSON,
+    FormatUnavailable,
+    encode_history,
+    negotiate_history_format,
+)
+
+router = APIRouter(prefix="/prices", tags=["Prices"], route_class=TimedRoute)
+
+# Seconds between keep-alive comments on idle streams
+STREAM_KEEPALIVE = 15.0
+
 
-router = APIRouter(prefix="/prices", tags=["Prices"])
+async def _json_response(service: ExchangeService, model, size: int) -> Response:
+    """Serialize a (potentially large) response model on the worker pool instead of the event loop."""
+    body = await service.workers.run(model.model_dump_json, size=size)
+    return Response(content=body, media_type=JSON)
+
+
+def _check_window(start: Optional[datetime], end: Optional[datetime], bucket: Optional[str]) -> None:
+    if bucket is not None and bucket not in HISTORY_BUCKETS:
+        raise HTTPException(status_code=400, detail="Supported buckets: " + ", ".join(HISTORY_BUCKETS))
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
 
 
 @router.get(
     "/current",
     response_model=CurrentPricesResponse,
     summary="Get current exchange rates",
-    description="Returns current USD/BOB exchange rates from all available sources.",
+    description="Returns current exchange rates of one pair (default USDT/BOB) from all available sources.",
 )
 async def get_current_prices(
-    service: ExchangeService = Depends(get_exchange_service)
+    pair: str = Depends(get_pair),
+    service: ExchangeService = Depends(get_exchange_service),
 ):
     """
     Get current exchange rates (US1).
     
     Returns the current dollar exchange rate from multiple sources,
     including the average price and best buy/sell recommendations.
+    Other configured pairs are selected with `pair`.
+    """
+    return await service.get_current_prices(pair)
+
+
+@router.get(
+    "/stream",
+    summary="Stream current exchange rates",
+    description="Server-Sent Events stream with the current prices after every refresh.",
+)
+async def stream_current_prices(
+    pair: str = Depends(get_pair),
+    bus: EventBus = Depends(get_event_bus),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Stream current exchange rates.
+    
+    Each event is a `CurrentPricesResponse` JSON document of `pair`, sent as
+    each refresh is published. Clients that fall behind skip to the latest prices.
     """
-    return await service.get_current_prices()
+    # One name for every client: their queue metrics add up (a label per client would grow without bound)
+    subscription = bus.subscribe("stream", get_settings().stream_queue_size, policy="drop_oldest")
+
+    async def events():
+        try:
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(subscription.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                response = snapshot.response
+                if response.pair != pair:
+                    # Snapshots carry the primary pair's response; the refresh cached the others
+                    response = await service.get_current_prices(pair)
+                yield f"event: prices\ndata: {response.model_dump_json()}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get(
+    "/quote",
+    response_model=QuoteResponse,
+    summary="Quote an amount",
+    description="Returns the rate for buying or selling an amount of the pair's asset on each P2P book.",
+)
+async def get_quote(
+    amount: float = Query(..., gt=0, le=10_000_000, description="Amount of the asset (USDT for USDT/BOB)"),
+    side: str = Query(
+        default="buy",
+        description="buy: pay BOB for USDT (walks asks); sell: receive BOB (walks bids)",
+        enum=["buy", "sell"],
+    ),
+    exchange: Optional[str] = Query(default=None, description="Limit to one exchange"),
+    pair: str = Depends(get_pair),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Quote an amount.
+    
+    Walks the latest order book of each P2P exchange from the best ad,
+    respecting per-ad limits, and reports the average and worst price.
+    """
+    if side not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="side must be 'buy' or 'sell'")
+    return await service.get_quote(amount, side, exchange, pair)
 
 
 @router.get(
@@ -42,6 +142,44 @@ async def get_price_history(
         default=None,
         description="Filter by specific exchange",
     ),
+    max_points: Optional[int] = Query(
+        default=None,
+        ge=3,
+        le=10000,
+        description="Downsample data points to at most this many (e.g. chart width in pixels)",
+    ),
+    downsample: str = Query(
+        default="lttb",
+        description="Downsampling algorithm used with max_points",
+        enum=["lttb", "minmax"],
+    ),
+    start: Optional[datetime] = Query(
+        default=None,
+        alias="from",
+        description="Window start (ISO 8601, UTC if no offset); defaults to `interval` before `to`",
+    ),
+    end: Optional[datetime] = Query(
+        default=None,
+        alias="to",
+        description="Window end, exclusive (ISO 8601); defaults to now",
+    ),
+    bucket: Optional[str] = Query(
+        default=None,
+        description="Aggregate into fixed, epoch-aligned buckets",
+        enum=list(HISTORY_BUCKETS),
+    ),
+    since: Optional[datetime] = Query(
+        default=None,
+        description="Timestamp of the newest point already held; only that bucket and newer are returned",
+    ),
+    fmt: Optional[str] = Query(
+        default=None,
+        alias="format",
+        description="Response format; overrides the Accept header",
+        enum=list(HISTORY_FORMATS),
+    ),
+    accept: Optional[str] = Header(default=None),
+    pair: str = Depends(get_pair),
     service: ExchangeService = Depends(get_exchange_service),
 ):
     """
@@ -49,5 +187,69 @@ async def get_price_history(
     
     Returns price history with OHLCV data for the specified interval.
     Users can filter by exchange and select different time ranges.
+    Long ranges can be reduced server-side with `max_points`.
+    Columnar JSON, MessagePack and Arrow are available via `format` or Accept.
+    Clients refreshing a chart pass `since` to fetch only new buckets.
+    """
+    start, end, since = naive_utc(start), naive_utc(end), naive_utc(since)
+    _check_window(start, end, bucket)
+    window = dict(start=start, end=end, bucket=bucket, since=since, pair=pair)
+    
+    media_type = negotiate_history_format(fmt, accept)
+    if media_type is None:
+        raise HTTPException(status_code=406, detail="Supported formats: " + ", ".join(HISTORY_FORMATS))
+    if media_type == JSON:
+        history = await service.get_price_history(interval, exchange, max_points, downsample, **window)
+        return await _json_response(service, history, len(history.data_points))
+    
+    series = await service.get_history_series(interval, exchange, max_points, downsample, **window)
+    try:
+        body = await service.workers.run(encode_history, series, media_type, size=len(series.points))
+    except FormatUnavailable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+
+@router.get(
+    "/history/compare",
+    response_model=PriceCompareResponse,
+    summary="Compare exchange price history",
+    description="Returns per-exchange OHLC series aligned on a shared timestamp axis.",
+)
+async def compare_price_history(
+    exchanges: Optional[str] = Query(
+        default=None,
+        description="Comma-separated exchanges (default: all)",
+    ),
+    interval: str = Query(
+        default="24h",
+        description="Time interval for historical data",
+        enum=["1h", "24h", "7d", "30d", "1y"],
+    ),
+    start: Optional[datetime] = Query(default=None, alias="from", description="Window start (ISO 8601)"),
+    end: Optional[datetime] = Query(default=None, alias="to", description="Window end, exclusive (ISO 8601)"),
+    bucket: Optional[str] = Query(
+        default=None,
+        description="Bucket width (default depends on interval)",
+        enum=list(HISTORY_BUCKETS),
+    ),
+    pair: str = Depends(get_pair),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Compare exchanges side by side.
+    
+    Replaces one history request per exchange: all series come from a
+    single query and share the `timestamps` axis, with null values for
+    buckets in which an exchange had no data.
     """
-    return await service.get_price_history(interval, exchange)
+    selected = [e.strip().lower() for e in exchanges.split(",") if e.strip()] if exchanges else list(EXCHANGE_NAMES)
+    unknown = [e for e in selected if e not in EXCHANGE_NAMES]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail="Unknown exchanges: " + ", ".join(unknown))
+    start, end = naive_utc(start), naive_utc(end)
+    _check_window(start, end, bucket)
+    compare = await service.get_history_compare(
+        list(dict.fromkeys(selected)), interval, start=start, end=end, bucket=bucket, pair=pair
+    )
+    return await _json_response(service, compare, len(compare.timestamps) * len(compare.series))
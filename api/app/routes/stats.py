@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Query, Depends
+from typing import Optional
 
-from app.dependencies import get_exchange_service
+from fastapi import APIRouter, Query, Depends, HTTPException
+
+from app.dependencies import get_exchange_service, get_pair
+from app.utils.indicators import INDICATORS
+from app.utils.profiling import TimedRoute
 from app.services import ExchangeService
-from app.models import VolatilityResponse, SourcesResponse
+from app.services.exchange_service import HISTORY_BUCKETS, INTERVAL_HOURS
+from app.models import VolatilityResponse, IndicatorsResponse, SpreadsResponse, SourcesResponse
+from app.models.ticks import EXCHANGE_NAMES
 
-router = APIRouter(prefix="/stats", tags=["Statistics"])
+router = APIRouter(prefix="/stats", tags=["Statistics"], route_class=TimedRoute)
 
 
 @router.get(
@@ -19,6 +25,7 @@ async def get_volatility(
         description="Period for volatility calculation",
         enum=["1h", "24h", "7d", "30d"],
     ),
+    pair: str = Depends(get_pair),
     service: ExchangeService = Depends(get_exchange_service),
 ):
     """
@@ -27,7 +34,91 @@ async def get_volatility(
     Calculates and returns volatility statistics including
     standard deviation and a qualitative rating (low/medium/high).
     """
-    return await service.get_volatility(period)
+    return await service.get_volatility(period, pair)
+
+
+@router.get(
+    "/indicators",
+    response_model=IndicatorsResponse,
+    summary="Get technical indicators",
+    description="Returns SMA, EMA, Bollinger bands and RSI over the bucketed price history.",
+)
+async def get_indicators(
+    indicators: str = Query(
+        default=",".join(INDICATORS),
+        description="Comma-separated indicators: " + ", ".join(INDICATORS),
+    ),
+    interval: str = Query(
+        default="24h",
+        description="Time interval for historical data",
+        enum=list(INTERVAL_HOURS),
+    ),
+    exchange: Optional[str] = Query(default=None, description="Filter by specific exchange"),
+    bucket: Optional[str] = Query(
+        default=None,
+        description="Bucket width (default depends on interval)",
+        enum=list(HISTORY_BUCKETS),
+    ),
+    period: Optional[int] = Query(
+        default=None,
+        ge=2,
+        le=200,
+        description="Window in buckets (default 20; 14 for RSI)",
+    ),
+    k: float = Query(default=2.0, gt=0, le=5, description="Bollinger band width in standard deviations"),
+    pair: str = Depends(get_pair),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Get technical indicators.
+    
+    Computed server-side over the same buckets as the price history and
+    cached per (interval, exchange, indicator, params), so dashboards do
+    not each recompute them.
+    """
+    names = list(dict.fromkeys(name.strip().lower() for name in indicators.split(",") if name.strip()))
+    unknown = [name for name in names if name not in INDICATORS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail="Supported indicators: " + ", ".join(INDICATORS))
+    if interval not in INTERVAL_HOURS:
+        raise HTTPException(status_code=400, detail="Supported intervals: " + ", ".join(INTERVAL_HOURS))
+    if bucket is not None and bucket not in HISTORY_BUCKETS:
+        raise HTTPException(status_code=400, detail="Supported buckets: " + ", ".join(HISTORY_BUCKETS))
+    if exchange is not None and exchange not in EXCHANGE_NAMES:
+        raise HTTPException(status_code=400, detail=f"Unknown exchange: {exchange}")
+    
+    selected = []
+    for name in names:
+        params = dict(INDICATORS[name])
+        if period is not None:
+            params["period"] = period
+        if "k" in params:
+            params["k"] = k
+        selected.append((name, params))
+    return await service.get_indicators(selected, interval, exchange, bucket, pair)
+
+
+@router.get(
+    "/spreads",
+    response_model=SpreadsResponse,
+    summary="Get spread analytics",
+    description="Returns the cross-exchange spread matrix, P2P premium over BCB and best route.",
+)
+async def get_spreads(
+    period: str = Query(
+        default="24h",
+        description="Period of per-minute rollup history",
+        enum=["1h", "24h", "7d"],
+    ),
+    service: ExchangeService = Depends(get_exchange_service),
+):
+    """
+    Get spread analytics.
+    
+    Metrics are maintained incrementally from the live tick stream;
+    `history` holds per-minute rollups of the best spread and premiums.
+    """
+    return await service.get_spreads(period)
 
 
 @router.get(
@@ -1,3 +1,4 @@
 from app.services.exchange_service import ExchangeService
+from app.services.analytics import SpreadAnalytics
 
-__all__ = ["ExchangeService"]
+__all__ = ["ExchangeService", "SpreadAnalytics"]
@@ -0,0 +1,283 @@
+"""
+Threshold alerts evaluated on every refresh.
+
+Thresholds live in sorted arrays per series (one exchange's price, or the
+best-route spread), so a move from `previous` to `current` finds the
+crossed alerts with two bisections: O(log n + triggered) per series, no
+matter how many alerts are registered. Evaluation never awaits: events are
+put on bounded queues drained by the stream endpoint and webhook workers.
+"""
+import asyncio
+import hashlib
+import logging
+import secrets
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterable, Optional
+
+import httpx
+
+from app.models.schemas import Alert, AlertCreate, AlertEvent
+from app.models.ticks import Tick
+from app.utils.metrics import ALERTS_TRIGGERED, ALERT_DELIVERIES
+from app.utils.webhooks import UnsafeWebhookURL, check_webhook_url
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+class AlertLimitExceeded(Exception):
+    """Raised when registering more alerts than the configured maximum."""
+
+
+class ThresholdIndex:
+    """Sorted thresholds of one series with crossing lookups."""
+
+    __slots__ = ("_thresholds", "_ids")
+
+    def __init__(self):
+        self._thresholds: list[float] = []
+        self._ids: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, threshold: float, alert_id: str) -> None:
+        i = bisect_right(self._thresholds, threshold)
+        self._thresholds.insert(i, threshold)
+        self._ids.insert(i, alert_id)
+
+    def remove(self, threshold: float, alert_id: str) -> None:
+        lo = bisect_left(self._thresholds, threshold)
+        hi = bisect_right(self._thresholds, threshold, lo)
+        i = self._ids.index(alert_id, lo, hi)
+        del self._thresholds[i]
+        del self._ids[i]
+
+    def crossed_up(self, previous: float, current: float) -> list[str]:
+        """Alerts with previous < threshold <= current."""
+        return self._ids[bisect_right(self._thresholds, previous):bisect_right(self._thresholds, current)]
+
+    def crossed_down(self, previous: float, current: float) -> list[str]:
+        """Alerts with current <= threshold < previous."""
+        return self._ids[bisect_left(self._thresholds, current):bisect_left(self._thresholds, previous)]
+
+
+class AlertEngine:
+    """Registry of alerts and their delivery queues."""
+
+    def __init__(self, max_alerts: int = 50_000, queue_size: int = 10_000, webhook_hosts: Iterable[str] = ()):
+        self.max_alerts = max_alerts
+        self.queue_size = queue_size
+        self.webhook_hosts = set(webhook_hosts)
+        self._alerts: dict[str, Alert] = {}
+        # (series, direction) -> thresholds; series is ("price", exchange or None) or ("spread", None)
+        self._indexes: dict[tuple, ThresholdIndex] = {}
+        # Volatility alerts by watched rating (None = any change)
+        self._ratings: dict[Optional[str], set[str]] = {}
+        self._last_price: dict[str, float] = {}
+        self._last_spread: Optional[float] = None
+        self._last_rating: Optional[str] = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._webhooks: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    # ============================================
+    # Registry
+    # ============================================
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def alerts(self) -> list[Alert]:
+        return list(self._alerts.values())
+
+    def get(self, alert_id: str) -> Optional[Alert]:
+        return self._alerts.get(alert_id)
+
+    def create(self, request: AlertCreate, secret: Optional[str] = None) -> Alert:
+        """Register an alert; only a hash of `secret` (needed to delete it) is kept."""
+        if len(self._alerts) >= self.max_alerts:
+            raise AlertLimitExceeded(f"At most {self.max_alerts} alerts can be registered")
+        alert = Alert(
+            **request.model_dump(),
+            id=uuid.uuid4().hex,
+            created_at=datetime.utcnow(),
+            secret_hash=_hash_secret(secret) if secret else None,
+        )
+        self.add(alert)
+        return alert
+
+    @staticmethod
+    def check_secret(alert: Alert, secret: Optional[str]) -> bool:
+        """Whether `secret` is the one the alert was created with."""
+        if not alert.secret_hash or not secret:
+            return False
+        return secrets.compare_digest(alert.secret_hash, _hash_secret(secret))
+
+    def add(self, alert: Alert) -> None:
+        """Register an existing alert (e.g. loaded from storage)."""
+        self._alerts[alert.id] = alert
+        if alert.active:
+            self._index(alert, add=True)
+
+    def remove(self, alert_id: str) -> Optional[Alert]:
+        alert = self._alerts.pop(alert_id, None)
+        if alert is not None and alert.active:
+            self._index(alert, add=False)
+        return alert
+
+    def _index(self, alert: Alert, add: bool) -> None:
+        if alert.kind == "volatility":
+            ids = self._ratings.setdefault(alert.rating, set())
+            if add:
+                ids.add(alert.id)
+            else:
+                ids.discard(alert.id)
+            return
+        series = ("price", alert.exchange) if alert.kind == "price" else ("spread", None)
+        directions = ("above", "below") if alert.direction == "cross" else (alert.direction,)
+        for direction in directions:
+            index = self._indexes.setdefault((series, direction), ThresholdIndex())
+            if add:
+                index.add(alert.threshold, alert.id)
+            else:
+                index.remove(alert.threshold, alert.id)
+
+    # ============================================
+    # Evaluation
+    # ============================================
+
+    def on_ticks(self, ticks: Iterable[Tick], spread_percent: Optional[float] = None) -> list[AlertEvent]:
+        """Evaluate price alerts for a refresh snapshot and spread alerts for the best route."""
+        events = []
+        for tick in ticks:
+            if tick.last <= 0:
+                continue
+            previous = self._last_price.get(tick.exchange)
+            self._last_price[tick.exchange] = tick.last
+            if previous is None or previous == tick.last:
+                continue
+            for exchange in (tick.exchange, None):
+                events.extend(self._crossings(("price", exchange), previous, tick.last, tick, exchange=tick.exchange))
+
+        if spread_percent is not None:
+            previous = self._last_spread
+            self._last_spread = spread_percent
+            if previous is not None and previous != spread_percent:
+                events.extend(self._crossings(("spread", None), previous, spread_percent, None))
+
+        self._publish(events)
+        return events
+
+    def on_volatility(self, rating: str) -> list[AlertEvent]:
+        """Evaluate volatility alerts when the rating changes."""
+        previous = self._last_rating
+        self._last_rating = rating
+        if previous is None or previous == rating:
+            return []
+        ids = list(self._ratings.get(rating, ())) + list(self._ratings.get(None, ()))
+        now = datetime.utcnow()
+        events = [
+            self._trigger(alert_id, None, now, f"Volatility rating changed from {previous} to {rating}", rating=rating)
+            for alert_id in ids
+        ]
+        self._publish(events)
+        return events
+
+    def _crossings(self, series: tuple, previous: float, current: float, tick: Optional[Tick], **extra) -> list[AlertEvent]:
+        if current > previous:
+            index = self._indexes.get((series, "above"))
+            ids = index.crossed_up(previous, current) if index else []
+            verb = "rose above"
+        else:
+            index = self._indexes.get((series, "below"))
+            ids = index.crossed_down(previous, current) if index else []
+            verb = "fell below"
+        if not ids:
+            return []
+
+        timestamp = tick.timestamp if tick else datetime.utcnow()
+        subject = f"{tick.exchange} price" if tick else "Best spread"
+        events = []
+        for alert_id in ids:
+            threshold = self._alerts[alert_id].threshold
+            events.append(self._trigger(
+                alert_id, current, timestamp, f"{subject} {verb} {threshold} ({current})", **extra
+            ))
+        return events
+
+    def _trigger(self, alert_id: str, value: Optional[float], timestamp: datetime, message: str, **extra) -> AlertEvent:
+        alert = self._alerts[alert_id]
+        alert.triggered_at = timestamp
+        if alert.once:
+            self._index(alert, add=False)
+            alert.active = False
+        ALERTS_TRIGGERED.labels(alert.kind).inc()
+        return AlertEvent(
+            alert_id=alert_id,
+            kind=alert.kind,
+            exchange=extra.get("exchange", alert.exchange),
+            threshold=alert.threshold,
+            value=value,
+            rating=extra.get("rating"),
+            timestamp=timestamp,
+            message=message,
+        )
+
+    # ============================================
+    # Delivery
+    # ============================================
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue receiving every event; slow subscribers drop events instead of blocking evaluation."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, events: list[AlertEvent]) -> None:
+        for event in events:
+            for queue in self._subscribers:
+                try:
+                    queue.put_nowait(event)
+                    ALERT_DELIVERIES.labels("stream", "queued").inc()
+                except asyncio.QueueFull:
+                    ALERT_DELIVERIES.labels("stream", "dropped").inc()
+            url = self._alerts[event.alert_id].webhook_url
+            if url:
+                try:
+                    self._webhooks.put_nowait((url, event))
+                except asyncio.QueueFull:
+                    ALERT_DELIVERIES.labels("webhook", "dropped").inc()
+
+    async def run_webhooks(self, workers: int = 4, timeout: float = 5.0, transport=None) -> None:
+        """Deliver queued webhook events with `workers` concurrent senders until cancelled."""
+        async with httpx.AsyncClient(timeout=timeout, transport=transport) as client:
+
+            async def worker():
+                while True:
+                    url, event = await self._webhooks.get()
+                    try:
+                        # Checked again on delivery: the host may resolve elsewhere than at registration
+                        await check_webhook_url(url, self.webhook_hosts)
+                        response = await client.post(
+                            url, content=event.model_dump_json(), headers={"Content-Type": "application/json"}
+                        )
+                        response.raise_for_status()
+                        ALERT_DELIVERIES.labels("webhook", "ok").inc()
+                    except UnsafeWebhookURL as e:
+                        ALERT_DELIVERIES.labels("webhook", "blocked").inc()
+                        logger.warning("Alert webhook to %s blocked: %s", url, e)
+                    except Exception as e:
+                        ALERT_DELIVERIES.labels("webhook", "error").inc()
+                        logger.warning("Alert webhook to %s failed: %s", url, e)
+                    finally:
+                        self._webhooks.task_done()
+
+            await asyncio.gather(*(worker() for _ in range(workers)))
@@ -0,0 +1,235 @@
+"""
+Incremental cross-exchange spread analytics.
+
+Maintained from the tick stream as snapshots arrive, never by re-scanning
+history: each update touches only the matrix row and column of the
+exchanges that changed. Quotes of an exchange that stops reporting expire
+after `max_quote_age` seconds (six 5 s refreshes by default), so its last
+prices cannot stay the best route. Per-minute rollups of the metrics are
+kept in memory and handed back to the caller for storage.
+"""
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+
+from app.models.ticks import Tick
+
+
+class SpreadRoute(NamedTuple):
+    """Buy on one exchange at its ask, sell on another at its bid."""
+    buy_exchange: str
+    sell_exchange: str
+    buy_price: float
+    sell_price: float
+    spread: float
+    spread_percent: float
+
+
+class SpreadAnalytics:
+    """
+    Spread matrix, premium over the reference rate and best route.
+
+    `matrix[buy][sell]` is the BOB gained per USD buying at `buy`'s ask and
+    selling at `sell`'s bid (negative when the route loses money). The
+    reference exchange (BCB official rate) is not tradable and is only used
+    for premiums.
+    """
+
+    def __init__(
+        self,
+        reference: str = "bcb",
+        rollup_seconds: float = 60,
+        history_size: int = 7 * 24 * 60,
+        max_quote_age: float = 30,
+    ):
+        self.reference = reference
+        self.updated_at: Optional[datetime] = None
+        # Latest quote per exchange; its timestamp is when the exchange was last seen
+        self._quotes: dict[str, Tick] = {}
+        self._max_quote_age = timedelta(seconds=max_quote_age)
+        self._reference_price: Optional[float] = None
+        self._matrix: dict[str, dict[str, float]] = {}
+        self._best: Optional[tuple[str, str]] = None
+
+        # Rollup of the current bucket
+        self._rollup_width = timedelta(seconds=rollup_seconds)
+        self._bucket_start: Optional[datetime] = None
+        self._samples = 0
+        self._spread_sum = 0.0
+        self._spread_max: Optional[float] = None
+        self._route_at_max: Optional[SpreadRoute] = None
+        self._premium_sums: dict[str, float] = {}
+        self._premium_counts: dict[str, int] = {}
+        self.history: deque = deque(maxlen=history_size)
+
+    # ============================================
+    # Current state
+    # ============================================
+
+    @property
+    def matrix(self) -> dict[str, dict[str, float]]:
+        return self._matrix
+
+    @property
+    def reference_price(self) -> Optional[float]:
+        return self._reference_price
+
+    def premiums(self) -> dict[str, float]:
+        """Premium of each exchange's last price over the reference rate, in percent."""
+        reference = self._reference_price
+        if not reference:
+            return {}
+        return {
+            exchange: round((tick.last / reference - 1) * 100, 2)
+            for exchange, tick in self._quotes.items()
+        }
+
+    def best_route(self) -> Optional[SpreadRoute]:
+        if self._best is None:
+            return None
+        return self._route(*self._best)
+
+    def _route(self, buy: str, sell: str) -> SpreadRoute:
+        buy_price = self._quotes[buy].ask
+        sell_price = self._quotes[sell].bid
+        spread = self._matrix[buy][sell]
+        return SpreadRoute(buy, sell, buy_price, sell_price, spread, round(spread / buy_price * 100, 2))
+
+    # ============================================
+    # Updates
+    # ============================================
+
+    def update(self, ticks: Iterable[Tick]) -> list[dict]:
+        """
+        Apply one refresh snapshot.
+        Returns the rollup documents completed by this update (usually none, one per minute).
+        """
+        changed = []
+        latest = None
+        for tick in ticks:
+            latest = tick.timestamp if latest is None or tick.timestamp > latest else latest
+            if tick.exchange == self.reference:
+                if tick.last > 0:
+                    self._reference_price = tick.last
+                continue
+            if tick.bid <= 0 or tick.ask <= 0:
+                continue
+            previous = self._quotes.get(tick.exchange)
+            self._quotes[tick.exchange] = tick
+            if previous is None or previous.bid != tick.bid or previous.ask != tick.ask:
+                changed.append(tick.exchange)
+        if latest is None:
+            return []
+
+        self._expire(latest)
+        for exchange in changed:
+            self._update_exchange(exchange)
+        self.updated_at = latest
+        return self._roll(latest)
+
+    def _update_exchange(self, exchange: str) -> None:
+        """Recompute the row and column of one exchange and keep the best route current."""
+        quotes = self._quotes
+        ask, bid = quotes[exchange].ask, quotes[exchange].bid
+        row = self._matrix.setdefault(exchange, {})
+        touched = []
+        for other, quote in quotes.items():
+            if other == exchange:
+                continue
+            row[other] = round(quote.bid - ask, 4)
+            self._matrix.setdefault(other, {})[exchange] = round(bid - quote.ask, 4)
+            touched.append((exchange, other))
+            touched.append((other, exchange))
+
+        best = self._best
+        if best is not None and exchange in best:
+            # The best route itself changed: only then is a full rescan needed
+            self._best = self._scan_best()
+            return
+        for route in touched:
+            if best is None or self._matrix[route[0]][route[1]] > self._matrix[best[0]][best[1]]:
+                best = route
+        self._best = best
+
+    def _expire(self, now: datetime) -> None:
+        """Drop the quotes not seen for max_quote_age, with their matrix row and column."""
+        stale = [exchange for exchange, tick in self._quotes.items() if now - tick.timestamp > self._max_quote_age]
+        if not stale:
+            return
+        for exchange in stale:
+            del self._quotes[exchange]
+            self._matrix.pop(exchange, None)
+            for row in self._matrix.values():
+                row.pop(exchange, None)
+        if self._best is not None and (self._best[0] in stale or self._best[1] in stale):
+            self._best = self._scan_best()
+
+    def _scan_best(self) -> Optional[tuple[str, str]]:
+        best, best_spread = None, None
+        for buy, row in self._matrix.items():
+            for sell, spread in row.items():
+                if best_spread is None or spread > best_spread:
+                    best, best_spread = (buy, sell), spread
+        return best
+
+    # ============================================
+    # Rollups
+    # ============================================
+
+    def _roll(self, timestamp: datetime) -> list[dict]:
+        completed = []
+        if self._bucket_start is not None and timestamp >= self._bucket_start + self._rollup_width:
+            if self._samples:
+                completed.append(self._rollup_document())
+            self._bucket_start = None
+        if self._bucket_start is None:
+            self._bucket_start = timestamp - (timestamp - datetime(1970, 1, 1)) % self._rollup_width
+            self._samples = 0
+            self._spread_sum = 0.0
+            self._spread_max = None
+            self._route_at_max = None
+            self._premium_sums = {}
+            self._premium_counts = {}
+
+        route = self.best_route()
+        if route is not None:
+            self._samples += 1
+            self._spread_sum += route.spread_percent
+            if self._spread_max is None or route.spread_percent > self._spread_max:
+                self._spread_max = route.spread_percent
+                self._route_at_max = route
+        for exchange, premium in self.premiums().items():
+            self._premium_sums[exchange] = self._premium_sums.get(exchange, 0.0) + premium
+            self._premium_counts[exchange] = self._premium_counts.get(exchange, 0) + 1
+
+        self.history.extend(completed)
+        return completed
+
+    def flush(self) -> list[dict]:
+        """Close the current (partial) rollup bucket; returns its document, if it has samples."""
+        completed = [self._rollup_document()] if self._bucket_start is not None and self._samples else []
+        self._bucket_start = None
+        self.history.extend(completed)
+        return completed
+
+    def _rollup_document(self) -> dict:
+        route = self._route_at_max
+        return {
+            "timestamp": self._bucket_start,
+            "samples": self._samples,
+            "best_spread_percent_avg": round(self._spread_sum / self._samples, 2),
+            "best_spread_percent_max": self._spread_max,
+            "best_route": route._asdict() if route else None,
+            "reference": self._reference_price,
+            "premiums": {
+                exchange: round(total / self._premium_counts[exchange], 2)
+                for exchange, total in self._premium_sums.items()
+            },
+        }
+
+    def rollups_since(self, since: datetime) -> Optional[list[dict]]:
+        """In-memory rollups from `since`, or None if memory does not reach back that far."""
+        history = self.history
+        if not history or history[0]["timestamp"] > since:
+            return None
+        return [doc for doc in history if doc["timestamp"] >= since]
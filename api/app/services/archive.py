@@ -0,0 +1,262 @@
+"""
+Cold tier for raw ticks.
+
+Ticks older than the hot window are compacted out of MongoDB into one
+compressed tick block (see app.utils.tickcodec) per exchange per day:
+
+    {root}/{exchange}/{YYYY-MM-DD}.ticks
+
+Each pair has its own archive: DEFAULT_PAIR (the only pair before
+multi-pair support) at the root, other pairs under `{root}/pairs/ASSET-FIAT`.
+
+Days archived by earlier releases as gzip-compressed columnar JSON
+(`.json.gz`) are still read, and rewritten as blocks when they change.
+
+The archive keeps a watermark (`archived_until`, a day boundary): history
+before it is read from the files, history after it from MongoDB, so a
+federated read never sees a tick twice even while the compacted ticks are
+still being deleted from the hot collection.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, Optional
+
+from app.config import DEFAULT_PAIR, get_settings
+from app.models.ticks import Tick
+from app.utils.tickcodec import columns_to_ticks, decode_columns, encode_block, epoch_us
+
+logger = logging.getLogger(__name__)
+
+DAY = timedelta(days=1)
+_EPOCH = datetime(1970, 1, 1)
+
+# Directory of the non-default pairs' archives
+PAIRS_DIR = "pairs"
+
+
+def pair_archive_root(root: str, pair: str) -> str:
+    if pair == DEFAULT_PAIR:
+        return root
+    return os.path.join(root, PAIRS_DIR, pair.replace("/", "-"))
+
+
+def _floor_day(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, ts.day)
+
+
+class TickArchive:
+    """Per exchange, per day compressed tick files of one pair under `root`."""
+
+    def __init__(self, root: str, pair: str = DEFAULT_PAIR):
+        self.root = root
+        self.pair = pair
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self.archived_until: Optional[datetime] = None
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding="utf-8") as fh:
+                self.archived_until = datetime.fromisoformat(json.load(fh)["archived_until"])
+
+    def path(self, exchange: str, day: datetime) -> str:
+        return os.path.join(self.root, exchange, f"{day:%Y-%m-%d}.ticks")
+
+    def _legacy_path(self, exchange: str, day: datetime) -> str:
+        return os.path.join(self.root, exchange, f"{day:%Y-%m-%d}.json.gz")
+
+    def exchanges(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name != PAIRS_DIR and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def set_archived_until(self, until: datetime) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        _write_atomic(self._manifest_path, json.dumps({"archived_until": until.isoformat()}).encode())
+        self.archived_until = until
+
+    # ============================================
+    # Files
+    # ============================================
+
+    def write_day(self, exchange: str, day: datetime, ticks: Iterable[Tick]) -> int:
+        """
+        Store one exchange's ticks of one day, merged with the file if it exists
+        (ticks with the same timestamp are replaced). Returns the ticks in the file.
+        """
+        merged = {tick.timestamp: tick for tick in self.read_day(exchange, day)}
+        merged.update((tick.timestamp, tick) for tick in ticks)
+        rows = [merged[ts] for ts in sorted(merged)]
+        path = self.path(exchange, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, encode_block(rows))
+        legacy = self._legacy_path(exchange, day)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+        return len(rows)
+
+    def read_day(
+        self,
+        exchange: str,
+        day: datetime,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> list[Tick]:
+        """One exchange's archived ticks of one day, optionally clipped to [start, end)."""
+        path = self.path(exchange, day)
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                columns = decode_columns(fh.read())
+            timestamps = columns["timestamp"]
+            lo = bisect_left(timestamps, epoch_us(start)) if start else 0
+            hi = bisect_left(timestamps, epoch_us(end), lo) if end else len(timestamps)
+            return columns_to_ticks(columns, lo, hi, pair=self.pair)
+
+        legacy = self._legacy_path(exchange, day)
+        if not os.path.exists(legacy):
+            return []
+        with open(legacy, "rb") as fh:
+            columns = json.loads(gzip.decompress(fh.read()))
+        ticks = [
+            Tick(exchange, bid, ask, last, _EPOCH + timedelta(milliseconds=ms), source, self.pair)
+            for ms, bid, ask, last, source in zip(
+                columns["timestamp"], columns["bid"], columns["ask"], columns["last"], columns["source"]
+            )
+        ]
+        return [t for t in ticks if (start is None or t.timestamp >= start) and (end is None or t.timestamp < end)]
+
+    def read(self, start: datetime, end: datetime, exchanges: Optional[Iterable[str]] = None) -> list[Tick]:
+        """Archived ticks in [start, end), ordered by timestamp. Blocking: run in a thread."""
+        selected = list(exchanges) if exchanges else self.exchanges()
+        ticks: list[Tick] = []
+        day = _floor_day(start)
+        while day < end:
+            for exchange in selected:
+                ticks.extend(self.read_day(exchange, day, start, end))
+            day += DAY
+        # Each file is sorted; a stable sort merges the runs of a day in linear time
+        ticks.sort(key=lambda tick: tick.timestamp)
+        return ticks
+
+
+def open_archive(pair: str = DEFAULT_PAIR) -> Optional[TickArchive]:
+    """The configured archive of `pair`, or None without ARCHIVE_DIR."""
+    settings = get_settings()
+    if not settings.archive_dir:
+        return None
+    return TickArchive(pair_archive_root(settings.archive_dir, pair), pair)
+
+
+async def iter_federated(
+    archive: Optional[TickArchive],
+    start: datetime,
+    end: datetime,
+    exchanges: Optional[list[str]] = None,
+    batch_size: int = 5000,
+    prefer_secondary: bool = True,
+    pair: str = DEFAULT_PAIR,
+) -> AsyncIterator[list[Tick]]:
+    """
+    Stream the ticks of `pair` in [start, end) ordered by timestamp, `batch_size` at a time:
+    from the archive before its watermark, from MongoDB after it.
+
+    The archived range is read a day at a time, so memory use is bounded by
+    one day of ticks. Ticks of an archived day still in MongoDB (not yet
+    deleted by compaction, or backfilled since) are merged in, MongoDB's
+    copy winning.
+    """
+    from app.database import price_history_service
+
+    archived_until = archive.archived_until if archive else None
+    if archived_until is not None and start < archived_until:
+        cold_end = min(end, archived_until)
+        day = _floor_day(start)
+        while day < cold_end:
+            lo, hi = max(start, day), min(cold_end, day + DAY)
+            ticks = await asyncio.to_thread(archive.read, lo, hi, exchanges)
+            merged = {(tick.exchange, tick.timestamp): tick for tick in ticks}
+            async for batch in price_history_service.iter_history(
+                lo, hi, exchanges, batch_size=batch_size, prefer_secondary=prefer_secondary, pair=pair
+            ):
+                merged.update(((tick.exchange, tick.timestamp), tick) for tick in batch)
+            ticks = sorted(merged.values(), key=lambda tick: tick.timestamp)
+            for i in range(0, len(ticks), batch_size):
+                yield ticks[i:i + batch_size]
+            day += DAY
+        if end <= archived_until:
+            return
+        start = archived_until
+    async for batch in price_history_service.iter_history(
+        start, end, exchanges, batch_size=batch_size, prefer_secondary=prefer_secondary, pair=pair
+    ):
+        yield batch
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+
+
+# ============================================
+# Compaction
+# ============================================
+
+async def compact_history(archive: TickArchive, hot_days: int, batch_size: int = 10_000) -> int:
+    """
+    Move ticks of the archive's pair older than `hot_days` (whole days) from MongoDB into the archive.
+
+    Files are written before the watermark advances, and the watermark
+    before the hot copies are deleted, so an interrupted run loses nothing
+    and a re-run only rewrites the same files. Only the ticks written are
+    deleted: ticks inserted into the range during the run (late writes, a
+    backfill) stay in MongoDB for the next run. Returns the ticks archived.
+    """
+    from app.database import price_history_service
+
+    cutoff = _floor_day(datetime.utcnow()) - hot_days * DAY
+    archived = 0
+    current_day: Optional[datetime] = None
+    day_ticks: dict[str, list[Tick]] = {}
+    # Exchange -> epoch microseconds of the archived ticks, deleted once the watermark moves
+    written: dict[str, array] = {}
+
+    async def flush():
+        nonlocal archived
+        for exchange, ticks in day_ticks.items():
+            await asyncio.to_thread(archive.write_day, exchange, current_day, ticks)
+            written.setdefault(exchange, array("q")).extend(epoch_us(tick.timestamp) for tick in ticks)
+            archived += len(ticks)
+        day_ticks.clear()
+
+    # Everything before the cutoff: backfilled ticks older than the watermark are archived too
+    async for batch in price_history_service.iter_history(
+        _EPOCH, cutoff, batch_size=batch_size, prefer_secondary=False, pair=archive.pair
+    ):
+        for tick in batch:
+            day = _floor_day(tick.timestamp)
+            if day != current_day:
+                await flush()
+                current_day = day
+            day_ticks.setdefault(tick.exchange, []).append(tick)
+    await flush()
+
+    if archive.archived_until is None or cutoff > archive.archived_until:
+        archive.set_archived_until(cutoff)
+    if archived:
+        deleted = 0
+        for exchange, stamps in written.items():
+            for i in range(0, len(stamps), batch_size):
+                timestamps = [_EPOCH + timedelta(microseconds=us) for us in stamps[i:i + batch_size]]
+                deleted += await price_history_service.delete_ticks(exchange, timestamps, pair=archive.pair)
+        logger.info(
+            "Archived %s %s ticks before %s (%s removed from MongoDB)", archived, archive.pair, cutoff.date(), deleted
+        )
+    return archived
@@ -0,0 +1,219 @@
+"""
+Bulk historical import.
+
+Tick files (CSV, NDJSON or Parquet, with the export column names) are read
+in batches by one producer and written by parallel workers as idempotent
+upserts keyed on (pair, exchange, timestamp), so re-running an import is safe.
+Each key always goes to the same worker (by pair, exchange and day) and is
+sent once per write, so no two in-flight writes carry the same tick; the
+unique tick index covers races with live inserts.
+Afterwards the spread rollups of the affected minutes are rebuilt from the
+stored ticks.
+"""
+import asyncio
+import csv
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from app.config import DEFAULT_PAIR, get_settings
+from app.database import price_history_service, spread_rollup_service
+from app.models.ticks import Tick
+from app.services.analytics import SpreadAnalytics
+from app.services.archive import iter_federated, open_archive
+from app.services.exchange_service import floor_timestamp
+from app.utils.encoding import FormatUnavailable
+from app.utils.helpers import naive_utc
+
+try:
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# SpreadAnalytics rollup width
+ROLLUP_WIDTH = timedelta(minutes=1)
+
+# Ticks read before the first affected minute so the rebuilt spread state starts warm
+ROLLUP_WARMUP = timedelta(minutes=5)
+
+
+class BackfillResult(NamedTuple):
+    read: int
+    written: int  # inserted or changed; re-imported identical ticks are not counted
+    rollups: int
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+
+# ============================================
+# Readers
+# ============================================
+
+def _timestamp(value) -> datetime:
+    if isinstance(value, datetime):
+        return naive_utc(value)
+    if isinstance(value, (int, float)):
+        # Epoch milliseconds, as in the columnar history format
+        return datetime(1970, 1, 1) + timedelta(milliseconds=value)
+    return naive_utc(datetime.fromisoformat(value))
+
+
+def _tick(row: dict, source: str) -> Tick:
+    last = float(row.get("last") or 0.0)
+    return Tick(
+        row["exchange"],
+        float(row.get("bid") or last),
+        float(row.get("ask") or last),
+        last,
+        _timestamp(row["timestamp"]),
+        row.get("source") or source,
+        row.get("pair") or DEFAULT_PAIR,
+    )
+
+
+def _batched(rows: Iterable[dict], batch_size: int, source: str) -> Iterator[list[Tick]]:
+    batch = []
+    for row in rows:
+        batch.append(_tick(row, source))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_tick_batches(path: str, batch_size: int = 10_000, source: str = "backfill") -> Iterator[list[Tick]]:
+    """
+    Read a tick file in batches; the format follows the extension (.csv, .ndjson/.jsonl, .parquet).
+    Rows without bid/ask use `last`; rows without a source get `source`, without a pair DEFAULT_PAIR.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8") as fh:
+            yield from _batched(csv.DictReader(fh), batch_size, source)
+    elif extension in (".ndjson", ".jsonl"):
+        with open(path, encoding="utf-8") as fh:
+            yield from _batched((json.loads(line) for line in fh if line.strip()), batch_size, source)
+    elif extension == ".parquet":
+        if pyarrow is None:
+            raise FormatUnavailable("Parquet import requires the 'pyarrow' package")
+        parquet = pyarrow.parquet.ParquetFile(path)
+        for record_batch in parquet.iter_batches(batch_size=batch_size):
+            yield [_tick(row, source) for row in record_batch.to_pylist()]
+    else:
+        raise ValueError(f"Unsupported backfill file: {path} (expected .csv, .ndjson, .jsonl or .parquet)")
+
+
+# ============================================
+# Import
+# ============================================
+
+async def backfill(
+    paths: Iterable[str],
+    batch_size: int = 10_000,
+    workers: int = 4,
+    rebuild_rollups: bool = True,
+) -> BackfillResult:
+    """Import tick files into price_history and rebuild the rollups of the covered range."""
+    queues = [asyncio.Queue(maxsize=2) for _ in range(workers)]
+    errors: list[Exception] = []
+    read = written = 0
+    start = end = None
+
+    async def worker(queue: asyncio.Queue):
+        nonlocal written
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            try:
+                written += await price_history_service.upsert_many(batch)
+            except Exception as e:
+                # Keep draining so the producer never blocks on a dead worker
+                errors.append(e)
+
+    tasks = [asyncio.create_task(worker(queue)) for queue in queues]
+    try:
+        for path in paths:
+            for batch in read_tick_batches(path, batch_size):
+                if errors:
+                    break
+                read += len(batch)
+                first = min(tick.timestamp for tick in batch)
+                last = max(tick.timestamp for tick in batch)
+                start = first if start is None or first < start else start
+                end = last if end is None or last > end else end
+                # Blocks while the workers are behind, bounding memory to a few batches
+                for queue, part in zip(queues, _partition(batch, workers)):
+                    if part:
+                        await queue.put(part)
+            if errors:
+                break
+            logger.info("Backfill read %s (%s ticks so far)", path, read)
+        for queue in queues:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    if errors:
+        raise errors[0]
+
+    rollups = 0
+    if rebuild_rollups and start is not None:
+        # Whole minutes, so rollups straddling the imported range include the ticks already stored
+        rollups = await rebuild_spread_rollups(start, floor_timestamp(end, ROLLUP_WIDTH) + ROLLUP_WIDTH)
+    return BackfillResult(read, written, rollups, start, end)
+
+
+def _partition(batch: list[Tick], workers: int) -> list[list[Tick]]:
+    """
+    Split a batch by worker: a (pair, exchange, day) always maps to the same worker.
+    Repeated keys are dropped (the last one read wins), so a write never upserts a key twice.
+    """
+    parts: list[dict] = [{} for _ in range(workers)]
+    for tick in batch:
+        part = parts[hash((tick.pair, tick.exchange, tick.timestamp.date())) % workers]
+        part[tick.pair, tick.exchange, tick.timestamp] = tick
+    return [list(part.values()) for part in parts]
+
+
+async def rebuild_spread_rollups(start: datetime, end: datetime, batch_size: int = 10_000) -> int:
+    """
+    Recompute the per-minute spread rollups covering [start, end) from stored ticks
+    of the primary pair (the only pair the spread analytics follow), archived or not.
+    Returns the number of rollups written.
+    """
+    analytics = SpreadAnalytics(rollup_seconds=ROLLUP_WIDTH.total_seconds())
+    first_minute = floor_timestamp(start, ROLLUP_WIDTH)
+    written = 0
+    pending: list[dict] = []
+    snapshot: list[Tick] = []
+
+    async def store(docs: list[dict]) -> int:
+        docs = [doc for doc in docs if doc["timestamp"] >= first_minute]
+        return await spread_rollup_service.store_many(docs)
+
+    # Read the primary: the ticks were just written
+    pair = get_settings().primary_pair
+    async for batch in iter_federated(
+        open_archive(pair), first_minute - ROLLUP_WARMUP, end, batch_size=batch_size, prefer_secondary=False,
+        pair=pair,
+    ):
+        for tick in batch:
+            if snapshot and tick.timestamp != snapshot[0].timestamp:
+                pending.extend(analytics.update(snapshot))
+                snapshot = []
+            snapshot.append(tick)
+        if len(pending) >= 1000:
+            written += await store(pending)
+            pending = []
+    if snapshot:
+        pending.extend(analytics.update(snapshot))
+    pending.extend(analytics.flush())
+    written += await store(pending)
+    return written
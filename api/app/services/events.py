@@ -0,0 +1,135 @@
+"""
+In-process publish/subscribe for refresh snapshots.
+
+Each refresh is published once; every consumer (storage, analytics,
+streaming clients) has its own bounded queue and drop policy:
+
+- "block": the publisher waits for room, so a slow consumer (e.g. MongoDB
+  under load) slows the producer instead of losing data
+- "drop_oldest": the oldest queued event is discarded (latest wins)
+- "drop_newest": the new event is discarded
+
+Metrics are labelled by subscriber name. Subscribers sharing a name (one
+per streaming client) add up: the depth gauge is the sum of their queues.
+"""
+import asyncio
+import logging
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from app.utils.metrics import EVENT_DELIVERIES, EVENT_QUEUE_DEPTH, EVENT_PUBLISH_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class Subscription:
+    """One consumer's bounded queue on an EventBus."""
+
+    def __init__(self, bus: "EventBus", name: str, maxsize: int, policy: str):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.bus = bus
+        self.name = name
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._depth = EVENT_QUEUE_DEPTH.labels(name)
+        # This queue's share of the (per name) depth gauge
+        self._reported = 0
+
+    def __len__(self) -> int:
+        return self.queue.qsize()
+
+    async def get(self) -> Any:
+        event = await self.queue.get()
+        self._report_depth()
+        return event
+
+    async def get_batch(self, max_items: int) -> list:
+        """Wait for one event, then take whatever else is already queued (up to `max_items`)."""
+        batch = [await self.queue.get()]
+        while len(batch) < max_items and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        self._report_depth()
+        return batch
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def _report_depth(self) -> None:
+        depth = self.queue.qsize()
+        self._depth.inc(depth - self._reported)
+        self._reported = depth
+
+    async def _put(self, event: Any) -> None:
+        queue = self.queue
+        if self.policy == "block":
+            if queue.full():
+                started = perf_counter()
+                await queue.put(event)
+                EVENT_PUBLISH_WAIT_SECONDS.labels(self.name).observe(perf_counter() - started)
+            else:
+                queue.put_nowait(event)
+        elif queue.full():
+            EVENT_DELIVERIES.labels(self.name, "dropped").inc()
+            if self.policy == "drop_newest":
+                return
+            queue.get_nowait()
+            queue.put_nowait(event)
+        else:
+            queue.put_nowait(event)
+        EVENT_DELIVERIES.labels(self.name, "queued").inc()
+        self._report_depth()
+
+
+class EventBus:
+    """Fan-out of published events to subscriber queues."""
+
+    def __init__(self):
+        self._subscriptions: list[Subscription] = []
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, name: str, maxsize: int = 100, policy: str = "block") -> Subscription:
+        subscription = Subscription(self, name, maxsize, policy)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            # Its queued events no longer count towards the shared gauge
+            subscription._depth.dec(subscription._reported)
+            subscription._reported = 0
+
+    async def publish(self, event: Any) -> None:
+        """Deliver `event` to every subscriber; waits only on full "block" subscribers."""
+        # Copy: subscribers may leave while a blocking put is pending
+        for subscription in list(self._subscriptions):
+            await subscription._put(event)
+
+
+async def consume(subscription: Subscription, handler: Callable[[Any], Awaitable[None]]) -> None:
+    """Run `handler` on each event of `subscription` until cancelled; errors are logged, not fatal."""
+    while True:
+        event = await subscription.get()
+        try:
+            await handler(event)
+        except Exception as e:
+            logger.error("[%s] Error handling event: %s", subscription.name, e)
+
+
+async def consume_batches(
+    subscription: Subscription,
+    handler: Callable[[list], Awaitable[None]],
+    max_items: int = 100,
+) -> None:
+    """Like consume(), but hands over everything queued at once (e.g. for one bulk insert)."""
+    while True:
+        batch = await subscription.get_batch(max_items)
+        try:
+            await handler(batch)
+        except Exception as e:
+            logger.error("[%s] Error handling %s events: %s", subscription.name, len(batch), e)
@@ -1,33 +1,99 @@
+import asyncio
 import httpx
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional
 import logging
-import random
 import math
+from time import perf_counter
 
-from app.config import get_settings
+from app.config import DEFAULT_PAIR, get_settings
 from app.models.schemas import (
     ExchangePrice,
     BestPrice,
     CurrentPricesResponse,
+    QuoteResponse,
     PriceDataPoint,
     PriceHistorySummary,
     PriceHistoryResponse,
+    PriceCompareResponse,
     VolatilityResponse,
+    IndicatorsResponse,
+    DashboardResponse,
+    SpreadsResponse,
     PriceRange,
     SourceInfo,
     SourcesResponse,
 )
+from app.models.ticks import Tick, BookLevel, HistoryPoint, HistorySeries, EXCHANGE_NAMES, exchange_name, split_pair
+from app.services.analytics import SpreadAnalytics
+from app.services.archive import TickArchive, pair_archive_root
+from app.services.orderbook import OrderBooks
+from app.services.workers import WorkerPool
+from app.utils.metrics import (
+    SOURCE_FETCH_SECONDS,
+    SOURCE_FETCH_ERRORS,
+    REFRESH_SECONDS,
+    CACHE_REQUESTS,
+)
+from app.utils.profiling import span
+from app.utils.downsample import lttb_indices, minmax_indices
+from app.utils.estimators import depth_price, trimmed_mean, weighted_median
+from app.utils.indicators import compute_indicator
+from app.utils.tickcodec import TickBuffer
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# History window per interval
+INTERVAL_HOURS = {
+    "1h": 1,
+    "24h": 24,
+    "7d": 7 * 24,
+    "30d": 30 * 24,
+    "1y": 365 * 24,
+}
+
+# Bucket widths accepted by the history endpoint
+HISTORY_BUCKETS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "4h": timedelta(hours=4),
+    "1d": timedelta(days=1),
+}
+
+# Bucket used when a comparison does not ask for one
+INTERVAL_BUCKETS = {
+    "1h": "1m",
+    "24h": "5m",
+    "7d": "1h",
+    "30d": "4h",
+    "1y": "1d",
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Ticks restored from a warm start this close together belong to one refresh
+SNAPSHOT_GAP = timedelta(seconds=1)
+
+# Indicator results (per params) kept with one cached series
+MAX_INDICATORS_PER_SERIES = 64
+
+# Assets quoted against the fiat as USD
+USD_ASSETS = {"USDT", "USDC"}
+
+
+def floor_timestamp(ts: datetime, width: timedelta) -> datetime:
+    """Start of the epoch-aligned bucket containing `ts`."""
+    return ts - (ts - _EPOCH) % width
+
 
 class ExchangeService:
     """Service to fetch exchange rates from external APIs."""
     
-    def __init__(self):
-        logger.info(f"Initializing ExchangeService from {__file__} - Instance {id(self)}")
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        logger.info("Initializing ExchangeService from %s - Instance %s", __file__, id(self))
         self._cache: dict = {}
         self._cache_time: dict = {}
         self._source_status: dict = {
@@ -39,229 +105,540 @@ class ExchangeService:
             "bcb": "unknown",
         }
         # DolarBlueBolivia API base URL
-        self._dbb_base_url = "https://api.dolarbluebolivia.click"
+        self._dbb_base_url = settings.dolarblue_api_url
+        
+        # Optional HTTP transport override (used by benchmarks to target a fake upstream)
+        self._transport = transport
         
         # In-memory cache for partial recovery on API failure
         self._dbb_prices: dict = {}
+        
+        # Configured pairs; the first is the primary pair
+        self.pairs = settings.pairs_list
+        self.primary_pair = self.pairs[0]
+        
+        # Spread analytics of the primary pair, fed with each refresh snapshot by the background tasks
+        self.spreads = SpreadAnalytics()
+        
+        # Latest P2P books (prefix sums) per pair for amount quotes; `books` is the primary pair's
+        self.pair_books = {pair: OrderBooks(pair) for pair in self.pairs}
+        self.books = self.pair_books[self.primary_pair]
+        
+        # Cold tier per pair for ticks older than the hot window (federated with MongoDB on reads)
+        self.archives: dict[str, TickArchive] = {
+            pair: TickArchive(pair_archive_root(settings.archive_dir, pair), pair)
+            for pair in self.pairs
+        } if settings.archive_dir else {}
+        
+        # Most recent live ticks, saved on shutdown for a warm restart
+        self.recent_ticks = TickBuffer(settings.tick_buffer_size)
+        
+        # Aggregation and serialization of large histories run here, off the event loop
+        self.workers = WorkerPool(
+            settings.worker_pool_size, settings.worker_pool_queue, settings.worker_pool_min_items
+        )
     
-    async def get_current_prices(self) -> CurrentPricesResponse:
-        """Get current exchange rates from available sources."""
-        logger.error(f"CRITICAL DEBUG: get_current_prices called on instance {id(self)}")
+    def restore(self, response: CurrentPricesResponse, ticks: list[Tick]) -> None:
+        """
+        Warm start from saved state: serve `response` as the current prices of its
+        pair and rebuild the spread analytics from the recent primary-pair ticks (oldest first).
+        """
+        self._set_cache(f"current_prices:{response.pair}", response)
+        self.recent_ticks.extend(ticks)
+        # A refresh stamps all its ticks alike; a repeated exchange or a gap also
+        # starts a new snapshot (state saved before that stamped each tick apart)
+        snapshot: list[Tick] = []
+        for tick in ticks:
+            if tick.pair != self.primary_pair:
+                continue
+            if snapshot and (
+                tick.timestamp - snapshot[0].timestamp >= SNAPSHOT_GAP
+                or any(t.exchange == tick.exchange for t in snapshot)
+            ):
+                self.spreads.update(snapshot)
+                snapshot = []
+            snapshot.append(tick)
+        if snapshot:
+            self.spreads.update(snapshot)
+    
+    def latest_prices(self, pair: Optional[str] = None) -> Optional[CurrentPricesResponse]:
+        """Last cached current prices of `pair` (default: the primary pair) without refreshing, if any."""
+        return self._cache.get(f"current_prices:{pair or self.primary_pair}")
+    
+    async def get_current_prices(self, pair: Optional[str] = None) -> CurrentPricesResponse:
+        """Get current exchange rates of `pair` (default: the primary pair) from available sources."""
+        pair = pair or self.primary_pair
         
         # Check cache
-        cache_key = "current_prices"
+        cache_key = f"current_prices:{pair}"
         if self._is_cache_valid(cache_key):
             cached = self._cache[cache_key]
-            logger.error(f"CRITICAL DEBUG: Returning from cache: {len(cached.prices)} prices (instance {id(self)})")
+            logger.debug("Returning %s cached prices", len(cached.prices))
             return cached
         
-        prices = []
-        source_used = "unknown"
-        sources_active = []
+        await self.refresh()
+        return self._cache[cache_key]
+    
+    async def refresh(self) -> tuple[list[Tick], CurrentPricesResponse]:
+        """
+        Fetch all sources for every configured pair and rebuild the cached
+        current prices response of each pair.
+        Returns the raw ticks of all pairs (for storage) together with the
+        primary pair's response. DolarBlue quotes kept from an earlier refresh
+        are served in the response but not returned: they were already published.
+        """
+        refresh_start = perf_counter()
+        # One timestamp for every tick of the refresh, so it can be regrouped into its snapshot
+        now = datetime.utcnow()
         
-        # Fetch Binance P2P (Real BOB Rates)
-        try:
-            p2p_buy_usdt = await self._fetch_binance_p2p(trade_type="BUY")  # User Buys = Ask
-            p2p_sell_usdt = await self._fetch_binance_p2p(trade_type="SELL") # User Sells = Bid
-            
-            if p2p_buy_usdt and p2p_sell_usdt:
-                self._source_status["binance"] = "active"
-                sources_active.append("Binance P2P")
-                
-                prices.append(ExchangePrice(
-                    exchange="binance",
-                    name="Binance P2P (USDT)",
-                    bid=round(p2p_sell_usdt, 2), # Price to sell USDT (receive BOB)
-                    ask=round(p2p_buy_usdt, 2),  # Price to buy USDT (pay BOB)
-                    last=round((p2p_buy_usdt + p2p_sell_usdt) / 2, 2),
-                    change_24h=0.0,
-                    updated_at=datetime.utcnow(),
-                    volume_24h=None
-                ))
-        except Exception as e:
-            logger.error(f"Binance error: {e}")
-            self._source_status["binance"] = "error"
+        # Fetch the books of every pair and DolarBlueBolivia concurrently: the
+        # refresh takes as long as the slowest source, not the sum of them
+        _, fiat = split_pair(self.primary_pair)
+        results = await asyncio.gather(
+            *(self._fetch_pair_books(pair) for pair in self.pairs),
+            self._fetch_dolarblue_sources(now) if fiat == "BOB" else asyncio.sleep(0, result=[]),
+        )
+        dbb_sources = results[-1]
         
-        # Fetch OKX P2P (Real BOB Rates)
-        try:
-            okx_buy_usdt = await self._fetch_okx_p2p(side="buy")  # User Buys = Ask
-            okx_sell_usdt = await self._fetch_okx_p2p(side="sell") # User Sells = Bid
+        all_ticks: list[Tick] = []
+        primary = None
+        for pair, books in zip(self.pairs, results):
+            is_primary = pair == self.primary_pair
+            ticks, sources_active = self._book_ticks(pair, books, now, update_status=is_primary)
+            cached: list[Tick] = []
+            source_used = "unknown"
+            if is_primary:
+                # DolarBlueBolivia sources (AirTM, Wallbit, Takenos, BCB) quote USD/BOB
+                for tick in dbb_sources:
+                    (ticks if tick.timestamp == now else cached).append(tick._replace(pair=pair))
+                    sources_active.append(EXCHANGE_NAMES[tick.exchange])
             
-            if okx_buy_usdt and okx_sell_usdt:
-                self._source_status["okx"] = "active"
-                sources_active.append("OKX P2P")
-                
-                prices.append(ExchangePrice(
-                    exchange="okx",
-                    name="OKX P2P (USDT)",
-                    bid=round(okx_sell_usdt, 2),
-                    ask=round(okx_buy_usdt, 2),
-                    last=round((okx_buy_usdt + okx_sell_usdt) / 2, 2),
-                    change_24h=0.0,
-                    updated_at=datetime.utcnow(),
-                    volume_24h=None
-                ))
-        except Exception as e:
-            logger.error(f"OKX error: {e}")
-            self._source_status["okx"] = "error"
-        
-        # Set source used
-        if sources_active:
-            source_used = " + ".join(sources_active)
-        
-        # Fetch DolarBlueBolivia sources (AirTM, Wallbit, Takenos, BCB)
-        dbb_sources = await self._fetch_dolarblue_sources()
-        for price in dbb_sources:
-            prices.append(price)
-            sources_active.append(price.name)
+            # Update source string
+            if sources_active:
+                source_used = " + ".join(sources_active)
+            
+            # If no data for the primary pair, use mock data
+            if not ticks and is_primary:
+                ticks = self._get_mock_ticks(pair, now)
+                source_used = "Mock Data"
+            
+            response = self.build_current_prices(ticks + cached, source_used, pair)
+            
+            # Cache result, per pair
+            self._set_cache(f"current_prices:{pair}", response)
+            all_ticks.extend(ticks)
+            if is_primary:
+                primary = response
         
-        # Update source string
-        if sources_active:
-            source_used = " + ".join(sources_active)
+        REFRESH_SECONDS.observe(perf_counter() - refresh_start)
+        return all_ticks, primary
+    
+    async def _fetch_pair_books(self, pair: str) -> tuple[list[BookLevel], ...]:
+        """Binance and OKX asks and bids of one pair, all fetched concurrently."""
+        asset, fiat = split_pair(pair)
+        return await asyncio.gather(
+            self._fetch_binance_book("BUY", asset, fiat),  # User Buys = Ask
+            self._fetch_binance_book("SELL", asset, fiat),  # User Sells = Bid
+            self._fetch_okx_book("buy", asset, fiat),
+            self._fetch_okx_book("sell", asset, fiat),
+        )
+    
+    def _book_ticks(
+        self, pair: str, books: tuple[list[BookLevel], ...], now: datetime, update_status: bool = True
+    ) -> tuple[list[Tick], list[str]]:
+        """
+        Update the order books of `pair` and estimate one tick per P2P exchange, stamped `now`.
+        Returns the ticks and the names of the exchanges that produced one.
+        """
+        binance_asks, binance_bids, okx_asks, okx_bids = books
+        order_books = self.pair_books[pair]
+        order_books.update("binance", binance_asks, binance_bids, now)
+        order_books.update("okx", okx_asks, okx_bids, now)
         
-        # If no data, use mock data
-        if not prices:
-            prices = self._get_mock_prices()
-            source_used = "Mock Data"
+        ticks = []
+        sources_active = []
+        for exchange, name, asks, bids in (
+            ("binance", "Binance P2P", binance_asks, binance_bids),
+            ("okx", "OKX P2P", okx_asks, okx_bids),
+        ):
+            try:
+                buy_price = self._estimate_price(asks, ascending=True)  # Price to buy the asset (pay fiat)
+                sell_price = self._estimate_price(bids, ascending=False)  # Price to sell it (receive fiat)
+                
+                if buy_price and sell_price:
+                    if update_status:
+                        self._source_status[exchange] = "active"
+                    sources_active.append(name)
+                    
+                    ticks.append(Tick(
+                        exchange=exchange,
+                        bid=round(sell_price, 2),
+                        ask=round(buy_price, 2),
+                        last=round((buy_price + sell_price) / 2, 2),
+                        timestamp=now,
+                        source="realtime",
+                        pair=pair,
+                    ))
+            except Exception as e:
+                logger.error("%s %s error: %s", name, pair, e)
+                if update_status:
+                    self._source_status[exchange] = "error"
+        return ticks, sources_active
+    
+    def build_current_prices(
+        self, ticks: list[Tick], source_used: str, pair: str = DEFAULT_PAIR
+    ) -> CurrentPricesResponse:
+        """Build the current prices response (average, best buy/sell) of one pair from per-exchange ticks."""
+        prices = [
+            ExchangePrice(
+                exchange=t.exchange,
+                name=exchange_name(t.exchange, pair),
+                bid=t.bid,
+                ask=t.ask,
+                last=t.last,
+                change_24h=0.0,
+                updated_at=t.timestamp,
+                volume_24h=None,
+            )
+            for t in ticks
+        ]
         
         # Calculate average and best prices (Excluding BCB from average)
-        if prices:
+        if ticks:
             # Filter out BCB for parallel average
-            parallel_prices = [p for p in prices if p.exchange.lower() != 'bcb']
+            parallel_ticks = [t for t in ticks if t.exchange.lower() != 'bcb']
             
-            if parallel_prices:
-                avg_price = sum(p.last for p in parallel_prices) / len(parallel_prices)
+            if parallel_ticks:
+                avg_price = sum(t.last for t in parallel_ticks) / len(parallel_ticks)
             else:
-                avg_price = sum(p.last for p in prices) / len(prices) # Fallback if only BCB exists
+                avg_price = sum(t.last for t in ticks) / len(ticks) # Fallback if only BCB exists
                 
-            best_buy = min(prices, key=lambda p: p.bid)
-            best_sell = max(prices, key=lambda p: p.ask)
-        else:
+            best_bid = min(ticks, key=lambda t: t.bid)
+            best_ask = max(ticks, key=lambda t: t.ask)
+            best_buy = BestPrice(exchange=best_bid.exchange, price=best_bid.bid)
+            best_sell = BestPrice(exchange=best_ask.exchange, price=best_ask.ask)
+        elif pair == DEFAULT_PAIR:
             avg_price = 6.96
             best_buy = BestPrice(exchange="unknown", price=6.95)
             best_sell = BestPrice(exchange="unknown", price=6.98)
-        
-        # Handle BestPrice object vs ExchangePrice
-        if isinstance(best_buy, ExchangePrice):
-            best_buy = BestPrice(exchange=best_buy.exchange, price=best_buy.bid)
-        if isinstance(best_sell, ExchangePrice):
-            best_sell = BestPrice(exchange=best_sell.exchange, price=best_sell.ask)
+        else:
+            avg_price = 0.0
+            best_buy = BestPrice(exchange="unknown", price=0.0)
+            best_sell = BestPrice(exchange="unknown", price=0.0)
 
-        response = CurrentPricesResponse(
+        asset, fiat = split_pair(pair)
+        return CurrentPricesResponse(
             timestamp=datetime.utcnow(),
-            base_currency="USD",
-            quote_currency="BOB",
+            pair=pair,
+            base_currency="USD" if asset in USD_ASSETS else asset,
+            quote_currency=fiat,
             prices=prices,
             average=round(avg_price, 4),
             best_buy=best_buy,
             best_sell=best_sell,
             source=source_used,
         )
-        
-        # Cache result
-        self._set_cache(cache_key, response)
-        
-        return response
     
     async def get_price_history(
         self, 
         interval: str = "7d",
-        exchange: Optional[str] = None
+        exchange: Optional[str] = None,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bucket: Optional[str] = None,
+        since: Optional[datetime] = None,
+        pair: Optional[str] = None,
     ) -> PriceHistoryResponse:
         """
         Get historical price data (US2).
         Fetches real data from MongoDB via PriceHistoryService.
         Aggregates multiple sources into single hourly points if exchange is not specified.
+        If max_points is given, data points are downsampled server-side ("lttb" or "minmax").
+        """
+        series = await self.get_history_series(
+            interval, exchange, max_points, downsample, start=start, end=end, bucket=bucket, since=since, pair=pair
+        )
+        return await self.workers.run(self._history_response, series, size=len(series.points))
+    
+    async def get_history_series(
+        self,
+        interval: str = "7d",
+        exchange: Optional[str] = None,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bucket: Optional[str] = None,
+        since: Optional[datetime] = None,
+        pair: Optional[str] = None,
+    ) -> HistorySeries:
         """
+        Get aggregated history as compact points plus summary.
+        Used directly by the columnar/binary encoders, which skip the Pydantic models.
         
-        # Parse interval to hours
-        intervals_hours = {
-            "1h": 1,
-            "24h": 24,
-            "7d": 7 * 24,
-            "30d": 30 * 24,
-            "1y": 365 * 24,
-        }
-        hours = intervals_hours.get(interval, 24)
+        The window is [start, end) and defaults to the last `interval`. With
+        `since` (the timestamp of the newest point a client already holds)
+        only that bucket and newer ones are read and returned. `pair` defaults
+        to the primary pair.
+        """
+        hours = INTERVAL_HOURS.get(interval, 24)
         
-        # 1. Try to get REAL data from MongoDB
-        from app.database import price_history_service
-        logger.info(f"Fetching history from MongoDB for interval {interval} (hours={hours})")
-        raw_history = await price_history_service.get_history(exchange, hours)
+        # All-exchange points are averaged per minute unless a wider bucket is asked for;
+        # single exchanges return raw ticks unless bucketed
+        width = HISTORY_BUCKETS.get(bucket) if bucket else None
+        if width is None and not exchange:
+            width = HISTORY_BUCKETS["1m"]
         
-        data_points = []
+        if start is None:
+            start = (end or datetime.utcnow()) - timedelta(hours=hours)
+        if since is not None:
+            # Re-send the bucket containing `since`: it may have been partial
+            start = max(start, floor_timestamp(since, width) if width else since)
+        
+        # 1. Try to get REAL data (MongoDB, plus the archive for older ranges)
+        logger.debug("Fetching history for %s to %s", start, end or "now")
+        raw_history = await self._load_history(start, end, exchange=exchange, pair=pair)
+        
+        points, summary = await self.workers.run(
+            self._aggregate_history, raw_history, exchange, width, max_points, downsample, size=len(raw_history)
+        )
+        return HistorySeries(exchange or "all", interval, points, summary)
+    
+    @classmethod
+    def _aggregate_history(
+        cls,
+        raw_history: list[Tick],
+        exchange: Optional[str],
+        width: Optional[timedelta],
+        max_points: Optional[int],
+        downsample: str,
+    ) -> tuple[list[HistoryPoint], PriceHistorySummary]:
+        """Bucket, summarize and downsample raw ticks. CPU-bound: runs on the worker pool."""
+        points: list[HistoryPoint] = []
         if raw_history:
-            if exchange:
-                # If specific exchange, return raw points
-                for doc in raw_history:
-                    price = doc.get("last", 0.0)
-                    data_points.append(PriceDataPoint(
-                        timestamp=doc.get("timestamp"),
-                        open=price,
-                        high=price,
-                        low=price,
-                        close=price,
-                        volume=0
-                    ))
+            with span("aggregate"):
+                if exchange and width is None:
+                    # If specific exchange, return raw points
+                    points = [
+                        HistoryPoint(t.timestamp, t.last, t.last, t.last, t.last)
+                        for t in raw_history
+                    ]
+                elif exchange:
+                    points = cls._bucket_ohlc(raw_history, width)
+                else:
+                    # If all exchanges, average per bucket to avoid a "sawtooth"
+                    # graph where multiple sources exist at same second.
+                    # BCB is partitioned out of the same scan as the reference series.
+                    points = cls._bucket_average(raw_history, width, reference="bcb")
+        
+        # The summary always covers the full series; only the points are downsampled
+        summary = cls._summarize_history(points)
+        if max_points and len(points) > max_points:
+            with span("downsample"):
+                points = cls._downsample(points, max_points, downsample)
+        return points, summary
+    
+    async def _load_history(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        exchange: Optional[str] = None,
+        exchanges: Optional[list[str]] = None,
+        pair: Optional[str] = None,
+    ) -> list[Tick]:
+        """
+        Ticks of `pair` (default: the primary pair) in [start, end): the part
+        before the pair's archive watermark from the cold archive, the rest from MongoDB.
+        """
+        from app.database import price_history_service
+        pair = pair or self.primary_pair
+        archive = self.archives.get(pair)
+        archived_until = archive.archived_until if archive else None
+        if archived_until is None or start >= archived_until:
+            return await price_history_service.get_history(
+                exchange, start=start, end=end, exchanges=exchanges, pair=pair
+            )
+        
+        cold_end = archived_until if end is None else min(end, archived_until)
+        with span("archive"):
+            cold = await asyncio.to_thread(
+                archive.read, start, cold_end, [exchange] if exchange else exchanges
+            )
+        if end is not None and end <= archived_until:
+            return cold
+        hot = await price_history_service.get_history(
+            exchange, start=archived_until, end=end, exchanges=exchanges, pair=pair
+        )
+        return cold + hot
+    
+    async def get_history_compare(
+        self,
+        exchanges: list[str],
+        interval: str = "24h",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bucket: Optional[str] = None,
+        pair: Optional[str] = None,
+    ) -> PriceCompareResponse:
+        """
+        Per-exchange OHLC series aligned on one timestamp axis.
+        All exchanges are read with a single indexed query and bucketed in one pass.
+        """
+        bucket = bucket or INTERVAL_BUCKETS.get(interval, "5m")
+        width = HISTORY_BUCKETS[bucket]
+        if start is None:
+            start = (end or datetime.utcnow()) - timedelta(hours=INTERVAL_HOURS.get(interval, 24))
+        
+        raw_history = await self._load_history(start, end, exchanges=exchanges, pair=pair)
+        return await self.workers.run(
+            self._compare_response, raw_history, exchanges, interval, bucket, width, pair or self.primary_pair,
+            size=len(raw_history),
+        )
+    
+    @classmethod
+    def _compare_response(
+        cls,
+        raw_history: list[Tick],
+        exchanges: list[str],
+        interval: str,
+        bucket: str,
+        width: timedelta,
+        pair: str = DEFAULT_PAIR,
+    ) -> PriceCompareResponse:
+        """Bucket ticks onto the shared axis and build the response. CPU-bound: runs on the worker pool."""
+        with span("aggregate"):
+            timestamps, columns = cls._bucket_compare(raw_history, exchanges, width)
+        
+        # Plain dicts are validated in one pass by the response model
+        return PriceCompareResponse(
+            interval=interval,
+            bucket=bucket,
+            timestamps=timestamps,
+            series=[
+                {
+                    "exchange": exchange,
+                    "name": exchange_name(exchange, pair),
+                    "open": columns[exchange][0],
+                    "high": columns[exchange][1],
+                    "low": columns[exchange][2],
+                    "close": columns[exchange][3],
+                }
+                for exchange in exchanges
+            ],
+        )
+    
+    @staticmethod
+    def _bucket_compare(
+        ticks: Iterable[Tick],
+        exchanges: list[str],
+        width: timedelta,
+    ) -> tuple[list[datetime], dict[str, tuple[list, list, list, list]]]:
+        """
+        Bucket timestamp-ordered ticks of several exchanges onto a shared axis.
+        Returns the bucket starts and per-exchange (open, high, low, close) columns,
+        with None where an exchange had no tick in a bucket.
+        """
+        timestamps: list[datetime] = []
+        columns = {exchange: ([], [], [], []) for exchange in exchanges}
+        bucket_end = None
+        current: dict[str, list[float]] = {}
+        
+        def flush():
+            for exchange, (opens, highs, lows, closes) in columns.items():
+                prices = current.get(exchange)
+                if prices:
+                    opens.append(prices[0])
+                    highs.append(max(prices))
+                    lows.append(min(prices))
+                    closes.append(prices[-1])
+                else:
+                    opens.append(None)
+                    highs.append(None)
+                    lows.append(None)
+                    closes.append(None)
+        
+        for tick in ticks:
+            if bucket_end is None or tick.timestamp >= bucket_end:
+                if current:
+                    flush()
+                bucket_start = floor_timestamp(tick.timestamp, width)
+                bucket_end = bucket_start + width
+                timestamps.append(bucket_start)
+                current = {}
+            prices = current.get(tick.exchange)
+            if prices is None:
+                current[tick.exchange] = [tick.last]
             else:
-                # If all exchanges, AGGREGATE by timestamp (minute precision)
-                # to avoid "sawtooth" graph where multiple sources exist at same second
-                from collections import defaultdict
-                grouped = defaultdict(list)
-                
-                for doc in raw_history:
-                    # Skip BCB in general average aggregation
-                    if doc.get("exchange", "").lower() == "bcb":
-                        continue
-                        
-                    # Group by minute to combine simultaneous writes
-                    ts = doc.get("timestamp").replace(second=0, microsecond=0)
-                    grouped[ts].append(doc.get("last", 0.0))
-                
-                # Sort by timestamp
-                sorted_timestamps = sorted(grouped.keys())
-                
-                for ts in sorted_timestamps:
-                    prices = grouped[ts]
+                prices.append(tick.last)
+        if current:
+            flush()
+        return timestamps, columns
+    
+    @staticmethod
+    def _bucket_average(
+        ticks: Iterable[Tick],
+        width: timedelta,
+        reference: Optional[str] = None,
+    ) -> list[HistoryPoint]:
+        """
+        Average timestamp-ordered ticks per bucket (open/close = mean, high/low = extremes).
+        Buckets are contiguous in sorted input, so one comparison per tick finds the boundary.
+        
+        Ticks of the `reference` exchange are excluded from the average and joined
+        as-of instead: each bucket's reference_close is the last reference price
+        seen up to the bucket end, so buckets without a reference tick are not left empty.
+        """
+        points: list[HistoryPoint] = []
+        bucket_start = bucket_end = None
+        prices: list[float] = []
+        reference_close = None
+        for tick in ticks:
+            if bucket_end is None or tick.timestamp >= bucket_end:
+                if prices:
                     avg_price = round(sum(prices) / len(prices), 4)
-                    data_points.append(PriceDataPoint(
-                        timestamp=ts,
-                        open=avg_price,
-                        high=max(prices),
-                        low=min(prices),
-                        close=avg_price,
-                        volume=0
+                    points.append(HistoryPoint(
+                        bucket_start, avg_price, max(prices), min(prices), avg_price, reference_close
                     ))
-
-            # IF General View (no specific exchange), Fetch BCB Reference Data separately
-            if not exchange:
-                try:
-                    # Fetch BCB specific history
-                    bcb_history = await price_history_service.get_history("bcb", hours)
-                    
-                    # Create lookup map for BCB prices by timestamp (minute precision)
-                    bcb_map = {}
-                    if bcb_history:
-                        for doc in bcb_history:
-                            ts = doc.get("timestamp").replace(second=0, microsecond=0)
-                            # If multiple BCB/min (unlikely), take last
-                            bcb_map[ts] = doc.get("last", 0.0)
-                    
-                    # Merge into data_points
-                    for dp in data_points:
-                        # Find closest BCB point (exact match preferred)
-                        if dp.timestamp in bcb_map:
-                            dp.reference_close = bcb_map[dp.timestamp]
-                            
-                except Exception as e:
-                    logger.error(f"Error fetching BCB reference history: {e}")
-
-        # 2. Fallback (Empty if no data)
-        # ... existing logic ...
-
+                bucket_start = floor_timestamp(tick.timestamp, width)
+                bucket_end = bucket_start + width
+                prices = []
+            if tick.exchange == reference:
+                reference_close = tick.last
+            else:
+                prices.append(tick.last)
+        if prices:
+            avg_price = round(sum(prices) / len(prices), 4)
+            points.append(HistoryPoint(
+                bucket_start, avg_price, max(prices), min(prices), avg_price, reference_close
+            ))
+        return points
+    
+    @staticmethod
+    def _bucket_ohlc(ticks: Iterable[Tick], width: timedelta) -> list[HistoryPoint]:
+        """Open/high/low/close of timestamp-ordered ticks per bucket."""
+        points: list[HistoryPoint] = []
+        bucket_start = bucket_end = None
+        prices: list[float] = []
+        for tick in ticks:
+            if bucket_end is None or tick.timestamp >= bucket_end:
+                if prices:
+                    points.append(HistoryPoint(bucket_start, prices[0], max(prices), min(prices), prices[-1]))
+                bucket_start = floor_timestamp(tick.timestamp, width)
+                bucket_end = bucket_start + width
+                prices = []
+            prices.append(tick.last)
+        if prices:
+            points.append(HistoryPoint(bucket_start, prices[0], max(prices), min(prices), prices[-1]))
+        return points
+    
+    @staticmethod
+    def _summarize_history(points: list[HistoryPoint]) -> PriceHistorySummary:
+        """Calculate summary statistics over history points."""
         # Calculate summary
-        if data_points:
-            closes = [dp.close for dp in data_points]
+        if points:
+            closes = [p.close for p in points]
             summary = PriceHistorySummary(
                 avg_price=round(sum(closes) / len(closes), 4),
                 min_price=round(min(closes), 4),
@@ -280,20 +657,95 @@ class ExchangeService:
                 total_volume=0,
                 change_percent=0.0
             )
+        return summary
+    
+    @staticmethod
+    def _history_response(series: HistorySeries) -> PriceHistoryResponse:
+        """Build the API response model from a history series."""
+        # Plain dicts are validated in a single pass by the response model,
+        # which is cheaper than instantiating each PriceDataPoint in Python
+        data_points = [
+            {
+                "timestamp": p.timestamp,
+                "open": p.open,
+                "high": p.high,
+                "low": p.low,
+                "close": p.close,
+                "volume": 0,
+                "reference_close": p.reference_close,
+            }
+            for p in series.points
+        ]
         
         return PriceHistoryResponse(
-            exchange=exchange or "all",
-            interval=interval,
+            exchange=series.exchange,
+            interval=series.interval,
             data_points=data_points,
-            summary=summary,
+            summary=series.summary,
         )
     
-    async def get_volatility(self, period: str = "24h") -> VolatilityResponse:
+    async def get_volatility(self, period: str = "24h", pair: Optional[str] = None) -> VolatilityResponse:
         """Calculate volatility metrics."""
         
-        history = await self.get_price_history(period)
-        closes = [dp.close for dp in history.data_points]
+        series = await self.get_history_series(period, pair=pair)
+        return self._volatility(period, [p.close for p in series.points])
+    
+    async def get_dashboard(
+        self,
+        interval: str = "24h",
+        exchange: Optional[str] = None,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
+        pair: Optional[str] = None,
+    ) -> DashboardResponse:
+        """
+        Current prices, history, volatility and sources in one payload.
+        
+        History and volatility share one history read: volatility is computed
+        on the full series before it is downsampled to `max_points`. Both are
+        cached per (pair, interval, exchange, max_points, downsample); the
+        payload is rebuilt only when the current prices have been refreshed.
+        """
+        pair = pair or self.primary_pair
+        current = await self.get_current_prices(pair)
+        
+        key = ("dashboard", pair, interval, exchange, max_points, downsample)
+        if self._is_cache_valid(key, "dashboard") and self._cache[key].current is current:
+            return self._cache[key]
         
+        history_key = key + ("history",)
+        if self._is_cache_valid(history_key, "dashboard_history"):
+            history, volatility = self._cache[history_key]
+        else:
+            series = await self.get_history_series(interval, exchange, pair=pair)
+            history, volatility = await self.workers.run(
+                self._dashboard_history, interval, series, max_points, downsample, size=len(series.points)
+            )
+            self._set_cache(history_key, (history, volatility))
+        
+        dashboard = DashboardResponse(
+            current=current,
+            history=history,
+            volatility=volatility,
+            sources=await self.get_sources(),
+        )
+        self._set_cache(key, dashboard)
+        return dashboard
+    
+    @classmethod
+    def _dashboard_history(
+        cls, interval: str, series: HistorySeries, max_points: Optional[int], downsample: str
+    ) -> tuple[PriceHistoryResponse, VolatilityResponse]:
+        """Volatility of the full series, then the downsampled history. CPU-bound: runs on the worker pool."""
+        volatility = cls._volatility(interval, [p.close for p in series.points])
+        if max_points and len(series.points) > max_points:
+            with span("downsample"):
+                series = series._replace(points=cls._downsample(series.points, max_points, downsample))
+        return cls._history_response(series), volatility
+    
+    @staticmethod
+    def _volatility(period: str, closes: list[float]) -> VolatilityResponse:
+        """Volatility metrics of a close series."""
         if len(closes) < 2:
             std_dev = 0.0
             volatility = 0.0
@@ -322,6 +774,129 @@ class ExchangeService:
             ),
         )
     
+    async def get_indicators(
+        self,
+        indicators: list[tuple[str, dict]],
+        interval: str = "24h",
+        exchange: Optional[str] = None,
+        bucket: Optional[str] = None,
+        pair: Optional[str] = None,
+    ) -> IndicatorsResponse:
+        """
+        Technical indicators (name, params) over the bucketed closes of the history series.
+        
+        The window is read with enough extra buckets before it for the longest
+        period to be warm at its first point. The series is cached per
+        (pair, interval, exchange, bucket, warm-up) together with the indicators
+        computed on it per (indicator, params), so repeated requests only compute
+        what is new and the values go with their series when it expires.
+        """
+        pair = pair or self.primary_pair
+        bucket = bucket or INTERVAL_BUCKETS.get(interval, "5m")
+        width = HISTORY_BUCKETS[bucket]
+        end = datetime.utcnow()
+        start = end - timedelta(hours=INTERVAL_HOURS.get(interval, 24))
+        
+        warmup = max((params.get("period", 1) for _, params in indicators), default=1)
+        series_key = ("indicators", pair, interval, exchange, bucket, warmup)
+        if self._is_cache_valid(series_key, "indicator_series"):
+            series, computed = self._cache[series_key]
+        else:
+            series = await self.get_history_series(
+                interval, exchange, start=start - warmup * width, end=end, bucket=bucket, pair=pair
+            )
+            computed = {}
+            self._set_cache(series_key, (series, computed))
+        
+        closes = [point.close for point in series.points]
+        # Points of the warm-up buckets are dropped from every output
+        first = next((i for i, point in enumerate(series.points) if point.timestamp >= start), len(closes))
+        
+        results = []
+        with span("indicators"):
+            for name, params in indicators:
+                key = (name, tuple(sorted(params.items())))
+                values = computed.get(key)
+                CACHE_REQUESTS.labels("indicators", "miss" if values is None else "hit").inc()
+                if values is None:
+                    values = await self.workers.run(compute_indicator, name, closes, params, size=len(closes))
+                    if len(computed) < MAX_INDICATORS_PER_SERIES:
+                        computed[key] = values
+                results.append({
+                    "indicator": name,
+                    "params": params,
+                    "values": {output: column[first:] for output, column in values.items()},
+                })
+        
+        return IndicatorsResponse(
+            pair=pair,
+            exchange=exchange or "all",
+            interval=interval,
+            bucket=bucket,
+            timestamps=[point.timestamp for point in series.points[first:]],
+            close=closes[first:],
+            indicators=results,
+        )
+    
+    async def get_quote(
+        self, amount: float, side: str = "buy", exchange: Optional[str] = None, pair: Optional[str] = None
+    ) -> QuoteResponse:
+        """
+        Rate for buying or selling `amount` of the pair's asset against each exchange's latest book.
+        `best` is the cheapest complete fill when buying, the highest when selling.
+        """
+        pair = pair or self.primary_pair
+        books = self.pair_books[pair]
+        exchanges = [exchange] if exchange else books.exchanges()
+        quotes = []
+        for name in exchanges:
+            fill = books.quote(name, amount, side)
+            if fill is None:
+                continue
+            quotes.append({
+                "exchange": name,
+                "name": exchange_name(name, pair),
+                "filled": round(fill.filled, 4),
+                "total": round(fill.cost, 2),
+                "average_price": round(fill.average_price, 4),
+                "worst_price": fill.worst_price,
+                "levels": fill.levels,
+                "complete": fill.complete,
+                "updated_at": books.updated_at[name],
+            })
+        
+        complete = [q for q in quotes if q["complete"]]
+        best = None
+        if complete:
+            pick = min if side == "buy" else max
+            best = pick(complete, key=lambda q: q["average_price"])
+        return QuoteResponse(amount=amount, side=side, pair=pair, quotes=quotes, best=best)
+    
+    async def get_spreads(self, period: str = "24h") -> SpreadsResponse:
+        """
+        Current spread matrix, premiums and best route, plus per-minute rollups for `period`.
+        Rollups come from memory when it covers the period, otherwise from MongoDB.
+        """
+        spreads = self.spreads
+        since = datetime.utcnow() - timedelta(hours=INTERVAL_HOURS.get(period, 24))
+        history = spreads.rollups_since(since)
+        if history is None:
+            from app.database import spread_rollup_service, Database
+            if Database.is_connected():
+                history = await spread_rollup_service.get_range(since)
+            else:
+                history = [doc for doc in spreads.history if doc["timestamp"] >= since]
+        
+        route = spreads.best_route()
+        return SpreadsResponse(
+            timestamp=spreads.updated_at,
+            reference=spreads.reference_price,
+            premiums=spreads.premiums(),
+            matrix=spreads.matrix,
+            best_route=route._asdict() if route else None,
+            history=history,
+        )
+    
     async def get_sources(self) -> SourcesResponse:
         """Get information about data sources."""
         
@@ -372,115 +947,115 @@ class ExchangeService:
         
         return SourcesResponse(sources=sources)
     
-    async def _fetch_dolarblue_sources(self) -> list[ExchangePrice]:
+    async def _fetch_dolarblue_sources(self, now: Optional[datetime] = None) -> list[Tick]:
         """
         Fetch rates from DolarBlueBolivia API sources.
-        Returns list of ExchangePrice from AirTM, Wallbit, Takenos, and BCB.
+        Returns list of Tick from AirTM, Wallbit, Takenos, and BCB; fetched ones are stamped `now`.
         Persists successful responses in self._dbb_prices to mitigate rate limiting/failures.
         """
-        now = datetime.utcnow()
+        now = now or datetime.utcnow()
         fetched_count = 0
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with self._http_client() as client:
             # AirTM
             try:
-                response = await client.get(f"{self._dbb_base_url}/fetch/airtm")
+                with SOURCE_FETCH_SECONDS.labels("airtm").time():
+                    response = await client.get(f"{self._dbb_base_url}/fetch/airtm")
                 if response.status_code == 200:
                     data = response.json().get("data", {})
                     if data.get("addValue") and data.get("withdrawValue"):
                         self._source_status["airtm"] = "active"
-                        self._dbb_prices["airtm"] = ExchangePrice(
+                        self._dbb_prices["airtm"] = Tick(
                             exchange="airtm",
-                            name="AirTM",
                             ask=round(float(data["addValue"]), 2),
                             bid=round(float(data["withdrawValue"]), 2),
                             last=round((float(data["addValue"]) + float(data["withdrawValue"])) / 2, 2),
-                            change_24h=0.0,
-                            updated_at=now,
-                            volume_24h=None
+                            timestamp=now,
+                            source="realtime",
                         )
                         fetched_count += 1
                 else:
-                    logger.warning(f"AirTM returned status {response.status_code}")
+                    logger.warning("AirTM returned status %s", response.status_code)
             except Exception as e:
-                logger.error(f"AirTM error: {e}")
+                logger.error("AirTM error: %s", e)
                 self._source_status["airtm"] = "error"
+                SOURCE_FETCH_ERRORS.labels("airtm").inc()
             
             # Wallbit
             try:
-                response = await client.get(f"{self._dbb_base_url}/fetch/wallbit")
+                with SOURCE_FETCH_SECONDS.labels("wallbit").time():
+                    response = await client.get(f"{self._dbb_base_url}/fetch/wallbit")
                 if response.status_code == 200:
                     data = response.json().get("data", {})
                     if data.get("buy") and data.get("sell"):
                         self._source_status["wallbit"] = "active"
-                        self._dbb_prices["wallbit"] = ExchangePrice(
+                        self._dbb_prices["wallbit"] = Tick(
                             exchange="wallbit",
-                            name="Wallbit",
                             ask=round(float(data["buy"]), 2),
                             bid=round(float(data["sell"]), 2),
                             last=round((float(data["buy"]) + float(data["sell"])) / 2, 2),
-                            change_24h=0.0,
-                            updated_at=now,
-                            volume_24h=None
+                            timestamp=now,
+                            source="realtime",
                         )
                         fetched_count += 1
                 else:
-                    logger.warning(f"Wallbit returned status {response.status_code}")
+                    logger.warning("Wallbit returned status %s", response.status_code)
             except Exception as e:
-                logger.error(f"Wallbit error: {e}")
+                logger.error("Wallbit error: %s", e)
                 self._source_status["wallbit"] = "error"
+                SOURCE_FETCH_ERRORS.labels("wallbit").inc()
             
             # Takenos
             try:
-                response = await client.get(f"{self._dbb_base_url}/fetch/takenos")
+                with SOURCE_FETCH_SECONDS.labels("takenos").time():
+                    response = await client.get(f"{self._dbb_base_url}/fetch/takenos")
                 if response.status_code == 200:
                     data = response.json().get("data", {})
                     if data.get("buy") and data.get("sell"):
                         self._source_status["takenos"] = "active"
-                        self._dbb_prices["takenos"] = ExchangePrice(
+                        self._dbb_prices["takenos"] = Tick(
                             exchange="takenos",
-                            name="Takenos",
                             ask=round(float(data["buy"]), 2),
                             bid=round(float(data["sell"]), 2),
                             last=round((float(data["buy"]) + float(data["sell"])) / 2, 2),
-                            change_24h=0.0,
-                            updated_at=now,
-                            volume_24h=None
+                            timestamp=now,
+                            source="realtime",
                         )
                         fetched_count += 1
                 else:
-                    logger.warning(f"Takenos returned status {response.status_code}")
+                    logger.warning("Takenos returned status %s", response.status_code)
             except Exception as e:
-                logger.error(f"Takenos error: {e}")
+                logger.error("Takenos error: %s", e)
                 self._source_status["takenos"] = "error"
+                SOURCE_FETCH_ERRORS.labels("takenos").inc()
             
             # BCB (Banco Central de Bolivia) - Official Rate
             try:
-                response = await client.get(f"{self._dbb_base_url}/v1/bcb")
+                with SOURCE_FETCH_SECONDS.labels("bcb").time():
+                    response = await client.get(f"{self._dbb_base_url}/v1/bcb")
                 if response.status_code == 200:
                     data = response.json().get("data", {})
                     if data.get("compra") and data.get("venta"):
                         self._source_status["bcb"] = "active"
-                        self._dbb_prices["bcb"] = ExchangePrice(
+                        self._dbb_prices["bcb"] = Tick(
                             exchange="bcb",
-                            name="BCB (Oficial)",
                             ask=round(float(data["venta"]), 2),
                             bid=round(float(data["compra"]), 2),
                             last=round((float(data["venta"]) + float(data["compra"])) / 2, 2),
-                            change_24h=0.0,
-                            updated_at=now,
-                            volume_24h=None
+                            timestamp=now,
+                            source="realtime",
                         )
                         fetched_count += 1
                 else:
-                    logger.warning(f"BCB returned status {response.status_code}")
+                    logger.warning("BCB returned status %s", response.status_code)
             except Exception as e:
-                logger.error(f"BCB error: {e}")
+                logger.error("BCB error: %s", e)
                 self._source_status["bcb"] = "error"
+                SOURCE_FETCH_ERRORS.labels("bcb").inc()
         
         # Log success/failure count
         if fetched_count < 4:
-            logger.info(f"Fetched {fetched_count}/4 DolarBlue sources. Using cached values for {4-fetched_count} sources.")
+            logger.info("Fetched %s/4 DolarBlue sources. Using cached values for %s sources.", fetched_count, 4 - fetched_count)
         
         # Return all available prices from cache (including just updated ones)
         return list(self._dbb_prices.values())
@@ -489,21 +1064,57 @@ class ExchangeService:
     # Private Methods
     # ============================================
     
-    async def _fetch_binance_p2p(self, trade_type: str = "BUY") -> float:
+    @staticmethod
+    def _estimate_price(levels: list[BookLevel], ascending: bool) -> float:
         """
-        Fetch P2P rates from Binance (USDT/BOB).
+        Robust price of one side of a P2P book (settings.p2p_estimator).
+        `ascending` is True for asks (best = cheapest) and False for bids.
+        """
+        if not levels:
+            return 0.0
+        estimator = settings.p2p_estimator
+        if estimator == "trimmed_mean":
+            return trimmed_mean(levels, settings.p2p_trim)
+        if estimator == "depth":
+            price = depth_price(levels, settings.p2p_depth_amount, ascending)
+            return price or 0.0
+        return weighted_median(levels)
+    
+    async def _fetch_binance_book(
+        self, trade_type: str = "BUY", asset: str = "USDT", fiat: str = "BOB"
+    ) -> list[BookLevel]:
         """
-        url = "https://p2p.binance.com/bapi/c2c/v2/friendly/c2c/adv/search"
+        Fetch the Binance P2P book of asset/fiat, settings.p2p_book_pages pages concurrently.
+        """
+        async with self._http_client() as client:
+            pages = await asyncio.gather(*(
+                self._fetch_binance_page(client, trade_type, page, asset, fiat)
+                for page in range(1, settings.p2p_book_pages + 1)
+            ))
+        return [level for page in pages for level in page]
+    
+    async def _fetch_binance_page(
+        self,
+        client: httpx.AsyncClient,
+        trade_type: str,
+        page: int,
+        asset: str = "USDT",
+        fiat: str = "BOB",
+    ) -> list[BookLevel]:
+        """
+        Fetch one page of Binance P2P ads of asset/fiat.
+        """
+        url = settings.binance_p2p_url
         headers = {
             "Content-Type": "application/json",
             "User-Agent": "Mozilla/5.0",
         }
         payload = {
-            "fiat": "BOB",
-            "page": 1,
-            "rows": 5,
+            "fiat": fiat,
+            "page": page,
+            "rows": settings.p2p_page_rows,
             "tradeType": trade_type, 
-            "asset": "USDT",
+            "asset": asset,
             "countries": [],
             "proMerchantAds": False,
             "shieldMerchantAds": False,
@@ -513,39 +1124,44 @@ class ExchangeService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            with SOURCE_FETCH_SECONDS.labels("binance").time():
                 response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                
-                ads = data.get("data", [])
-                if not ads:
-                    return 0.0
-                
-                # Get average of top 3 prices to avoid outliers
-                valid_ads = [float(ad["adv"]["price"]) for ad in ads[:3] if ad.get("adv", {}).get("price")]
-                if not valid_ads:
-                    return 0.0
-                    
-                return sum(valid_ads) / len(valid_ads)
+            response.raise_for_status()
+            data = response.json()
+            
+            levels = []
+            for ad in data.get("data") or []:
+                adv = ad.get("adv", {})
+                try:
+                    levels.append(BookLevel(
+                        float(adv["price"]),
+                        float(adv.get("tradableQuantity") or 0),
+                        float(adv.get("minSingleTransAmount") or 0),
+                        float(adv.get("maxSingleTransAmount") or 0),
+                    ))
+                except (KeyError, ValueError, TypeError):
+                    continue
+            return levels
         except Exception as e:
-            logger.error(f"Binance P2P {trade_type} error: {e}")
-            return 0.0
+            logger.error("Binance P2P %s/%s %s page %s error: %s", asset, fiat, trade_type, page, e)
+            SOURCE_FETCH_ERRORS.labels("binance").inc()
+            return []
 
-    async def _fetch_okx_p2p(self, side: str = "buy") -> float:
+    async def _fetch_okx_book(self, side: str = "buy", asset: str = "USDT", fiat: str = "BOB") -> list[BookLevel]:
         """
-        Fetch P2P rates from OKX (USDT/BOB).
-        side: "buy" (user buys USDT = Ask) or "sell" (user sells USDT = Bid)
+        Fetch the OKX P2P book of asset/fiat.
+        side: "buy" (user buys the asset = Ask) or "sell" (user sells it = Bid)
+        The books endpoint returns the whole side in one response.
         """
         # OKX P2P uses GET with query parameters
-        base_url = "https://www.okx.com/v3/c2c/tradingOrders/books"
+        base_url = settings.okx_p2p_url
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Accept": "application/json",
         }
         params = {
-            "quoteCurrency": "BOB",
-            "baseCurrency": "USDT",
+            "quoteCurrency": fiat,
+            "baseCurrency": asset,
             "side": side,
             "paymentMethod": "all",
             "userType": "all",
@@ -557,15 +1173,16 @@ class ExchangeService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(base_url, params=params, headers=headers)
+            async with self._http_client() as client:
+                with SOURCE_FETCH_SECONDS.labels("okx").time():
+                    response = await client.get(base_url, params=params, headers=headers)
                 response.raise_for_status()
                 data = response.json()
                 
                 # OKX response: {"code": "0", "data": {"buy": [...], "sell": [...]}}
                 if data.get("code") != "0":
-                    logger.warning(f"OKX API error: {data.get('msg', 'Unknown error')}")
-                    return 0.0
+                    logger.warning("OKX API error: %s", data.get('msg', 'Unknown error'))
+                    return []
                 
                 ads_data = data.get("data", {})
                 ads = ads_data.get(side, []) if isinstance(ads_data, dict) else []
@@ -576,105 +1193,92 @@ class ExchangeService:
                         ads = ads_data
                 
                 if not ads:
-                    logger.debug(f"No OKX P2P ads found for {side}")
-                    return 0.0
+                    logger.debug("No OKX P2P ads found for %s/%s %s", asset, fiat, side)
+                    return []
                 
-                # Get average of top 3 prices to avoid outliers
-                valid_prices = []
-                for ad in ads[:5]:
-                    price = ad.get("price") or ad.get("unitPrice")
-                    if price:
-                        try:
-                            valid_prices.append(float(price))
-                        except (ValueError, TypeError):
-                            continue
-                
-                if not valid_prices:
-                    return 0.0
-                    
-                return sum(valid_prices[:3]) / min(len(valid_prices), 3)
+                levels = []
+                for ad in ads[:settings.p2p_book_pages * settings.p2p_page_rows]:
+                    try:
+                        levels.append(BookLevel(
+                            float(ad.get("price") or ad.get("unitPrice")),
+                            float(ad.get("availableAmount") or 0),
+                            float(ad.get("quoteMinAmountPerOrder") or 0),
+                            float(ad.get("quoteMaxAmountPerOrder") or 0),
+                        ))
+                    except (ValueError, TypeError):
+                        continue
+                return levels
         except httpx.HTTPStatusError as e:
-            logger.debug(f"OKX P2P {side} HTTP error: {e.response.status_code}")
-            return 0.0
+            logger.debug("OKX P2P %s/%s %s HTTP error: %s", asset, fiat, side, e.response.status_code)
+            SOURCE_FETCH_ERRORS.labels("okx").inc()
+            return []
         except Exception as e:
-            logger.debug(f"OKX P2P {side} error: {e}")
-            return 0.0
+            logger.debug("OKX P2P %s/%s %s error: %s", asset, fiat, side, e)
+            SOURCE_FETCH_ERRORS.labels("okx").inc()
+            return []
 
-    def _get_mock_prices(self) -> list[ExchangePrice]:
-        """Return mock prices for development."""
-        now = datetime.utcnow()
+    @staticmethod
+    def _downsample(points: list[HistoryPoint], max_points: int, method: str) -> list[HistoryPoint]:
+        """Reduce points to at most max_points, preserving the shape of the close series."""
+        closes = [p.close for p in points]
+        if method == "minmax":
+            indices = minmax_indices(closes, max_points)
+        else:
+            start = points[0].timestamp
+            xs = [(p.timestamp - start).total_seconds() for p in points]
+            indices = lttb_indices(xs, closes, max_points)
+        return [points[i] for i in indices]
+    
+    def _http_client(self) -> httpx.AsyncClient:
+        """Create an HTTP client for upstream requests."""
+        return httpx.AsyncClient(timeout=10.0, transport=self._transport)
+
+    def _get_mock_ticks(self, pair: str, now: datetime) -> list[Tick]:
+        """Return mock prices of `pair` for development, stamped `now`."""
         # Cleaned mock data - Only Binance
-        return [ExchangePrice(
+        return [Tick(
             exchange="binance",
-            name="Binance",
             bid=6.95,
             ask=6.98,
             last=6.97,
-            change_24h=0.01,
-            volume_24h=1200000,
-            updated_at=now,
+            timestamp=now,
+            source="mock",
+            pair=pair,
         )]
     
-    def _generate_price_history(self, days: float) -> list[PriceDataPoint]:
-        """Generate simulated price history."""
-        data_points = []
-        now = datetime.utcnow()
-        
-        # Determine number of points and interval
-        if days <= 1/24:  # 1 hour
-            num_points = 60
-            delta = timedelta(minutes=1)
-        elif days <= 1:  # 24 hours
-            num_points = 24
-            delta = timedelta(hours=1)
-        elif days <= 7:
-            num_points = 7 * 24
-            delta = timedelta(hours=1)
-        else:
-            num_points = 30
-            delta = timedelta(days=1)
-        
-        base_price = 6.96
-        volatility = 0.02
-        
-        for i in range(num_points, 0, -1):
-            timestamp = now - (delta * i)
-            
-            # Random walk
-            change = random.gauss(0, volatility)
-            open_price = base_price + change
-            close_price = open_price + random.gauss(0, volatility / 2)
-            high_price = max(open_price, close_price) + random.uniform(0, 0.01)
-            low_price = min(open_price, close_price) - random.uniform(0, 0.01)
-            
-            data_points.append(PriceDataPoint(
-                timestamp=timestamp,
-                open=round(open_price, 4),
-                high=round(high_price, 4),
-                low=round(low_price, 4),
-                close=round(close_price, 4),
-                volume=random.randint(10000, 100000),
-            ))
-            
-            base_price = close_price
-        
-        return data_points
-    
-    def _is_cache_valid(self, key: str) -> bool:
-        """Check if cache entry is still valid."""
-        if key not in self._cache:
-            return False
-        
+    def _is_cache_valid(self, key, label: Optional[str] = None) -> bool:
+        """
+        Check if cache entry is still valid.
+        `label` names the key in metrics (default: the key itself) for keys with unbounded values.
+        """
+        label = label or key
         cache_time = self._cache_time.get(key)
-        if not cache_time:
+        if key not in self._cache or not cache_time:
+            CACHE_REQUESTS.labels(label, "miss").inc()
             return False
         
-        return (datetime.utcnow() - cache_time).total_seconds() < settings.cache_ttl
+        valid = (datetime.utcnow() - cache_time).total_seconds() < settings.cache_ttl
+        CACHE_REQUESTS.labels(label, "hit" if valid else "miss").inc()
+        return valid
     
-    def _set_cache(self, key: str, value) -> None:
-        """Set cache entry."""
+    def _set_cache(self, key, value) -> None:
+        """
+        Set cache entry.
+        Entries are kept in write order: expired ones are purged from the front, and the
+        oldest are evicted beyond settings.cache_max_entries (keys derived from query params).
+        """
+        now = datetime.utcnow()
+        self._cache.pop(key, None)
         self._cache[key] = value
-        self._cache_time[key] = datetime.utcnow()
+        self._cache_time[key] = now
+        
+        expired = now - timedelta(seconds=settings.cache_ttl)
+        while len(self._cache) > 1:
+            oldest = next(iter(self._cache))
+            if len(self._cache) <= settings.cache_max_entries and self._cache_time[oldest] >= expired:
+                break
+            del self._cache[oldest]
+            del self._cache_time[oldest]
 
 
 
@@ -0,0 +1,202 @@
+"""
+Deterministic synthetic market data and tick replay.
+
+The generator produces multi-exchange ticks in batches: a shared market random walk plus
+a mean-reverting per-exchange deviation, so exchanges co-move like the
+real P2P books. Each batch is built column-wise with `itertools.accumulate`
+instead of stepping a Python loop per tick.
+"""
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from time import monotonic
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+from app.models.ticks import Tick
+
+# Per-tick pull of an exchange's deviation back towards the market price
+MEAN_REVERSION = 0.98
+
+
+@dataclass(frozen=True)
+class ExchangeProfile:
+    """Price behaviour of a single synthetic exchange."""
+    exchange: str
+    base: float  # starting mid price (BOB per USD)
+    volatility: float  # std dev of the per-tick idiosyncratic move
+    half_spread: float  # distance from mid to bid/ask
+    follows_market: bool = True  # official rates ignore the P2P market walk
+
+
+DEFAULT_PROFILES = (
+    ExchangeProfile("binance", 9.30, 0.004, 0.03),
+    ExchangeProfile("okx", 9.28, 0.004, 0.05),
+    ExchangeProfile("airtm", 9.26, 0.003, 0.15),
+    ExchangeProfile("wallbit", 9.27, 0.003, 0.10),
+    ExchangeProfile("takenos", 9.25, 0.003, 0.11),
+    ExchangeProfile("bcb", 6.91, 0.0, 0.05, follows_market=False),
+)
+
+
+class MarketDataGenerator:
+    """Seeded generator of multi-exchange ticks."""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        profiles: Iterable[ExchangeProfile] = DEFAULT_PROFILES,
+        tick_seconds: float = 5.0,
+        market_volatility: float = 0.002,
+        source: str = "synthetic",
+    ):
+        self.seed = seed
+        self.profiles = tuple(profiles)
+        self.tick_seconds = tick_seconds
+        self.market_volatility = market_volatility
+        self.source = source
+        # Independent streams per series keep output identical for any batch size
+        self._market_rng = random.Random(f"{seed}:market")
+        self._rngs = {p.exchange: random.Random(f"{seed}:{p.exchange}") for p in self.profiles}
+        self._market = 0.0
+        self._deviation = {p.exchange: 0.0 for p in self.profiles}
+
+    def batches(
+        self,
+        start: datetime,
+        end: datetime,
+        batch_size: int = 10_000,
+    ) -> Iterator[list[Tick]]:
+        """
+        Yield ticks between `start` and `end` in batches.
+
+        Every refresh step emits one tick per exchange with the same
+        timestamp; documents are ordered by timestamp, then exchange.
+        """
+        steps = int((end - start).total_seconds() // self.tick_seconds)
+        per_batch = max(1, batch_size // len(self.profiles))
+        for offset in range(0, steps, per_batch):
+            yield self._batch(start, offset, min(per_batch, steps - offset))
+
+    def generate(self, start: datetime, end: datetime) -> list[Tick]:
+        """Return all ticks between `start` and `end`."""
+        return [tick for batch in self.batches(start, end) for tick in batch]
+
+    @staticmethod
+    def _walk(rng: random.Random, n: int, sigma: float, initial: float, decay: float = 1.0) -> list[float]:
+        gauss = rng.gauss
+        noise = [gauss(0.0, sigma) for _ in range(n)]
+        if decay == 1.0:
+            return list(accumulate(noise, initial=initial))[1:]
+        return list(accumulate(noise, lambda level, step: level * decay + step, initial=initial))[1:]
+
+    def _batch(self, start: datetime, offset: int, n: int) -> list[Tick]:
+        step = timedelta(seconds=self.tick_seconds)
+        timestamps = [start + step * (offset + i) for i in range(n)]
+
+        market = self._walk(self._market_rng, n, self.market_volatility, self._market)
+        self._market = market[-1]
+
+        columns = []
+        for profile in self.profiles:
+            deviation = self._walk(
+                self._rngs[profile.exchange],
+                n,
+                profile.volatility,
+                self._deviation[profile.exchange],
+                MEAN_REVERSION,
+            )
+            self._deviation[profile.exchange] = deviation[-1]
+            if profile.follows_market:
+                mids = [profile.base + m + d for m, d in zip(market, deviation)]
+            else:
+                mids = [profile.base + d for d in deviation]
+            columns.append((profile, [round(mid, 2) for mid in mids]))
+
+        source = self.source
+        return [
+            Tick(
+                profile.exchange,
+                round(mids[i] - profile.half_spread, 2),
+                round(mids[i] + profile.half_spread, 2),
+                mids[i],
+                timestamps[i],
+                source,
+            )
+            for i in range(n)
+            for profile, mids in columns
+        ]
+
+
+# ============================================
+# NDJSON Recording
+# ============================================
+
+def write_ticks_ndjson(path: str, batches: Iterable[list[Tick]]) -> int:
+    """Write ticks as NDJSON; returns the number of ticks written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        for batch in batches:
+            fh.writelines(
+                json.dumps({**tick._asdict(), "timestamp": tick.timestamp.isoformat()}) + "\n"
+                for tick in batch
+            )
+            count += len(batch)
+    return count
+
+
+def read_ticks_ndjson(path: str) -> Iterator[Tick]:
+    """Stream ticks from an NDJSON recording."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                doc = json.loads(line)
+                doc["timestamp"] = datetime.fromisoformat(doc["timestamp"])
+                yield Tick.from_document(doc)
+
+
+# ============================================
+# Replay
+# ============================================
+
+async def iter_snapshots(ticks: Iterable[Tick], speed: float = 1.0) -> AsyncIterator[list[Tick]]:
+    """
+    Group timestamp-ordered ticks into refresh snapshots, paced at `speed`x.
+
+    A speed of 0 (or less) replays as fast as possible. Pacing is scheduled
+    against the replay start, so slow consumers do not accumulate drift.
+    """
+    snapshot: list[Tick] = []
+    first_ts = None
+    started = monotonic()
+
+    for tick in ticks:
+        if snapshot and tick.timestamp != snapshot[0].timestamp:
+            yield snapshot
+            snapshot = []
+            if speed > 0:
+                offset = (tick.timestamp - first_ts).total_seconds() / speed
+                delay = started + offset - monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        if first_ts is None:
+            first_ts = tick.timestamp
+        snapshot.append(tick)
+
+    if snapshot:
+        yield snapshot
+
+
+async def replay_ticks(
+    ticks: Iterable[Tick],
+    on_snapshot: Callable[[list[Tick]], Awaitable[None]],
+    speed: float = 1.0,
+) -> int:
+    """Feed recorded ticks to `on_snapshot` one refresh at a time; returns snapshots replayed."""
+    count = 0
+    async for snapshot in iter_snapshots(ticks, speed):
+        await on_snapshot(snapshot)
+        count += 1
+    return count
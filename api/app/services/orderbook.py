@@ -0,0 +1,137 @@
+"""
+In-memory P2P order books with prefix sums.
+
+Each refresh replaces the books of an exchange. A side is stored as
+best-first parallel arrays of price, cumulative USDT and cumulative BOB,
+so the cost of filling any amount is one bisection plus one partial level.
+"""
+from bisect import bisect_left
+from datetime import datetime
+from time import monotonic
+from typing import Iterable, NamedTuple, Optional
+
+from app.config import DEFAULT_PAIR
+from app.models.ticks import BookLevel
+
+
+class Fill(NamedTuple):
+    """Result of walking one side of a book for an amount of USDT."""
+    filled: float  # USDT
+    cost: float  # BOB
+    average_price: float
+    worst_price: float
+    levels: int
+    complete: bool
+
+
+class BookSide:
+    """
+    One side of a book, best price first.
+
+    Capacity per ad is its available USDT capped by its maximum order; ads
+    whose minimum order exceeds that capacity cannot be filled and are
+    dropped when the side is built. The last, partial level of a fill may
+    be below that ad's minimum order.
+    """
+
+    __slots__ = ("prices", "cum_amount", "cum_cost")
+
+    def __init__(self, levels: Iterable[BookLevel], ascending: bool = True):
+        self.prices: list[float] = []
+        self.cum_amount: list[float] = []
+        self.cum_cost: list[float] = []
+        amount = cost = 0.0
+        for level in sorted(levels, key=lambda level: level.price, reverse=not ascending):
+            if level.price <= 0:
+                continue
+            capacity = level.available
+            if level.max_amount:
+                capacity = min(capacity, level.max_amount / level.price)
+            if capacity <= 0 or level.min_amount > capacity * level.price:
+                continue
+            amount += capacity
+            cost += capacity * level.price
+            self.prices.append(level.price)
+            self.cum_amount.append(amount)
+            self.cum_cost.append(cost)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def depth(self) -> float:
+        """Total fillable USDT."""
+        return self.cum_amount[-1] if self.cum_amount else 0.0
+
+    def quote(self, amount: float) -> Optional[Fill]:
+        """Fill `amount` USDT best-first in O(log n); a thin book fills what it can."""
+        if not self.prices or amount <= 0:
+            return None
+        i = bisect_left(self.cum_amount, amount)
+        if i >= len(self.prices):
+            cost = self.cum_cost[-1]
+            return Fill(self.depth, cost, cost / self.depth, self.prices[-1], len(self.prices), False)
+        prev_amount = self.cum_amount[i - 1] if i else 0.0
+        prev_cost = self.cum_cost[i - 1] if i else 0.0
+        cost = prev_cost + (amount - prev_amount) * self.prices[i]
+        return Fill(amount, cost, cost / amount, self.prices[i], i + 1, True)
+
+    def to_document(self) -> dict:
+        """Columnar form (price and per-level amount) for depth snapshots."""
+        cum = self.cum_amount
+        return {
+            "price": self.prices,
+            "amount": [round(cum[i] - (cum[i - 1] if i else 0.0), 4) for i in range(len(cum))],
+        }
+
+
+class OrderBooks:
+    """Latest asks/bids per exchange of one pair."""
+
+    def __init__(self, pair: str = DEFAULT_PAIR):
+        self.pair = pair
+        self._books: dict[str, tuple[BookSide, BookSide]] = {}
+        self.updated_at: dict[str, datetime] = {}
+        self._last_snapshot = 0.0
+
+    def update(self, exchange: str, asks: Iterable[BookLevel], bids: Iterable[BookLevel], timestamp: datetime) -> None:
+        asks_side = BookSide(asks, ascending=True)
+        bids_side = BookSide(bids, ascending=False)
+        if not asks_side and not bids_side:
+            return
+        self._books[exchange] = (asks_side, bids_side)
+        self.updated_at[exchange] = timestamp
+
+    def exchanges(self) -> list[str]:
+        return list(self._books)
+
+    def side(self, exchange: str, side: str) -> Optional[BookSide]:
+        """`side` is the user's: "buy" walks the asks, "sell" walks the bids."""
+        book = self._books.get(exchange)
+        if book is None:
+            return None
+        return book[0] if side == "buy" else book[1]
+
+    def quote(self, exchange: str, amount: float, side: str = "buy") -> Optional[Fill]:
+        book_side = self.side(exchange, side)
+        return book_side.quote(amount) if book_side is not None else None
+
+    def snapshot_due(self, interval: float) -> bool:
+        """True at most once per `interval` seconds (for low-cadence depth persistence)."""
+        now = monotonic()
+        if not self._books or now - self._last_snapshot < interval:
+            return False
+        self._last_snapshot = now
+        return True
+
+    def snapshot_documents(self) -> list[dict]:
+        return [
+            {
+                "exchange": exchange,
+                "pair": self.pair,
+                "timestamp": self.updated_at[exchange],
+                "asks": asks.to_document(),
+                "bids": bids.to_document(),
+            }
+            for exchange, (asks, bids) in self._books.items()
+        ]
@@ -0,0 +1,73 @@
+"""
+Warm restart state.
+
+On shutdown the last CurrentPricesResponse and the recent tick buffer are
+written to a local JSON file; on boot they are loaded back so the API can
+answer /prices/current and rebuild its in-memory analytics before the first
+upstream refresh (or MongoDB) completes.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.models.schemas import CurrentPricesResponse
+from app.models.ticks import Tick
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+def save_warm_state(path: str, response: CurrentPricesResponse, ticks: Iterable[Tick]) -> int:
+    """
+    Write the state atomically (temporary file + rename).
+    Returns the number of ticks saved.
+    """
+    ticks = list(ticks)
+    state = {
+        "version": VERSION,
+        "saved_at": datetime.utcnow().isoformat(),
+        "prices": response.model_dump(mode="json"),
+        # Columnar: one row per tick, fields in Tick order
+        "ticks": [
+            [tick.exchange, tick.bid, tick.ask, tick.last, tick.timestamp.isoformat(), tick.source, tick.pair]
+            for tick in ticks
+        ],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return len(ticks)
+
+
+def load_warm_state(path: str, max_age: float) -> Optional[tuple[CurrentPricesResponse, list[Tick]]]:
+    """
+    Load a saved state, or None when it is missing, unreadable or older than `max_age` seconds.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            state = json.load(fh)
+        if state.get("version") != VERSION:
+            return None
+        age = (datetime.utcnow() - datetime.fromisoformat(state["saved_at"])).total_seconds()
+        if age > max_age:
+            logger.info("Ignoring warm state from %s (%.0fs old)", path, age)
+            return None
+        response = CurrentPricesResponse.model_validate(state["prices"])
+        # Rows saved before multi-pair support have no pair (Tick defaults to DEFAULT_PAIR)
+        ticks = [
+            Tick(exchange, bid, ask, last, datetime.fromisoformat(timestamp), *rest)
+            for exchange, bid, ask, last, timestamp, *rest in state["ticks"]
+        ]
+        return response, ticks
+    except Exception as e:
+        logger.error("Failed to load warm state from %s: %s", path, e)
+        return None
@@ -0,0 +1,129 @@
+"""
+Bounded worker pool for CPU-bound work.
+
+History aggregation, indicator computation and response serialization can
+take hundreds of milliseconds on long ranges. Run on the event loop they
+stall the price refresh, the event bus consumers and every other request
+for that long; run on a worker thread, the loop keeps being scheduled
+between the interpreter's switch intervals.
+
+Threads rather than processes: the inputs are lists of Tick tuples whose
+pickling would cost about as much as the aggregation itself. The pool is
+bounded twice: `workers` threads run jobs and at most `max_queue` more wait
+for one; beyond that `run()` raises WorkerPoolFull (answered with 503)
+instead of queueing without limit. Jobs smaller than `min_items` run
+inline, where a thread hand-off would cost more than it saves.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable
+
+from app.utils.metrics import WORKER_POOL_ACTIVE, WORKER_POOL_JOBS, WORKER_POOL_QUEUE_DEPTH, WORKER_POOL_WAIT_SECONDS
+
+
+class WorkerPoolFull(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class WorkerPool:
+    """Thread pool with a bounded wait queue and queue-depth metrics."""
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, min_items: int = 5000, name: str = "cpu"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.min_items = min_items
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+        # Counts are updated from the loop and the workers under the lock; metrics are
+        # not thread-safe, so workers hand their updates to the loop (see _on_loop)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._queue_depth = WORKER_POOL_QUEUE_DEPTH.labels(name)
+        self._active_gauge = WORKER_POOL_ACTIVE.labels(name)
+        self._wait_seconds = WORKER_POOL_WAIT_SECONDS.labels(name)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def run(self, fn: Callable[..., Any], *args, size: int = -1, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on a worker thread and return its result.
+        `size` (e.g. the number of ticks to aggregate) below min_items runs it inline;
+        the default always offloads.
+        """
+        if 0 <= size < self.min_items:
+            WORKER_POOL_JOBS.labels(self.name, "inline").inc()
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            if self._queued + self._active >= self.workers + self.max_queue:
+                WORKER_POOL_JOBS.labels(self.name, "rejected").inc()
+                raise WorkerPoolFull(f"Worker pool '{self.name}' is full")
+            self._queued += 1
+            self._publish()
+
+        # Copy the context so profiling spans opened on the worker reach the request's timings
+        context = contextvars.copy_context()
+        state = {"started": False, "abandoned": False}
+        loop = asyncio.get_running_loop()
+        job = partial(self._job, loop, state, context, perf_counter(), fn, args, kwargs)
+        try:
+            result = await loop.run_in_executor(self._executor, job)
+        except asyncio.CancelledError:
+            # The caller went away; a job still waiting is dropped (a running one finishes)
+            with self._lock:
+                if not state["started"]:
+                    state["abandoned"] = True
+                    self._queued -= 1
+                    self._publish()
+            raise
+        except Exception:
+            WORKER_POOL_JOBS.labels(self.name, "error").inc()
+            raise
+        WORKER_POOL_JOBS.labels(self.name, "done").inc()
+        return result
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _job(
+        self, loop: asyncio.AbstractEventLoop, state: dict, context: contextvars.Context,
+        submitted: float, fn, args, kwargs,
+    ):
+        with self._lock:
+            if state["abandoned"]:
+                return None
+            state["started"] = True
+            self._queued -= 1
+            self._active += 1
+        self._on_loop(loop, self._wait_seconds.observe, perf_counter() - submitted)
+        self._on_loop(loop, self._publish)
+        try:
+            return context.run(fn, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._on_loop(loop, self._publish)
+
+    @staticmethod
+    def _on_loop(loop: asyncio.AbstractEventLoop, callback: Callable, *args) -> None:
+        """Run a metrics update on the loop thread (dropped once the loop is closed)."""
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass
+
+    def _publish(self) -> None:
+        """Set the gauges to the current counts. Loop thread only."""
+        self._queue_depth.set(self._queued)
+        self._active_gauge.set(self._active)
@@ -0,0 +1,89 @@
+"""
+Shape-preserving downsampling for chart-sized series.
+
+Both algorithms return the indices of the points to keep (always
+including the first and last point), so callers can apply them to any
+per-point structure.
+"""
+
+
+def lttb_indices(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """
+    Largest-Triangle-Three-Buckets.
+
+    Splits the series into `threshold - 2` buckets and keeps, from each,
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket. Keeps peaks and troughs that a
+    plain stride would drop. Below 3 points only the endpoints are kept.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return sorted({0, n - 1})
+
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket (the third triangle vertex)
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        span = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / span
+        avg_y = sum(ys[avg_start:avg_end]) / span
+
+        # Candidate points in the current bucket
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        dx, dy = ax - avg_x, avg_y - ay
+
+        best, best_area = range_start, -1.0
+        for j in range(range_start, range_end):
+            area = abs(dx * (ys[j] - ay) + (xs[j] - ax) * dy)
+            if area > best_area:
+                best, best_area = j, area
+
+        kept.append(best)
+        a = best
+
+    kept.append(n - 1)
+    return kept
+
+
+def minmax_indices(ys: list[float], threshold: int) -> list[int]:
+    """
+    Min/max per bucket.
+
+    Splits the series into `threshold // 2` buckets and keeps the minimum
+    and maximum point of each (in time order), so no extreme is lost.
+    Below 4 points there is no room for a pair: the endpoints are kept,
+    with the point farthest from their midpoint when there is room for it.
+    """
+    n = len(ys)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return sorted({0, n - 1})
+    if threshold == 3:
+        mid = (ys[0] + ys[-1]) / 2
+        return [0, max(range(1, n - 1), key=lambda i: abs(ys[i] - mid)), n - 1]
+
+    buckets = (threshold - 2) // 2
+    every = (n - 2) / buckets
+    kept = [0]
+
+    for i in range(buckets):
+        start = int(i * every) + 1
+        end = min(int((i + 1) * every) + 1, n - 1)
+        if start >= end:
+            continue
+        window = range(start, end)
+        low = min(window, key=ys.__getitem__)
+        high = max(window, key=ys.__getitem__)
+        kept.extend(sorted({low, high}))
+
+    kept.append(n - 1)
+    return kept
@@ -0,0 +1,143 @@
+"""
+Compact wire formats for price history.
+
+Besides the default JSON object-per-point, history can be served as:
+
+- columnar JSON: parallel arrays per field with epoch-millisecond timestamps
+- MessagePack: the same columnar document, binary encoded (needs `msgpack`)
+- Arrow IPC stream: one record batch, zero-copy readable by JS/pandas (needs `pyarrow`)
+
+The format is picked from `?format=` or the Accept header. Encoders work on
+`HistorySeries` directly, so no Pydantic models are built for these formats.
+"""
+import json
+from calendar import timegm
+from typing import Optional
+
+from app.models.ticks import HistorySeries
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:  # optional dependency
+    pyarrow = None
+
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.dollartracker.columnar+json"
+MSGPACK = "application/x-msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# ?format= values
+HISTORY_FORMATS = {
+    "json": JSON,
+    "columnar": COLUMNAR_JSON,
+    "msgpack": MSGPACK,
+    "arrow": ARROW,
+}
+
+# Accept header media types (including common aliases)
+_ACCEPTED = {
+    JSON: JSON,
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    MSGPACK: MSGPACK,
+    "application/msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    ARROW: ARROW,
+    "application/vnd.apache.arrow.file": ARROW,
+}
+
+
+class FormatUnavailable(Exception):
+    """The requested format needs an optional dependency that is not installed."""
+
+
+def negotiate_history_format(fmt: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """
+    Pick the response media type.
+
+    An explicit `format` wins; otherwise the highest-q supported type in
+    Accept is used. Returns JSON when nothing specific is asked for and
+    None when Accept only lists unsupported types.
+    """
+    if fmt:
+        return HISTORY_FORMATS.get(fmt)
+    if not accept:
+        return JSON
+
+    best, best_q = None, 0.0
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in ("*/*", "application/*"):
+            candidate = JSON
+        else:
+            candidate = _ACCEPTED.get(media_type)
+        # Ties keep the earlier entry
+        if candidate and q > best_q:
+            best, best_q = candidate, q
+    return best
+
+
+def history_columns(series: HistorySeries) -> dict:
+    """Columnar document: one array per field, timestamps as epoch milliseconds (UTC)."""
+    points = series.points
+    return {
+        "exchange": series.exchange,
+        "interval": series.interval,
+        "timestamp": [timegm(p.timestamp.utctimetuple()) * 1000 + p.timestamp.microsecond // 1000 for p in points],
+        "open": [p.open for p in points],
+        "high": [p.high for p in points],
+        "low": [p.low for p in points],
+        "close": [p.close for p in points],
+        "reference_close": [p.reference_close for p in points],
+        "summary": series.summary.model_dump(),
+    }
+
+
+def encode_history(series: HistorySeries, media_type: str) -> bytes:
+    """Encode a history series in a non-default format."""
+    if media_type == COLUMNAR_JSON:
+        return json.dumps(history_columns(series), separators=(",", ":")).encode()
+    if media_type == MSGPACK:
+        if msgpack is None:
+            raise FormatUnavailable("MessagePack output requires the 'msgpack' package")
+        return msgpack.packb(history_columns(series))
+    if media_type == ARROW:
+        if pyarrow is None:
+            raise FormatUnavailable("Arrow output requires the 'pyarrow' package")
+        return _encode_arrow(series)
+    raise ValueError(f"Unsupported history format: {media_type}")
+
+
+def _encode_arrow(series: HistorySeries) -> bytes:
+    columns = history_columns(series)
+    summary = columns.pop("summary")
+    metadata = {
+        "exchange": columns.pop("exchange"),
+        "interval": columns.pop("interval"),
+        "summary": json.dumps(summary),
+    }
+    table = pyarrow.table(
+        {
+            "timestamp": pyarrow.array(columns.pop("timestamp"), type=pyarrow.timestamp("ms", tz="UTC")),
+            **{name: pyarrow.array(values, type=pyarrow.float64()) for name, values in columns.items()},
+        },
+        metadata=metadata,
+    )
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
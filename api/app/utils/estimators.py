@@ -0,0 +1,63 @@
+"""
+Robust price estimators over P2P order books.
+
+A single aggressive ad moves a plain top-N average; these estimators
+weight ads by the liquidity behind them or discard the tails instead.
+Books are a few dozen levels, so each estimator is one sort and one pass.
+"""
+from typing import Iterable, Optional
+
+from app.models.ticks import BookLevel
+
+
+def weighted_median(levels: Iterable[BookLevel]) -> float:
+    """Price at which half of the advertised volume is cheaper and half dearer."""
+    ordered = sorted((level for level in levels if level.price > 0), key=lambda level: level.price)
+    if not ordered:
+        return 0.0
+    total = sum(level.available for level in ordered)
+    if total <= 0:
+        return ordered[len(ordered) // 2].price
+    half = total / 2
+    cumulative = 0.0
+    for level in ordered:
+        cumulative += level.available
+        if cumulative >= half:
+            return level.price
+    return ordered[-1].price
+
+
+def trimmed_mean(levels: Iterable[BookLevel], proportion: float = 0.2) -> float:
+    """Mean price after dropping `proportion` of the ads at each end."""
+    prices = sorted(level.price for level in levels if level.price > 0)
+    if not prices:
+        return 0.0
+    cut = int(len(prices) * proportion)
+    kept = prices[cut:len(prices) - cut] or prices
+    return sum(kept) / len(kept)
+
+
+def depth_price(levels: Iterable[BookLevel], amount: float, ascending: bool = True) -> Optional[float]:
+    """
+    Average price to fill `amount` USDT walking the book best-first.
+
+    `ascending` walks cheapest first (buying from asks); use False for bids.
+    Ads whose minimum order exceeds what is left to fill are skipped and
+    fills are capped by each ad's maximum order. If the book is too thin,
+    the average over everything fillable is returned; None if nothing is.
+    """
+    ordered = sorted(levels, key=lambda level: level.price, reverse=not ascending)
+    remaining = amount
+    filled = cost = 0.0
+    for level in ordered:
+        if remaining <= 0:
+            break
+        if level.price <= 0 or level.min_amount > remaining * level.price:
+            continue
+        take = min(remaining, level.available)
+        if level.max_amount:
+            take = min(take, level.max_amount / level.price)
+        filled += take
+        cost += take * level.price
+        remaining -= take
+    return cost / filled if filled else None
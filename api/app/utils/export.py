@@ -0,0 +1,173 @@
+"""
+Streaming bulk export of ticks and spread rollups.
+
+Rows arrive in batches from a database cursor and each batch is encoded
+and handed on before the next is read, so memory use is bounded by one
+batch whatever the exported range:
+
+- NDJSON: one JSON object per row
+- CSV: header line, then one line per row
+- Parquet: one row group per batch (needs `pyarrow`)
+
+Timestamps are naive UTC, written as ISO 8601 in the text formats.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+
+from app.models.ticks import EXCHANGE_NAMES
+from app.utils.encoding import FormatUnavailable
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_PREMIUM_EXCHANGES = [exchange for exchange in EXCHANGE_NAMES if exchange != "bcb"]
+
+# (column, type) in row order; ticks are exported as Tick tuples
+TICK_SCHEMA = (
+    ("exchange", "string"),
+    ("bid", "float64"),
+    ("ask", "float64"),
+    ("last", "float64"),
+    ("timestamp", "timestamp"),
+    ("source", "string"),
+    ("pair", "string"),
+)
+
+ROLLUP_SCHEMA = (
+    ("timestamp", "timestamp"),
+    ("samples", "int64"),
+    ("best_spread_percent_avg", "float64"),
+    ("best_spread_percent_max", "float64"),
+    ("reference", "float64"),
+    ("best_buy_exchange", "string"),
+    ("best_sell_exchange", "string"),
+    *((f"premium_{exchange}", "float64") for exchange in _PREMIUM_EXCHANGES),
+)
+
+
+def rollup_row(doc: dict) -> tuple:
+    """Flatten a spread rollup document into ROLLUP_SCHEMA order."""
+    route = doc.get("best_route") or {}
+    premiums = doc.get("premiums") or {}
+    return (
+        doc["timestamp"],
+        doc.get("samples"),
+        doc.get("best_spread_percent_avg"),
+        doc.get("best_spread_percent_max"),
+        doc.get("reference"),
+        route.get("buy_exchange"),
+        route.get("sell_exchange"),
+        *(premiums.get(exchange) for exchange in _PREMIUM_EXCHANGES),
+    )
+
+
+async def rollup_batches(batches: AsyncIterator[list[dict]]) -> AsyncIterator[list[tuple]]:
+    """Flatten batches of rollup documents into rows."""
+    async for batch in batches:
+        yield [rollup_row(doc) for doc in batch]
+
+
+def _text_rows(rows: Iterable[tuple], timestamp_index: int):
+    for row in rows:
+        row = list(row)
+        value = row[timestamp_index]
+        if isinstance(value, datetime):
+            row[timestamp_index] = value.isoformat()
+        yield row
+
+
+async def encode_export(
+    batches: AsyncIterator[list[tuple]],
+    schema: tuple,
+    fmt: str,
+) -> AsyncIterator[bytes]:
+    """Encode row batches (tuples in `schema` order) into chunks of the export format."""
+    if fmt == "parquet":
+        async for chunk in _encode_parquet(batches, schema):
+            yield chunk
+        return
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    columns = tuple(name for name, _ in schema)
+    timestamp_index = columns.index("timestamp")
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        async for batch in batches:
+            writer.writerows(_text_rows(batch, timestamp_index))
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n"
+            for row in _text_rows(batch, timestamp_index)
+        ).encode()
+
+
+def check_export_format(fmt: str) -> Optional[str]:
+    """Media type for `fmt`; raises FormatUnavailable when its optional package is missing."""
+    media_type = EXPORT_FORMATS.get(fmt)
+    if fmt == "parquet" and pyarrow is None:
+        raise FormatUnavailable("Parquet export requires the 'pyarrow' package")
+    return media_type
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Parquet writer emits until drained."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def _encode_parquet(batches: AsyncIterator[list[tuple]], schema: tuple) -> AsyncIterator[bytes]:
+    if pyarrow is None:
+        raise FormatUnavailable("Parquet export requires the 'pyarrow' package")
+    arrow_schema = pyarrow.schema([
+        (name, pyarrow.timestamp("ms") if kind == "timestamp" else getattr(pyarrow, kind)())
+        for name, kind in schema
+    ])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, arrow_schema, compression="zstd")
+    async for batch in batches:
+        writer.write_table(pyarrow.Table.from_pylist(
+            [dict(zip(arrow_schema.names, row)) for row in batch], schema=arrow_schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
@@ -1,4 +1,6 @@
 """Utility helper functions."""
+from datetime import datetime, timezone
+from typing import Optional
 
 
 def format_currency(value: float, decimals: int = 2) -> str:
@@ -19,3 +21,10 @@ def format_volume(value: float) -> str:
     if value >= 1_000:
         return f"${value / 1_000:.1f}K"
     return f"${value:.0f}"
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; convert offset-aware values."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
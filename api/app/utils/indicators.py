@@ -0,0 +1,102 @@
+"""
+Technical indicators over bucketed close series.
+
+Every indicator is computed in a fixed number of whole-series passes
+(prefix sums and `itertools.accumulate`, both in C) instead of a Python
+loop over a window per point: O(n) whatever the period. Outputs are
+aligned with the input; points before the first full window are None.
+"""
+from itertools import accumulate
+from math import sqrt
+from operator import sub
+from typing import Optional
+
+# Indicator -> default parameters
+INDICATORS = {
+    "sma": {"period": 20},
+    "ema": {"period": 20},
+    "bollinger": {"period": 20, "k": 2.0},
+    "rsi": {"period": 14},
+}
+
+_DIGITS = 4
+
+
+def _window_sums(values: list[float], period: int) -> list[float]:
+    """Sum of each full window of `period` values (len(values) - period + 1 of them)."""
+    sums = list(accumulate(values, initial=0.0))
+    return list(map(sub, sums[period:], sums))
+
+
+def _pad(values: list[float], length: int) -> list[Optional[float]]:
+    """Round and left-pad with None to `length`."""
+    return [None] * (length - len(values)) + [round(value, _DIGITS) for value in values]
+
+
+def sma(values: list[float], period: int) -> list[Optional[float]]:
+    """Simple moving average."""
+    if period < 1 or len(values) < period:
+        return [None] * len(values)
+    return _pad([total / period for total in _window_sums(values, period)], len(values))
+
+
+def ema(values: list[float], period: int) -> list[Optional[float]]:
+    """Exponential moving average (alpha = 2 / (period + 1)), seeded with the first window's SMA."""
+    if period < 1 or len(values) < period:
+        return [None] * len(values)
+    alpha = 2 / (period + 1)
+    seed = sum(values[:period]) / period
+    smoothed = accumulate(values[period:], lambda prev, value: prev + alpha * (value - prev), initial=seed)
+    return _pad(list(smoothed), len(values))
+
+
+def bollinger(values: list[float], period: int, k: float = 2.0) -> dict[str, list[Optional[float]]]:
+    """Bollinger bands: SMA middle band, +/- k population standard deviations."""
+    if period < 1 or len(values) < period:
+        empty = [None] * len(values)
+        return {"middle": empty, "upper": list(empty), "lower": list(empty)}
+    means = [total / period for total in _window_sums(values, period)]
+    squares = _window_sums([value * value for value in values], period)
+    # max(): rounding can leave a flat window's variance slightly negative
+    widths = [k * sqrt(max(square / period - mean * mean, 0.0)) for square, mean in zip(squares, means)]
+    return {
+        "middle": _pad(means, len(values)),
+        "upper": _pad([mean + width for mean, width in zip(means, widths)], len(values)),
+        "lower": _pad([mean - width for mean, width in zip(means, widths)], len(values)),
+    }
+
+
+def rsi(values: list[float], period: int = 14) -> list[Optional[float]]:
+    """Relative strength index with Wilder's smoothing (0-100; 50 when the window is flat)."""
+    if period < 1 or len(values) <= period:
+        return [None] * len(values)
+    deltas = list(map(sub, values[1:], values))
+    gains = [delta if delta > 0 else 0.0 for delta in deltas]
+    losses = [-delta if delta < 0 else 0.0 for delta in deltas]
+
+    def wilder(series: list[float]) -> list[float]:
+        seed = sum(series[:period]) / period
+        return list(accumulate(
+            series[period:], lambda prev, value: (prev * (period - 1) + value) / period, initial=seed
+        ))
+
+    strength = []
+    for gain, loss in zip(wilder(gains), wilder(losses)):
+        if loss:
+            strength.append(100 - 100 / (1 + gain / loss))
+        else:
+            strength.append(100.0 if gain else 50.0)
+    return _pad(strength, len(values))
+
+
+def compute_indicator(name: str, values: list[float], params: dict) -> dict[str, list[Optional[float]]]:
+    """Named output series of one indicator ({"value": ...} or the three Bollinger bands)."""
+    if name == "sma":
+        return {"value": sma(values, params["period"])}
+    if name == "ema":
+        return {"value": ema(values, params["period"])}
+    if name == "bollinger":
+        return bollinger(values, params["period"], params["k"])
+    if name == "rsi":
+        return {"value": rsi(values, params["period"])}
+    raise ValueError(f"Unknown indicator: {name}")
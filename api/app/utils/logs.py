@@ -0,0 +1,163 @@
+"""
+Structured, rate-limited, non-blocking logging setup.
+
+Records are rate limited per message key in the calling thread (a dict
+lookup), then handed to a queue. Formatting (including %-style argument
+interpolation) and stream I/O happen in a background listener thread, so
+the event loop never blocks on log output.
+"""
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Attributes present on every LogRecord; anything else came from `extra=`
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def level_number(name: str) -> int:
+    """Numeric value of a level name ("error" -> 40). Raises ValueError for unknown names."""
+    level = logging.getLevelName(name.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {name!r}")
+    return level
+
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Allow at most `burst` records per message key every `window` seconds.
+
+    The key is `extra={"log_key": ...}` when given, otherwise the logger
+    name plus the unformatted message template, so every call site is
+    limited independently. The number of dropped records is attached to
+    the next record that gets through as `suppressed`. Records at
+    `exempt_level` or above (ERROR by default) are never dropped.
+    """
+
+    def __init__(self, burst: int = 10, window: float = 60.0, exempt_level: int = logging.ERROR):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.exempt_level = exempt_level
+        # key -> [window_start, emitted_in_window, suppressed]
+        self._state: dict = {}
+        self._next_prune = 0.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno >= self.exempt_level:
+            return True
+
+        key = getattr(record, "log_key", None) or (record.name, record.msg)
+        now = record.created
+        if now >= self._next_prune:
+            self._prune(now)
+        state = self._state.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._state[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+
+        state[2] += 1
+        return False
+
+    def _prune(self, now: float) -> None:
+        """Drop keys not seen for two windows (checked once per window), so one-off keys do not pile up."""
+        cutoff = now - 2 * self.window
+        self._state = {key: state for key, state in self._state.items() if state[0] > cutoff}
+        self._next_prune = now + self.window
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that defers message formatting to the listener thread.
+
+    The stdlib QueueHandler formats every record before enqueueing it,
+    which puts the formatting cost back on the caller.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+    level: str = "INFO", fmt: str = "json", burst: int = 10, window: float = 60.0, exempt_level: str = "ERROR"
+) -> None:
+    """
+    Install the queue-backed root handler.
+
+    Safe to call more than once; the previous listener is stopped first.
+    Raises ValueError for an unknown `exempt_level`.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler()
+    if fmt == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(burst=burst, window=window, exempt_level=level_number(exempt_level)))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DeferredQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the listener thread and detach the handler."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DeferredQueueHandler):
+            root.removeHandler(handler)
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,314 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Metrics are plain Python objects updated only from the event loop thread,
+so updates are simple attribute/list increments without locks. Code on
+other threads (the CPU worker pool) must hand its updates to the loop with
+`loop.call_soon_threadsafe`. Histogram buckets are allocated once per label
+set and observations use a binary search over the (fixed) bucket bounds.
+"""
+from bisect import bisect_left
+from time import perf_counter
+from typing import Iterable, Optional
+
+# Latency buckets in seconds, tuned for HTTP calls and Mongo operations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Timer:
+    """Context manager that observes elapsed seconds into a histogram child."""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(perf_counter() - self._start)
+        return False
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        # One slot per bucket plus the implicit +Inf bucket
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class _Metric:
+    """Base class for labelled metric families."""
+
+    kind = ""
+    child_class = None
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Optional["Registry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict = {}
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values: str):
+        """Return (creating once) the child for the given label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._new_child()
+            self._children[values] = child
+        return child
+
+    def _new_child(self):
+        return self.child_class()
+
+    def _default(self):
+        return self.labels()
+
+    def collect(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, child in self._children.items():
+            lines.extend(self._sample_lines(values, child))
+        return lines
+
+    def _sample_lines(self, values: tuple, child) -> list[str]:
+        labels = _format_labels(self.labelnames, values)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    child_class = _GaugeChild
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Optional[Iterable[float]] = None,
+        registry: Optional["Registry"] = None,
+    ):
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+    def _sample_lines(self, values: tuple, child: _HistogramChild) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered by the /metrics endpoint."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ============================================
+# Application Metrics
+# ============================================
+
+SOURCE_FETCH_SECONDS = Histogram(
+    "dollar_tracker_source_fetch_seconds",
+    "Latency of upstream price source requests.",
+    ["source"],
+)
+SOURCE_FETCH_ERRORS = Counter(
+    "dollar_tracker_source_fetch_errors_total",
+    "Upstream price source requests that failed.",
+    ["source"],
+)
+REFRESH_SECONDS = Histogram(
+    "dollar_tracker_refresh_seconds",
+    "Duration of a full current prices refresh across all sources.",
+)
+CACHE_REQUESTS = Counter(
+    "dollar_tracker_cache_requests_total",
+    "In-memory cache lookups by result.",
+    ["cache", "result"],
+)
+MONGO_OPERATION_SECONDS = Histogram(
+    "dollar_tracker_mongo_operation_seconds",
+    "Latency of MongoDB operations issued by the price history service.",
+    ["operation"],
+)
+EVENT_DELIVERIES = Counter(
+    "dollar_tracker_event_deliveries_total",
+    "Internal event bus deliveries by subscriber and result (queued or dropped).",
+    ["subscriber", "result"],
+)
+EVENT_QUEUE_DEPTH = Gauge(
+    "dollar_tracker_event_queue_depth",
+    "Events waiting in each internal event bus subscriber queue.",
+    ["subscriber"],
+)
+EVENT_PUBLISH_WAIT_SECONDS = Histogram(
+    "dollar_tracker_event_publish_wait_seconds",
+    "Time a publisher waited on a full blocking subscriber (back-pressure).",
+    ["subscriber"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+WORKER_POOL_JOBS = Counter(
+    "dollar_tracker_worker_pool_jobs_total",
+    "CPU-bound jobs by pool and result (done, error, rejected, or inline when too small to offload).",
+    ["pool", "result"],
+)
+WORKER_POOL_QUEUE_DEPTH = Gauge(
+    "dollar_tracker_worker_pool_queue_depth",
+    "Jobs waiting for a free worker thread.",
+    ["pool"],
+)
+WORKER_POOL_ACTIVE = Gauge(
+    "dollar_tracker_worker_pool_active",
+    "Jobs running on worker threads.",
+    ["pool"],
+)
+WORKER_POOL_WAIT_SECONDS = Histogram(
+    "dollar_tracker_worker_pool_wait_seconds",
+    "Time a job waited for a free worker thread.",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "dollar_tracker_http_request_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+)
+HTTP_REQUESTS = Counter(
+    "dollar_tracker_http_requests_total",
+    "HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+ALERTS_TRIGGERED = Counter(
+    "dollar_tracker_alerts_triggered_total",
+    "Alerts triggered by kind.",
+    ["kind"],
+)
+ALERT_DELIVERIES = Counter(
+    "dollar_tracker_alert_deliveries_total",
+    "Alert deliveries by channel and result.",
+    ["channel", "result"],
+)
@@ -0,0 +1,221 @@
+"""
+Runtime-toggled profiling: event loop sampling and Server-Timing spans.
+
+Both are off by default and enabled for a bounded duration through the
+admin endpoints. While disabled, `span()` costs a single ContextVar lookup
+and no sampler thread exists.
+"""
+import functools
+import sys
+import threading
+from collections import Counter as FrequencyCounter
+from contextlib import nullcontext
+from contextvars import ContextVar
+from time import monotonic, perf_counter, sleep
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+# ============================================
+# Sampling Profiler
+# ============================================
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of a single thread (the event loop thread).
+
+    A daemon thread snapshots the target thread's stack every `interval`
+    seconds and counts identical stacks. Output uses the folded-stack
+    format understood by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: FrequencyCounter = FrequencyCounter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self.interval = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, interval: float = 0.005, thread_id: Optional[int] = None) -> bool:
+        """Start a session; returns False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            target = thread_id or threading.get_ident()
+            self._stacks = FrequencyCounter()
+            self.samples = 0
+            self.started_at = monotonic()
+            self.duration = duration
+            self.interval = interval
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(target, duration, interval), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Collected stacks as `frame;frame;frame count` lines."""
+        stacks = list(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+    def _run(self, target: int, duration: float, interval: float) -> None:
+        deadline = monotonic() + duration
+        while not self._stop.is_set() and monotonic() < deadline:
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                break
+            self._stacks[self._fold(frame)] += 1
+            self.samples += 1
+            del frame
+            sleep(interval)
+
+    @staticmethod
+    def _fold(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+
+profiler = SamplingProfiler()
+
+
+# ============================================
+# Server-Timing
+# ============================================
+
+# Per-request span totals in milliseconds; None when timing is disabled
+_timings: ContextVar[Optional[dict]] = ContextVar("server_timings", default=None)
+_NOOP = nullcontext()
+
+# monotonic() deadline until which Server-Timing is collected
+_server_timing_until = 0.0
+
+
+def enable_server_timing(duration: float) -> None:
+    global _server_timing_until
+    _server_timing_until = monotonic() + duration
+
+
+def disable_server_timing() -> None:
+    global _server_timing_until
+    _server_timing_until = 0.0
+
+
+def server_timing_remaining() -> float:
+    return max(0.0, _server_timing_until - monotonic())
+
+
+class _Span:
+    __slots__ = ("_timings", "_name", "_start")
+
+    def __init__(self, timings: dict, name: str):
+        self._timings = timings
+        self._name = name
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = (perf_counter() - self._start) * 1000
+        self._timings[self._name] = self._timings.get(self._name, 0.0) + elapsed
+        return False
+
+
+def span(name: str):
+    """Time a block into the current request's Server-Timing (no-op when disabled)."""
+    timings = _timings.get()
+    if timings is None:
+        return _NOOP
+    return _Span(timings, name)
+
+
+def format_server_timing(timings: dict) -> str:
+    return ", ".join(
+        f"{name};dur={duration:.2f}" for name, duration in timings.items() if not name.startswith("_")
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    Attach a Server-Timing header with per-request span totals.
+
+    Only active while enabled via the admin endpoint; otherwise requests
+    pass straight through after one float comparison.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _server_timing_until <= monotonic():
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict = {}
+        token = _timings.set(timings)
+        start = perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                now = perf_counter()
+                handler_end = timings.pop("_handler_end", None)
+                if handler_end is not None:
+                    timings["serialize"] = (now - handler_end) * 1000
+                timings["total"] = (now - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+
+
+class TimedRoute(APIRoute):
+    """
+    Route class that records endpoint time as the `handler` span.
+
+    The gap between the endpoint returning and the response starting is
+    FastAPI's response validation and serialization, reported as `serialize`.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+def _timed_endpoint(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timings = _timings.get()
+        if timings is None:
+            return await endpoint(*args, **kwargs)
+        start = perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            end = perf_counter()
+            timings["handler"] = (end - start) * 1000
+            timings["_handler_end"] = end
+
+    return wrapper
@@ -0,0 +1,278 @@
+"""
+Compressed tick blocks (Gorilla-style).
+
+A block holds the ticks of one exchange (and one pair, kept by the caller)
+as columns:
+
+- timestamp: epoch microseconds, stored as delta-of-delta (a steady 5 s
+  refresh cadence becomes a run of near-zero values)
+- bid/ask/last: fixed-point integers (2, 4 or 6 decimals, the smallest that
+  round-trips every value exactly) stored as deltas; columns that do not
+  fit fall back to raw float64, so encoding is always lossless
+- source: run-length encoded
+
+Integer columns are packed at the narrowest byte width (1, 2, 4 or 8) that
+fits the block and the whole block is zlib-compressed. Decoding is
+vectorized over the stdlib: `array.frombytes` unpacks a column and
+`itertools.accumulate` integrates it, both in C, with no per-value Python
+loop until Tick objects are built.
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import accumulate, chain, islice, repeat
+from typing import Iterable, Iterator, Optional
+
+from app.config import DEFAULT_PAIR
+from app.models.ticks import Tick
+
+MAGIC = b"TB1"
+_EPOCH = datetime(1970, 1, 1)
+_SWAP = sys.byteorder != "little"
+
+# Signed array typecodes by byte width
+_TYPECODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+_LIMITS = [(1, 1 << 7), (2, 1 << 15), (4, 1 << 31), (8, 1 << 63)]
+
+# Fixed-point exponents tried for price columns; RAW stores float64
+_SCALES = (2, 4, 6)
+_RAW = 0xFF
+
+_HEADER = struct.Struct("<3sIB")  # magic, count, exchange length
+_INT_HEADER = struct.Struct("<Bqq")  # width, first value, first delta
+
+
+def epoch_us(ts: datetime) -> int:
+    return (ts - _EPOCH) // timedelta(microseconds=1)
+
+
+# ============================================
+# Integer columns
+# ============================================
+
+def _width(values) -> int:
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for width, limit in _LIMITS:
+        if -limit <= low and high < limit:
+            return width
+    raise OverflowError("Value does not fit in 64 bits")
+
+
+def _pack(values: list[int], width: int) -> bytes:
+    packed = array(_TYPECODES[width], values)
+    if _SWAP:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(data: memoryview, width: int) -> array:
+    values = array(_TYPECODES[width])
+    values.frombytes(data)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def _encode_ints(values: list[int], order: int) -> bytes:
+    """Store `values` as order-1 (delta) or order-2 (delta-of-delta) differences."""
+    first = values[0] if values else 0
+    deltas = [b - a for a, b in zip(values, values[1:])]
+    first_delta = 0
+    if order == 2:
+        first_delta = deltas[0] if deltas else 0
+        deltas = [b - a for a, b in zip(deltas, deltas[1:])]
+    width = _width(deltas)
+    return _INT_HEADER.pack(width, first, first_delta) + _pack(deltas, width)
+
+
+def _decode_ints(data: memoryview, offset: int, count: int, order: int) -> tuple[list[int], int]:
+    width, first, first_delta = _INT_HEADER.unpack_from(data, offset)
+    offset += _INT_HEADER.size
+    stored = max(0, count - order)
+    end = offset + stored * width
+    diffs = _unpack(data[offset:end], width)
+    if count == 0:
+        return [], end
+    if order == 2:
+        if count == 1:
+            return [first], end
+        diffs = accumulate(chain((first_delta,), diffs))
+    return list(accumulate(chain((first,), diffs))), end
+
+
+# ============================================
+# Price columns
+# ============================================
+
+def _encode_prices(values: list[float]) -> bytes:
+    for exponent in _SCALES:
+        scale = 10 ** exponent
+        try:
+            scaled = [round(value * scale) for value in values]
+        except (ValueError, OverflowError):  # NaN or infinity
+            break
+        if all(q / scale == value for q, value in zip(scaled, values)):
+            try:
+                return bytes((exponent,)) + _encode_ints(scaled, order=1)
+            except OverflowError:
+                break
+    raw = array("d", values)
+    if _SWAP:
+        raw.byteswap()
+    return bytes((_RAW,)) + raw.tobytes()
+
+
+def _decode_prices(data: memoryview, offset: int, count: int) -> tuple[list[float], int]:
+    exponent = data[offset]
+    offset += 1
+    if exponent == _RAW:
+        end = offset + 8 * count
+        values = array("d")
+        values.frombytes(data[offset:end])
+        if _SWAP:
+            values.byteswap()
+        return values.tolist(), end
+    scaled, end = _decode_ints(data, offset, count, order=1)
+    scale = 10 ** exponent
+    return [q / scale for q in scaled], end
+
+
+# ============================================
+# Blocks
+# ============================================
+
+def encode_block(ticks: list[Tick]) -> bytes:
+    """Encode the ticks of one exchange (timestamp order) as a compressed block."""
+    exchange = ticks[0].exchange.encode() if ticks else b""
+    runs: list[list] = []
+    for tick in ticks:
+        if runs and runs[-1][0] == tick.source:
+            runs[-1][1] += 1
+        else:
+            runs.append([tick.source, 1])
+    sources = json.dumps(runs, separators=(",", ":")).encode()
+    body = b"".join((
+        _HEADER.pack(MAGIC, len(ticks), len(exchange)),
+        exchange,
+        _encode_ints([epoch_us(tick.timestamp) for tick in ticks], order=2),
+        _encode_prices([tick.bid for tick in ticks]),
+        _encode_prices([tick.ask for tick in ticks]),
+        _encode_prices([tick.last for tick in ticks]),
+        struct.pack("<I", len(sources)),
+        sources,
+    ))
+    return zlib.compress(body, 6)
+
+
+def decode_columns(block: bytes) -> dict:
+    """
+    Decode a block into columns (timestamps as epoch microseconds), without
+    building Tick objects: the fast path for scans and aggregation.
+    """
+    data = memoryview(zlib.decompress(block))
+    magic, count, exchange_length = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a tick block")
+    offset = _HEADER.size
+    exchange = bytes(data[offset:offset + exchange_length]).decode()
+    offset += exchange_length
+    timestamps, offset = _decode_ints(data, offset, count, order=2)
+    bid, offset = _decode_prices(data, offset, count)
+    ask, offset = _decode_prices(data, offset, count)
+    last, offset = _decode_prices(data, offset, count)
+    (length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    runs = json.loads(bytes(data[offset:offset + length]))
+    return {
+        "exchange": exchange,
+        "timestamp": timestamps,
+        "bid": bid,
+        "ask": ask,
+        "last": last,
+        "source": runs,
+    }
+
+
+def _expand_runs(runs: list) -> Iterator[str]:
+    return chain.from_iterable(repeat(source, run) for source, run in runs)
+
+
+def columns_to_ticks(
+    columns: dict, lo: int = 0, hi: Optional[int] = None, pair: str = DEFAULT_PAIR
+) -> list[Tick]:
+    """Build Ticks of `pair` for rows [lo, hi) of decoded columns."""
+    hi = len(columns["timestamp"]) if hi is None else hi
+    exchange = columns["exchange"]
+    return [
+        Tick(exchange, bid, ask, last, _EPOCH + timedelta(microseconds=us), source, pair)
+        for us, bid, ask, last, source in zip(
+            columns["timestamp"][lo:hi],
+            columns["bid"][lo:hi],
+            columns["ask"][lo:hi],
+            columns["last"][lo:hi],
+            islice(_expand_runs(columns["source"]), lo, hi),
+        )
+    ]
+
+
+def decode_block(block: bytes, pair: str = DEFAULT_PAIR) -> list[Tick]:
+    return columns_to_ticks(decode_columns(block), pair=pair)
+
+
+# ============================================
+# In-memory buffer
+# ============================================
+
+class TickBuffer:
+    """
+    Bounded buffer of recent ticks kept as compressed per exchange, per pair blocks.
+
+    New ticks collect in a small open list per exchange and pair; every `block_size`
+    ticks the list is sealed into a block. When more than `maxlen` ticks
+    are held, the oldest sealed blocks are dropped. Iteration yields all
+    ticks in timestamp order.
+    """
+
+    def __init__(self, maxlen: int = 10_000, block_size: int = 512):
+        self.maxlen = maxlen
+        self.block_size = block_size
+        self._open: dict[tuple[str, str], list[Tick]] = {}
+        # (first timestamp, count, (exchange, pair), block), oldest first
+        self._sealed: deque = deque()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by sealed blocks."""
+        return sum(len(entry[3]) for entry in self._sealed)
+
+    def append(self, tick: Tick) -> None:
+        key = (tick.exchange, tick.pair)
+        pending = self._open.setdefault(key, [])
+        pending.append(tick)
+        self._count += 1
+        if len(pending) >= self.block_size:
+            self._sealed.append((pending[0].timestamp, len(pending), key, encode_block(pending)))
+            self._open[key] = []
+        while self._count > self.maxlen and self._sealed:
+            self._count -= self._sealed.popleft()[1]
+
+    def extend(self, ticks: Iterable[Tick]) -> None:
+        for tick in ticks:
+            self.append(tick)
+
+    def __iter__(self) -> Iterator[Tick]:
+        per_key: dict[tuple[str, str], list[Tick]] = {}
+        for _, _, key, block in self._sealed:
+            per_key.setdefault(key, []).extend(decode_block(block, pair=key[1]))
+        for key, pending in self._open.items():
+            per_key.setdefault(key, []).extend(pending)
+        return merge(*per_key.values(), key=lambda tick: tick.timestamp)
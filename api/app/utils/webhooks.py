@@ -0,0 +1,58 @@
+"""
+Checks on client-registered webhook targets.
+
+Alert webhooks are registered by API clients and POSTed to by the server,
+so a target must not reach into the server's own network. The host is
+resolved and every address it resolves to must be public: loopback,
+private, link-local (which includes cloud metadata endpoints), shared,
+reserved, multicast and unspecified addresses are refused. The check runs
+at registration and again before each delivery, since DNS answers can
+change in between. ALERT_WEBHOOK_HOSTS further restricts targets to a
+fixed set of host names.
+"""
+import asyncio
+import ipaddress
+import socket
+from typing import Iterable
+from urllib.parse import urlsplit
+
+
+class UnsafeWebhookURL(ValueError):
+    """The webhook URL is malformed, not allowed or resolves to a non-public address."""
+
+
+def webhook_hosts(value: str) -> set[str]:
+    """Allowed webhook host names from a comma separated setting (empty: any public host)."""
+    return {host.strip().lower() for host in value.split(",") if host.strip()}
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_webhook_url(url: str, allowed_hosts: Iterable[str] = ()) -> None:
+    """Raise UnsafeWebhookURL unless `url` is http(s) and its host resolves only to public addresses."""
+    parts = urlsplit(url)
+    try:
+        port = parts.port
+    except ValueError:
+        raise UnsafeWebhookURL("webhook_url has an invalid port")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeWebhookURL("webhook_url must be an http(s) URL with a host")
+
+    host = parts.hostname.lower()
+    allowed = set(allowed_hosts)
+    if allowed and host not in allowed:
+        raise UnsafeWebhookURL(f"Webhook host not allowed: {host}")
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError):
+        raise UnsafeWebhookURL(f"Cannot resolve webhook host: {host}")
+    if not infos or not all(_is_public(sockaddr[0]) for *_, sockaddr in infos):
+        raise UnsafeWebhookURL(f"Webhook host resolves to a non-public address: {host}")
@@ -0,0 +1 @@
+"""Benchmark suite for the Dollar Tracker API."""
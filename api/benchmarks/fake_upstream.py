@@ -0,0 +1,127 @@
+"""
+Fake upstream price sources for benchmarks.
+
+Emulates the Binance P2P, OKX P2P and DolarBlueBolivia endpoints used by
+ExchangeService with configurable latency and failure rate. Use it
+in-process through `httpx.ASGITransport`, or run it standalone and point
+the BINANCE_P2P_URL / OKX_P2P_URL / DOLARBLUE_API_URL settings at it:
+
+    uvicorn benchmarks.fake_upstream:app --port 3101
+"""
+import asyncio
+import os
+import random
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, HTTPException, Request
+
+
+@dataclass
+class UpstreamConfig:
+    """Behaviour of the fake upstream."""
+    latency: float = 0.0  # seconds added to every response
+    jitter: float = 0.0  # uniform extra latency in [0, jitter]
+    failure_rate: float = 0.0  # probability of answering 503
+    ads_per_page: int = 20
+    seed: int = 42
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+
+def _ads(rng: random.Random, count: int, center: float, spread: float) -> list[tuple]:
+    """Generate (price, available, min, max) tuples around a center price."""
+    ads = []
+    for _ in range(count):
+        price = round(center + rng.uniform(-spread, spread), 2)
+        available = round(rng.uniform(50, 5000), 2)
+        min_amount = round(rng.choice((50, 100, 200, 500)), 2)
+        ads.append((price, available, min_amount, round(available * price, 2)))
+    return ads
+
+
+def create_app(config: UpstreamConfig) -> FastAPI:
+    """Build the fake upstream ASGI app for the given configuration."""
+    app = FastAPI(title="Fake upstream", docs_url=None, redoc_url=None)
+    app.state.config = config
+
+    async def _simulate():
+        if config.latency or config.jitter:
+            await asyncio.sleep(config.latency + config.rng.uniform(0, config.jitter))
+        if config.failure_rate and config.rng.random() < config.failure_rate:
+            raise HTTPException(status_code=503, detail="Simulated upstream failure")
+
+    @app.post("/bapi/c2c/v2/friendly/c2c/adv/search")
+    async def binance_search(request: Request):
+        await _simulate()
+        payload = await request.json()
+        rows = int(payload.get("rows", 10))
+        center = 9.32 if payload.get("tradeType") == "BUY" else 9.25
+        ads = _ads(config.rng, min(rows, config.ads_per_page), center, 0.05)
+        return {
+            "code": "000000",
+            "data": [
+                {
+                    "adv": {
+                        "price": f"{price:.2f}",
+                        "tradableQuantity": f"{available:.2f}",
+                        "minSingleTransAmount": f"{min_amount:.2f}",
+                        "maxSingleTransAmount": f"{max_amount:.2f}",
+                    },
+                    "advertiser": {"nickName": f"merchant-{i}"},
+                }
+                for i, (price, available, min_amount, max_amount) in enumerate(ads)
+            ],
+            "total": config.ads_per_page * 5,
+            "success": True,
+        }
+
+    @app.get("/v3/c2c/tradingOrders/books")
+    async def okx_books(side: str = "buy"):
+        await _simulate()
+        center = 9.34 if side == "buy" else 9.22
+        ads = _ads(config.rng, config.ads_per_page, center, 0.05)
+        return {
+            "code": "0",
+            "data": {
+                side: [
+                    {
+                        "price": f"{price:.2f}",
+                        "availableAmount": f"{available:.2f}",
+                        "quoteMinAmountPerOrder": f"{min_amount:.2f}",
+                        "quoteMaxAmountPerOrder": f"{max_amount:.2f}",
+                    }
+                    for price, available, min_amount, max_amount in ads
+                ]
+            },
+        }
+
+    @app.get("/fetch/airtm")
+    async def airtm():
+        await _simulate()
+        return {"data": {"addValue": 9.41, "withdrawValue": 9.12}}
+
+    @app.get("/fetch/wallbit")
+    async def wallbit():
+        await _simulate()
+        return {"data": {"buy": 9.38, "sell": 9.18}}
+
+    @app.get("/fetch/takenos")
+    async def takenos():
+        await _simulate()
+        return {"data": {"buy": 9.36, "sell": 9.15}}
+
+    @app.get("/v1/bcb")
+    async def bcb():
+        await _simulate()
+        return {"data": {"compra": 6.86, "venta": 6.96}}
+
+    return app
+
+
+app = create_app(UpstreamConfig(
+    latency=float(os.getenv("FAKE_UPSTREAM_LATENCY", "0.05")),
+    jitter=float(os.getenv("FAKE_UPSTREAM_JITTER", "0.02")),
+    failure_rate=float(os.getenv("FAKE_UPSTREAM_FAILURE_RATE", "0.0")),
+))
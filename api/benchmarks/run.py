@@ -0,0 +1,256 @@
+"""
+Benchmark runner for the fetch, aggregation and serving paths.
+
+    python -m benchmarks.run --ticks 1000000 --output bench.json
+
+Results are written as JSON (one entry per benchmark with latency
+percentiles) so runs can be compared between releases.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from time import perf_counter
+from unittest.mock import patch
+
+import httpx
+
+from app.config import get_settings
+from app.database import price_history_service
+from app.models.ticks import Tick, EXCHANGE_NAMES
+from app.services import ExchangeService
+from app.services.market_data import MarketDataGenerator
+from app.utils.tickcodec import decode_block, decode_columns, encode_block
+from benchmarks.fake_upstream import UpstreamConfig, create_app
+
+
+def _summarize(name: str, samples: list[float], **extra) -> dict:
+    """Build a result entry from per-iteration durations (seconds)."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "name": name,
+        "iterations": len(samples),
+        "mean_s": statistics.fmean(samples),
+        "min_s": ordered[0],
+        "p50_s": pct(0.50),
+        "p95_s": pct(0.95),
+        "p99_s": pct(0.99),
+        "max_s": ordered[-1],
+        **extra,
+    }
+
+
+@contextmanager
+def synthetic_history(ticks: list[Tick]):
+    """Serve `PriceHistoryService.get_history` from an in-memory tick list."""
+    by_exchange: dict = {}
+    for tick in ticks:
+        by_exchange.setdefault(tick.exchange, []).append(tick)
+    last = ticks[-1].timestamp if ticks else datetime.utcnow()
+
+    async def get_history(exchange: str = None, hours: int = 24, start=None, end=None, exchanges=None, pair=None) -> list[Tick]:
+        since = start or last - timedelta(hours=hours)
+        until = end or datetime.max
+        source = by_exchange.get(exchange, []) if exchange else ticks
+        if exchanges:
+            source = [t for t in source if t.exchange in exchanges]
+        return [t for t in source if since <= t.timestamp < until]
+
+    with patch.object(price_history_service, "get_history", get_history):
+        yield
+
+
+def synthetic_ticks(count: int, step_seconds: float, seed: int) -> list[Tick]:
+    """Generate `count` history ticks ending now, one refresh every `step_seconds`."""
+    generator = MarketDataGenerator(seed=seed, tick_seconds=step_seconds)
+    refreshes = -(-count // len(generator.profiles))
+    end = datetime.utcnow()
+    start = end - timedelta(seconds=refreshes * step_seconds)
+    return generator.generate(start, end)[:count]
+
+
+def _service(config: UpstreamConfig) -> ExchangeService:
+    return ExchangeService(transport=httpx.ASGITransport(app=create_app(config)))
+
+
+async def bench_refresh(config: UpstreamConfig, iterations: int) -> dict:
+    """Full current-prices refresh against the fake upstream (cache cleared)."""
+    service = _service(config)
+    samples = []
+    for _ in range(iterations):
+        service._cache.clear()
+        service._cache_time.clear()
+        start = perf_counter()
+        await service.get_current_prices()
+        samples.append(perf_counter() - start)
+    return _summarize(
+        "fetch.refresh",
+        samples,
+        upstream_latency_s=config.latency,
+        upstream_failure_rate=config.failure_rate,
+    )
+
+
+async def bench_aggregation(ticks: list[Tick], iterations: int) -> list[dict]:
+    """History aggregation and volatility over synthetic ticks."""
+    service = ExchangeService()
+    results = []
+    with synthetic_history(ticks):
+        for name, call in (
+            ("aggregation.history_all_7d", lambda: service.get_price_history("7d")),
+            ("aggregation.history_binance_7d", lambda: service.get_price_history("7d", "binance")),
+            ("aggregation.history_compare_7d", lambda: service.get_history_compare(list(EXCHANGE_NAMES), "7d")),
+            ("aggregation.volatility_7d", lambda: service.get_volatility("7d")),
+        ):
+            samples = []
+            for _ in range(iterations):
+                start = perf_counter()
+                await call()
+                samples.append(perf_counter() - start)
+            results.append(_summarize(name, samples, ticks=len(ticks)))
+    return results
+
+
+def bench_encoding(ticks: list[Tick], iterations: int) -> list[dict]:
+    """Tick block encoding, column decoding and full Tick decoding of one exchange's ticks."""
+    exchange_ticks = [t for t in ticks if t.exchange == ticks[0].exchange]
+    block = encode_block(exchange_ticks)
+    documents = sum(len(json.dumps({**t._asdict(), "timestamp": t.timestamp.isoformat()})) for t in exchange_ticks)
+    results = []
+    for name, call in (
+        ("encoding.encode_block", lambda: encode_block(exchange_ticks)),
+        ("encoding.decode_columns", lambda: decode_columns(block)),
+        ("encoding.decode_ticks", lambda: decode_block(block)),
+    ):
+        samples = []
+        for _ in range(iterations):
+            start = perf_counter()
+            call()
+            samples.append(perf_counter() - start)
+        results.append(_summarize(
+            name, samples, ticks=len(exchange_ticks), bytes=len(block), ratio=round(documents / len(block), 1)
+        ))
+    return results
+
+
+async def bench_serving(
+    config: UpstreamConfig,
+    ticks: list[Tick],
+    requests: int,
+    concurrency: int,
+) -> list[dict]:
+    """Concurrent requests against the ASGI app for current prices and history."""
+    from app.main import app
+
+    service = _service(config)
+    await service.get_current_prices()  # warm the cache like the fetch task does
+    app.state.exchange_service = service
+
+    results = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with synthetic_history(ticks):
+            for name, path in (
+                ("serving.prices_current", "/api/v1/prices/current"),
+                ("serving.prices_history_24h", "/api/v1/prices/history?interval=24h"),
+            ):
+                samples = []
+                errors = 0
+
+                async def one():
+                    nonlocal errors
+                    async with semaphore:
+                        start = perf_counter()
+                        response = await client.get(path)
+                        samples.append(perf_counter() - start)
+                        errors += response.status_code != 200
+
+                wall_start = perf_counter()
+                await asyncio.gather(*(one() for _ in range(requests)))
+                wall = perf_counter() - wall_start
+                results.append(_summarize(
+                    name,
+                    samples,
+                    concurrency=concurrency,
+                    errors=errors,
+                    throughput_rps=requests / wall if wall else 0.0,
+                ))
+    del app.state.exchange_service
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+async def run(args: argparse.Namespace) -> dict:
+    config = UpstreamConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    ticks = synthetic_ticks(args.ticks, args.step, args.seed)
+
+    results = [await bench_refresh(config, args.iterations)]
+    results.extend(await bench_aggregation(ticks, args.iterations))
+    results.extend(bench_encoding(ticks, args.iterations))
+    results.extend(await bench_serving(config, ticks, args.requests, args.concurrency))
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "revision": _git_revision(),
+            "version": get_settings().api_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args) | {"output": None},
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Dollar Tracker API benchmarks")
+    parser.add_argument("--ticks", type=int, default=100_000, help="synthetic history size")
+    parser.add_argument("--step", type=float, default=1.0, help="seconds between synthetic refreshes")
+    parser.add_argument("--iterations", type=int, default=5, help="iterations per fetch/aggregation benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="requests per serving benchmark")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent serving requests")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake upstream latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="fake upstream latency jitter (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fake upstream failure probability")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ from datetime import datetime
 
 from app.main import app
 from app.services.exchange_service import ExchangeService
+from app.services.workers import WorkerPool
+from app.models.ticks import HistoryPoint, HistorySeries
 from app.models.schemas import (
     CurrentPricesResponse,
     ExchangePrice,
@@ -24,6 +26,8 @@ from app.models.schemas import (
 def mock_exchange_service():
     """Create a mock exchange service with predefined responses."""
     service = MagicMock(spec=ExchangeService)
+    service.workers = WorkerPool(workers=1, max_queue=4)
+    service.archives = {}
 
     # Mock current prices response
     mock_prices = CurrentPricesResponse(
@@ -82,6 +86,15 @@ def mock_exchange_service():
         ),
     )
     service.get_price_history = AsyncMock(return_value=mock_history)
+    service.get_history_series = AsyncMock(return_value=HistorySeries(
+        exchange="all",
+        interval="24h",
+        points=[
+            HistoryPoint(datetime(2024, 1, 1, 12, 0), 9.20, 9.25, 9.18, 9.22, 6.96),
+            HistoryPoint(datetime(2024, 1, 1, 12, 1), 9.22, 9.26, 9.21, 9.24),
+        ],
+        summary=mock_history.summary,
+    ))
 
     # Mock sources response
     mock_sources = SourcesResponse(
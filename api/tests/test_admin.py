@@ -0,0 +1,67 @@
+"""
+Tests for admin profiling endpoints and Server-Timing.
+"""
+import time
+
+import pytest
+
+from app.config import get_settings
+from app.utils.profiling import SamplingProfiler, disable_server_timing
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "admin_token", "secret")
+    yield "secret"
+    disable_server_timing()
+
+
+@pytest.mark.asyncio
+async def test_admin_hidden_without_token(client):
+    """Test that admin endpoints 404 when no admin token is configured."""
+    response = await client.get("/admin/profiling/status")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_admin_rejects_wrong_token(client, admin_token):
+    """Test that a wrong X-Admin-Token is rejected."""
+    response = await client.get("/admin/profiling/status", headers={"X-Admin-Token": "nope"})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_toggle(client, admin_token):
+    """Test that Server-Timing is only emitted while enabled."""
+    response = await client.get("/api/v1/prices/history")
+    assert "server-timing" not in response.headers
+
+    headers = {"X-Admin-Token": admin_token}
+    assert (await client.post("/admin/server-timing?duration=60", headers=headers)).status_code == 200
+
+    response = await client.get("/api/v1/prices/history")
+    timing = response.headers["server-timing"]
+    assert "handler;dur=" in timing
+    assert "serialize;dur=" in timing
+    assert "total;dur=" in timing
+
+    await client.delete("/admin/server-timing", headers=headers)
+    response = await client.get("/api/v1/prices/history")
+    assert "server-timing" not in response.headers
+
+
+def test_sampling_profiler_folded_output():
+    """Test that the profiler samples a busy thread into folded stacks."""
+    profiler = SamplingProfiler()
+    assert profiler.start(duration=0.2, interval=0.001)
+    assert not profiler.start(duration=0.2)
+
+    deadline = time.monotonic() + 0.25
+    while time.monotonic() < deadline:
+        sum(range(1000))
+    profiler.stop()
+
+    folded = profiler.folded()
+    assert profiler.samples > 0
+    assert "test_sampling_profiler_folded_output" in folded
+    assert folded.splitlines()[0].rsplit(" ", 1)[1].isdigit()
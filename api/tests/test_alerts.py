@@ -0,0 +1,193 @@
+"""
+Tests for the alert engine and alert endpoints.
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.config import get_settings
+from app.main import app
+from app.models.schemas import AlertCreate
+from app.models.ticks import Tick
+from app.services.alerts import AlertEngine, AlertLimitExceeded, ThresholdIndex
+from app.utils.webhooks import UnsafeWebhookURL, check_webhook_url
+
+# A public address literal, so the webhook check needs no DNS
+PUBLIC_HOOK = "http://93.184.216.34/alerts"
+
+T0 = datetime(2024, 1, 1, 12, 0)
+
+
+def _tick(exchange: str, last: float) -> Tick:
+    return Tick(exchange, last - 0.02, last + 0.02, last, T0)
+
+
+def test_threshold_index_crossings():
+    """Test crossing lookups over sorted thresholds."""
+    index = ThresholdIndex()
+    for i, threshold in enumerate([9.0, 9.5, 9.5, 10.0]):
+        index.add(threshold, f"a{i}")
+    assert index.crossed_up(9.2, 9.5) == ["a1", "a2"]
+    assert index.crossed_up(9.5, 9.9) == []
+    assert index.crossed_down(9.6, 9.0) == ["a0", "a1", "a2"]
+    index.remove(9.5, "a1")
+    assert index.crossed_up(9.0, 10.0) == ["a2", "a3"]
+
+
+def test_price_alerts_trigger_on_crossing():
+    """Test that price alerts fire once on a crossing, per exchange or for any exchange."""
+    engine = AlertEngine()
+    up = engine.create(AlertCreate(kind="price", exchange="binance", threshold=9.5))
+    down = engine.create(AlertCreate(kind="price", threshold=9.0, direction="below", once=False))
+
+    assert engine.on_ticks([_tick("binance", 9.4)]) == []
+    events = engine.on_ticks([_tick("binance", 9.6)])
+    assert [e.alert_id for e in events] == [up.id]
+    assert not engine.get(up.id).active
+    assert engine.on_ticks([_tick("binance", 9.4), _tick("binance", 9.6)]) == []
+
+    # Exchange-less alerts watch every exchange and stay armed when once=False
+    engine.on_ticks([_tick("okx", 9.2)])
+    events = engine.on_ticks([_tick("okx", 8.9)])
+    assert [(e.alert_id, e.exchange) for e in events] == [(down.id, "okx")]
+    assert engine.get(down.id).active
+
+
+def test_spread_and_volatility_alerts():
+    """Test spread crossings and volatility rating changes."""
+    engine = AlertEngine()
+    spread = engine.create(AlertCreate(kind="spread", threshold=1.0, direction="cross"))
+    rating = engine.create(AlertCreate(kind="volatility", rating="high"))
+
+    engine.on_ticks([], spread_percent=0.5)
+    assert [e.alert_id for e in engine.on_ticks([], spread_percent=1.2)] == [spread.id]
+
+    assert engine.on_volatility("low") == []
+    assert engine.on_volatility("medium") == []
+    assert [e.alert_id for e in engine.on_volatility("high")] == [rating.id]
+
+
+def test_alert_limit():
+    """Test that registrations beyond max_alerts are refused."""
+    engine = AlertEngine(max_alerts=1)
+    engine.create(AlertCreate(kind="spread", threshold=1.0))
+    with pytest.raises(AlertLimitExceeded):
+        engine.create(AlertCreate(kind="spread", threshold=2.0))
+
+
+@pytest.mark.asyncio
+async def test_stream_and_webhook_delivery():
+    """Test that a triggered alert reaches stream subscribers and its webhook."""
+    engine = AlertEngine()
+    engine.create(AlertCreate(kind="price", exchange="binance", threshold=9.5, webhook_url=PUBLIC_HOOK))
+    queue = engine.subscribe()
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(json.loads(request.content))
+        return httpx.Response(204)
+
+    worker = asyncio.create_task(engine.run_webhooks(workers=1, transport=httpx.MockTransport(handler)))
+    engine.on_ticks([_tick("binance", 9.4)])
+    engine.on_ticks([_tick("binance", 9.6)])
+    event = queue.get_nowait()
+    await asyncio.wait_for(engine._webhooks.join(), 1)
+    worker.cancel()
+
+    assert event.value == 9.6
+    assert received[0]["alert_id"] == event.alert_id
+
+
+@pytest.mark.asyncio
+async def test_webhook_targets_must_be_public():
+    """Test that webhooks to loopback, private, link-local or unlisted hosts are refused."""
+    for url in (
+        "http://127.0.0.1/hook",
+        "http://10.0.0.5/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/hook",
+        "http://[::ffff:192.168.1.1]/hook",
+        "ftp://93.184.216.34/hook",
+    ):
+        with pytest.raises(UnsafeWebhookURL):
+            await check_webhook_url(url)
+    await check_webhook_url(PUBLIC_HOOK)
+    with pytest.raises(UnsafeWebhookURL):
+        await check_webhook_url(PUBLIC_HOOK, {"hooks.example.com"})
+
+    # Checked again on delivery
+    engine = AlertEngine()
+    engine.create(AlertCreate(kind="spread", threshold=1.0, webhook_url="http://127.0.0.1:3001/admin"))
+    sent = []
+    worker = asyncio.create_task(engine.run_webhooks(
+        workers=1, transport=httpx.MockTransport(lambda request: sent.append(request) or httpx.Response(204))
+    ))
+    engine.on_ticks([], spread_percent=0.5)
+    engine.on_ticks([], spread_percent=1.5)
+    await asyncio.wait_for(engine._webhooks.join(), 1)
+    worker.cancel()
+    assert sent == []
+
+
+@pytest.fixture
+def alert_engine():
+    app.state.alert_engine = AlertEngine()
+    yield app.state.alert_engine
+    del app.state.alert_engine
+
+
+@pytest.mark.asyncio
+async def test_alert_endpoints(client, alert_engine):
+    """Test registering, listing and deleting an alert with its secret."""
+    response = await client.post("/api/v1/alerts", json={"kind": "price", "exchange": "binance", "threshold": 9.5})
+    assert response.status_code == 201
+    alert_id, secret = response.json()["id"], response.json()["secret"]
+
+    response = await client.get("/api/v1/alerts")
+    assert [a["id"] for a in response.json()] == [alert_id]
+    assert "secret" not in response.json()[0] and "secret_hash" not in response.json()[0]
+    assert (await client.get(f"/api/v1/alerts/{alert_id}")).status_code == 200
+
+    assert (await client.delete(f"/api/v1/alerts/{alert_id}")).status_code == 403
+    response = await client.delete(f"/api/v1/alerts/{alert_id}", headers={"X-Alert-Secret": "guess"})
+    assert response.status_code == 403
+    response = await client.delete(f"/api/v1/alerts/{alert_id}", headers={"X-Alert-Secret": secret})
+    assert response.status_code == 204
+    assert (await client.get(f"/api/v1/alerts/{alert_id}")).status_code == 404
+    assert len(alert_engine) == 0
+
+
+@pytest.mark.asyncio
+async def test_webhook_registration_requires_token(client, alert_engine, monkeypatch):
+    """Test that webhooks need the webhook token and a public target, and are never listed."""
+    body = {"kind": "spread", "threshold": 1, "webhook_url": PUBLIC_HOOK}
+    assert (await client.post("/api/v1/alerts", json=body)).status_code == 403
+
+    monkeypatch.setattr(get_settings(), "alert_webhook_token", "hook-token")
+    assert (await client.post("/api/v1/alerts", json=body)).status_code == 403
+    headers = {"X-Webhook-Token": "hook-token"}
+    private = dict(body, webhook_url="http://169.254.169.254/latest/meta-data")
+    assert (await client.post("/api/v1/alerts", json=private, headers=headers)).status_code == 400
+
+    response = await client.post("/api/v1/alerts", json=body, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["webhook_url"] == PUBLIC_HOOK
+    listed = (await client.get("/api/v1/alerts")).json()
+    assert "webhook_url" not in listed[0]
+    assert "webhook_url" not in (await client.get(f"/api/v1/alerts/{listed[0]['id']}")).json()
+
+
+@pytest.mark.asyncio
+async def test_alert_validation(client, alert_engine):
+    """Test that malformed alerts are rejected."""
+    response = await client.post("/api/v1/alerts", json={"kind": "price"})
+    assert response.status_code == 422
+    response = await client.post("/api/v1/alerts", json={"kind": "price", "threshold": 9, "exchange": "nope"})
+    assert response.status_code == 400
+    response = await client.post(
+        "/api/v1/alerts", json={"kind": "spread", "threshold": 1, "webhook_url": "file:///etc/passwd"}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,108 @@
+"""
+Tests for incremental spread analytics.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.models import SpreadsResponse
+from app.models.ticks import Tick
+from app.services import ExchangeService, SpreadAnalytics
+from app.services.market_data import MarketDataGenerator
+
+T0 = datetime(2024, 1, 1, 12, 0)
+
+
+def test_spread_matrix_and_best_route():
+    """Test the pairwise spread matrix, best route and premiums over BCB."""
+    analytics = SpreadAnalytics()
+    analytics.update([
+        Tick("binance", 9.30, 9.35, 9.32, T0),
+        Tick("okx", 9.40, 9.45, 9.42, T0),
+        Tick("bcb", 6.96, 6.96, 6.96, T0),
+    ])
+    assert analytics.matrix["binance"]["okx"] == pytest.approx(0.05)
+    assert analytics.matrix["okx"]["binance"] == pytest.approx(-0.15)
+    assert "bcb" not in analytics.matrix
+    route = analytics.best_route()
+    assert (route.buy_exchange, route.sell_exchange) == ("binance", "okx")
+    assert analytics.premiums()["okx"] == pytest.approx(35.34)
+
+
+def test_incremental_best_route_matches_full_scan():
+    """Test that the incrementally kept best route always equals a full matrix scan."""
+    analytics = SpreadAnalytics()
+    generator = MarketDataGenerator(seed=3)
+    for batch in generator.batches(T0, T0 + timedelta(hours=1), batch_size=6):
+        analytics.update(batch)
+        best = analytics.best_route()
+        expected = max(spread for row in analytics.matrix.values() for spread in row.values())
+        assert best.spread == expected
+
+
+def test_silent_exchange_expires():
+    """Test that an exchange that stops reporting drops out of the matrix, best route and premiums."""
+    analytics = SpreadAnalytics(max_quote_age=30)
+    analytics.update([
+        Tick("binance", 9.30, 9.35, 9.32, T0),
+        Tick("okx", 9.40, 9.45, 9.42, T0),
+        Tick("airtm", 9.34, 9.38, 9.36, T0),
+        Tick("bcb", 6.96, 6.96, 6.96, T0),
+    ])
+    assert analytics.best_route().sell_exchange == "okx"
+
+    # OKX goes silent; still within max_quote_age at 30 s
+    for i in range(1, 8):
+        analytics.update([
+            Tick("binance", 9.30, 9.35, 9.32, T0 + timedelta(seconds=5 * i)),
+            Tick("airtm", 9.34, 9.38, 9.36, T0 + timedelta(seconds=5 * i)),
+        ])
+        if i == 6:
+            assert analytics.best_route().sell_exchange == "okx"
+
+    route = analytics.best_route()
+    assert (route.buy_exchange, route.sell_exchange) == ("binance", "airtm")
+    assert "okx" not in analytics.matrix and "okx" not in analytics.matrix["binance"]
+    assert set(analytics.premiums()) == {"binance", "airtm"}
+
+    # It comes back as soon as it reports again
+    analytics.update([Tick("okx", 9.40, 9.45, 9.42, T0 + timedelta(seconds=40))])
+    assert analytics.best_route().sell_exchange == "okx"
+
+
+def test_rollups_per_minute():
+    """Test that a rollup is emitted when each minute completes and kept in memory."""
+    analytics = SpreadAnalytics(rollup_seconds=60)
+    completed = []
+    for i in range(30):
+        ts = T0 + timedelta(seconds=5 * i)
+        completed += analytics.update([
+            Tick("binance", 9.30, 9.35, 9.32, ts),
+            Tick("okx", 9.40 + i * 0.001, 9.45, 9.42, ts),
+            Tick("bcb", 6.96, 6.96, 6.96, ts),
+        ])
+    assert [doc["timestamp"] for doc in completed] == [T0, T0 + timedelta(minutes=1)]
+    assert completed[0]["samples"] == 12
+    assert completed[0]["best_route"]["buy_exchange"] == "binance"
+    assert set(completed[0]["premiums"]) == {"binance", "okx"}
+    assert analytics.rollups_since(T0) == completed
+
+
+@pytest.mark.asyncio
+async def test_get_spreads_from_memory():
+    """Test that spreads are served from the in-memory analytics without storage."""
+    service = ExchangeService()
+    service.spreads.update([Tick("binance", 9.30, 9.35, 9.32, T0), Tick("okx", 9.40, 9.45, 9.42, T0)])
+    result = await service.get_spreads("1h")
+    assert result.best_route.sell_exchange == "okx"
+    assert result.history == []
+
+
+@pytest.mark.asyncio
+async def test_spreads_endpoint(client, mock_exchange_service):
+    """Test that /stats/spreads passes the period to the service."""
+    mock_exchange_service.get_spreads = AsyncMock(return_value=SpreadsResponse())
+    response = await client.get("/api/v1/stats/spreads?period=1h")
+    assert response.status_code == 200
+    mock_exchange_service.get_spreads.assert_awaited_with("1h")
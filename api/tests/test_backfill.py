@@ -0,0 +1,119 @@
+"""
+Tests for the historical backfill.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import price_history_service, spread_rollup_service
+from app.models.ticks import Tick
+from app.services import backfill as backfill_module
+from app.services.backfill import backfill, read_tick_batches
+from app.services.market_data import MarketDataGenerator, write_ticks_ndjson
+from app.utils.export import TICK_SCHEMA, encode_export
+
+START = datetime(2026, 1, 1)
+
+
+async def test_reads_exported_csv_and_ndjson(tmp_path):
+    """Test that CSV and Parquet exports (and recordings) read back as the same ticks."""
+    ticks = MarketDataGenerator(seed=3).generate(START, START + timedelta(minutes=5))
+
+    async def batches():
+        yield ticks
+
+    csv_path = tmp_path / "ticks.csv"
+    csv_path.write_bytes(b"".join([chunk async for chunk in encode_export(batches(), TICK_SCHEMA, "csv")]))
+    parquet_path = tmp_path / "ticks.parquet"
+    parquet_path.write_bytes(b"".join([chunk async for chunk in encode_export(batches(), TICK_SCHEMA, "parquet")]))
+    ndjson_path = tmp_path / "ticks.ndjson"
+    write_ticks_ndjson(str(ndjson_path), [ticks])
+
+    for path in (csv_path, parquet_path, ndjson_path):
+        read = [tick for batch in read_tick_batches(str(path), batch_size=7) for tick in batch]
+        assert read == ticks
+        assert max(len(batch) for batch in read_tick_batches(str(path), batch_size=7)) == 7
+
+
+def test_reader_defaults_and_unknown_extension(tmp_path):
+    """Test that bid/ask fall back to last, timestamps are normalized and unknown files are rejected."""
+    path = tmp_path / "rates.jsonl"
+    path.write_text('{"exchange": "bcb", "last": 6.96, "timestamp": "2026-01-01T04:00:00-04:00"}\n')
+
+    assert list(read_tick_batches(str(path))) == [
+        [Tick("bcb", 6.96, 6.96, 6.96, datetime(2026, 1, 1, 8), "backfill")]
+    ]
+    with pytest.raises(ValueError):
+        list(read_tick_batches(str(tmp_path / "rates.xlsx")))
+
+
+async def test_backfill_upserts_in_parallel_and_rebuilds_rollups(tmp_path, monkeypatch):
+    """Test that all batches are upserted and rollups are rebuilt for the affected minutes."""
+    ticks = MarketDataGenerator(seed=5).generate(START, START + timedelta(minutes=10))
+    path = tmp_path / "ticks.ndjson"
+    write_ticks_ndjson(str(path), [ticks])
+    stored, rollups, reads = [], [], []
+
+    async def upsert_many(batch):
+        stored.extend(batch)
+        return len(batch)
+
+    async def iter_history(start, end=None, exchanges=None, batch_size=5000, prefer_secondary=True, pair=None):
+        reads.append((start, end, prefer_secondary))
+        yield sorted((t for t in stored if start <= t.timestamp < end), key=lambda t: t.timestamp)
+
+    async def store_many(docs):
+        rollups.extend(docs)
+        return len(docs)
+
+    monkeypatch.setattr(price_history_service, "upsert_many", upsert_many)
+    monkeypatch.setattr(price_history_service, "iter_history", iter_history)
+    monkeypatch.setattr(spread_rollup_service, "store_many", store_many)
+
+    result = await backfill([str(path)], batch_size=50, workers=3)
+
+    assert result.read == result.written == len(ticks)
+    assert sorted(stored) == sorted(ticks)
+    assert (result.start, result.end) == (ticks[0].timestamp, ticks[-1].timestamp)
+    assert reads == [(START - backfill_module.ROLLUP_WARMUP, START + timedelta(minutes=10), False)]
+    assert [doc["timestamp"] for doc in rollups] == [START + timedelta(minutes=m) for m in range(10)]
+    assert result.rollups == 10
+
+
+async def test_backfill_surfaces_write_errors(tmp_path, monkeypatch):
+    """Test that a failing bulk write fails the backfill instead of hanging."""
+    path = tmp_path / "ticks.ndjson"
+    write_ticks_ndjson(str(path), [MarketDataGenerator(seed=1).generate(START, START + timedelta(minutes=10))])
+
+    async def upsert_many(batch):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(price_history_service, "upsert_many", upsert_many)
+
+    with pytest.raises(RuntimeError):
+        await backfill([str(path)], batch_size=10, workers=2)
+
+
+async def test_backfill_routes_each_key_to_one_worker(tmp_path, monkeypatch):
+    """Test that repeated ticks are written once per batch and always by the same worker."""
+    ticks = MarketDataGenerator(seed=7).generate(START, START + timedelta(minutes=10))
+    path = tmp_path / "ticks.ndjson"
+    # The same ticks twice, with some repeated within a batch too
+    write_ticks_ndjson(str(path), [ticks, ticks[:20] + ticks[:20]])
+    writers: dict = {}
+
+    async def upsert_many(batch):
+        keys = [(t.pair, t.exchange, t.timestamp) for t in batch]
+        assert len(keys) == len(set(keys))
+        for key in keys:
+            writers.setdefault(key, set()).add(asyncio.current_task().get_name())
+        await asyncio.sleep(0)
+        return len(batch)
+
+    monkeypatch.setattr(price_history_service, "upsert_many", upsert_many)
+    result = await backfill([str(path)], batch_size=40, workers=4, rebuild_rollups=False)
+
+    assert result.read == len(ticks) + 40
+    assert len(writers) == len(ticks)
+    assert all(len(tasks) == 1 for tasks in writers.values())
@@ -0,0 +1,21 @@
+"""
+Smoke test for the benchmark suite so it keeps working as the API evolves.
+"""
+import pytest
+
+from benchmarks.run import parse_args, run
+
+
+@pytest.mark.asyncio
+async def test_benchmark_suite_runs():
+    """Test that every benchmark runs end to end with tiny parameters."""
+    args = parse_args([
+        "--ticks", "600", "--iterations", "1", "--requests", "4",
+        "--concurrency", "2", "--latency", "0", "--jitter", "0",
+    ])
+    report = await run(args)
+
+    names = [r["name"] for r in report["results"]]
+    assert "fetch.refresh" in names
+    assert "serving.prices_history_24h" in names
+    assert all(r.get("errors", 0) == 0 for r in report["results"])
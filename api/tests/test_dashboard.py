@@ -0,0 +1,71 @@
+"""
+Tests for the dashboard bundle endpoint.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from app.database import price_history_service
+from app.models import DashboardResponse
+from app.models.ticks import Tick
+from app.services.exchange_service import ExchangeService
+
+
+def _service_with_history() -> tuple[ExchangeService, list[Tick]]:
+    now = datetime.utcnow()
+    ticks = [
+        Tick(exchange, 0.0, 0.0, 9.2 + 0.01 * (i % 7), now - timedelta(minutes=i))
+        for i in range(300, 0, -1)
+        for exchange in ("binance", "okx")
+    ]
+    service = ExchangeService()
+    service._set_cache("current_prices:USDT/BOB", service.build_current_prices(ticks[-2:], "Test"))
+    return service, ticks
+
+
+async def test_dashboard_shares_one_history_read():
+    """Test that history and volatility come from one read and the payload is cached until a refresh."""
+    calls = []
+    service, ticks = _service_with_history()
+
+    async def get_history(exchange=None, hours=24, start=None, end=None, exchanges=None, pair=None):
+        calls.append(start)
+        return [t for t in ticks if t.timestamp >= start and (end is None or t.timestamp < end)]
+
+    with patch.object(price_history_service, "get_history", get_history):
+        dashboard = await service.get_dashboard("24h", max_points=50)
+        assert len(calls) == 1
+        assert len(dashboard.history.data_points) == 50
+        # Volatility covers the full series, not the downsampled points
+        assert dashboard.volatility == await service.get_volatility("24h")
+        assert await service.get_dashboard("24h", max_points=50) is dashboard
+
+        # A refresh replaces the current prices; the history part stays cached
+        refreshed = service.build_current_prices(ticks[-2:], "Refreshed")
+        service._set_cache("current_prices:USDT/BOB", refreshed)
+        rebuilt = await service.get_dashboard("24h", max_points=50)
+
+    assert len(calls) == 2  # the second read is get_volatility's above
+    assert rebuilt.current is refreshed
+    assert rebuilt.history is dashboard.history
+
+
+async def test_dashboard_endpoint(client, mock_exchange_service):
+    current = await mock_exchange_service.get_current_prices()
+    history = await mock_exchange_service.get_price_history()
+    sources = await mock_exchange_service.get_sources()
+    mock_exchange_service.get_dashboard = AsyncMock(return_value=DashboardResponse(
+        current=current,
+        history=history,
+        volatility=ExchangeService._volatility("7d", [9.2, 9.3, 9.25]),
+        sources=sources,
+    ))
+
+    response = await client.get("/api/v1/dashboard?interval=7d&max_points=200")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"current", "history", "volatility", "sources"}
+    mock_exchange_service.get_dashboard.assert_awaited_with("7d", None, 200, "lttb", "USDT/BOB")
+
+    for query in ("interval=2h", "exchange=nope", "downsample=mean"):
+        response = await client.get(f"/api/v1/dashboard?{query}")
+        assert response.status_code in (400, 422), query
@@ -0,0 +1,68 @@
+"""
+Tests for chart downsampling.
+"""
+import math
+
+import pytest
+
+from app.utils.downsample import lttb_indices, minmax_indices
+
+
+def _series(n: int) -> tuple[list[float], list[float]]:
+    xs = [float(i) for i in range(n)]
+    ys = [math.sin(i / 50) for i in range(n)]
+    ys[777] = 5.0  # a spike that must survive
+    return xs, ys
+
+
+def test_lttb_keeps_endpoints_and_spike():
+    """Test that LTTB returns threshold points, ordered, including extremes."""
+    xs, ys = _series(5000)
+    indices = lttb_indices(xs, ys, 200)
+
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert indices == sorted(indices)
+    assert 777 in indices
+
+
+def test_minmax_keeps_extremes():
+    """Test that min/max bucketing keeps every bucket's extremes."""
+    xs, ys = _series(5000)
+    indices = minmax_indices(ys, 100)
+
+    assert len(indices) <= 100
+    assert indices == sorted(indices)
+    assert 777 in indices
+    assert ys.index(min(ys)) in indices
+
+
+def test_minmax_small_threshold():
+    """Test that thresholds too small for a min/max pair still downsample."""
+    ys = [5.0, 5.1, 4.9, 9.0, 5.2, 5.0]
+    assert minmax_indices(ys, 3) == [0, 3, 5]
+    assert minmax_indices(ys, 2) == [0, 5]
+
+
+def test_lttb_small_threshold():
+    """Test that thresholds too small for a bucket keep only the endpoints."""
+    xs, ys = _series(1000)
+    assert lttb_indices(xs, ys, 2) == [0, 999]
+    assert lttb_indices(xs, ys, 3) == [0, 777, 999]
+
+
+def test_short_series_untouched():
+    """Test that series shorter than the threshold are returned as is."""
+    assert lttb_indices([0, 1, 2], [1, 2, 3], 10) == [0, 1, 2]
+    assert minmax_indices([1, 2, 3], 10) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_history_passes_max_points(client, mock_exchange_service):
+    """Test that max_points/downsample reach the service and are validated."""
+    response = await client.get("/api/v1/prices/history?interval=7d&max_points=300&downsample=minmax")
+    assert response.status_code == 200
+    assert mock_exchange_service.get_price_history.await_args.args == ("7d", None, 300, "minmax")
+
+    response = await client.get("/api/v1/prices/history?max_points=1")
+    assert response.status_code == 422
@@ -0,0 +1,76 @@
+"""
+Tests for columnar and binary price history formats.
+"""
+import msgpack
+import pyarrow
+import pytest
+
+from app.utils import encoding
+from app.utils.encoding import ARROW, COLUMNAR_JSON, JSON, MSGPACK, negotiate_history_format
+
+
+def test_negotiate_defaults_to_json():
+    assert negotiate_history_format(None, None) == JSON
+    assert negotiate_history_format(None, "*/*") == JSON
+
+
+def test_negotiate_prefers_format_param_and_q_values():
+    assert negotiate_history_format("columnar", "application/json") == COLUMNAR_JSON
+    accept = "application/json;q=0.5, application/msgpack;q=0.9"
+    assert negotiate_history_format(None, accept) == MSGPACK
+    assert negotiate_history_format(None, "text/csv") is None
+
+
+@pytest.mark.asyncio
+async def test_history_columnar_format(client):
+    response = await client.get("/api/v1/prices/history?interval=24h&format=columnar")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == COLUMNAR_JSON
+    data = response.json()
+    assert data["timestamp"] == [1704110400000, 1704110460000]
+    assert data["close"] == [9.22, 9.24]
+    assert data["reference_close"] == [6.96, None]
+    assert data["summary"]["avg_price"] == 9.21
+
+
+@pytest.mark.asyncio
+async def test_history_columnar_via_accept(client):
+    response = await client.get("/api/v1/prices/history", headers={"Accept": COLUMNAR_JSON})
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept"
+    assert len(response.json()["open"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_history_msgpack_round_trip(client):
+    response = await client.get("/api/v1/prices/history?format=msgpack")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    data = msgpack.unpackb(response.content)
+    assert data["timestamp"] == [1704110400000, 1704110460000]
+    assert data["close"] == [9.22, 9.24]
+    assert data["reference_close"] == [6.96, None]
+    assert data["summary"]["avg_price"] == 9.21
+
+
+@pytest.mark.asyncio
+async def test_history_arrow_round_trip(client):
+    response = await client.get("/api/v1/prices/history", headers={"Accept": ARROW})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["timestamp", "open", "high", "low", "close", "reference_close"]
+    assert [ts.value for ts in table["timestamp"]] == [1704110400000, 1704110460000]
+    assert table["close"].to_pylist() == [9.22, 9.24]
+    assert table["reference_close"].to_pylist() == [6.96, None]
+    assert table.schema.metadata[b"interval"] == b"24h"
+
+
+@pytest.mark.asyncio
+async def test_history_unsupported_format(client, monkeypatch):
+    response = await client.get("/api/v1/prices/history", headers={"Accept": "text/csv"})
+    assert response.status_code == 406
+
+    monkeypatch.setattr(encoding, "msgpack", None)
+    response = await client.get("/api/v1/prices/history?format=msgpack")
+    assert response.status_code == 406
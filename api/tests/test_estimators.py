@@ -0,0 +1,73 @@
+"""
+Tests for robust P2P price estimators and deep book fetching.
+"""
+import json
+
+import httpx
+import pytest
+
+from app.models.ticks import BookLevel
+from app.services import exchange_service
+from app.services.exchange_service import ExchangeService
+from app.utils.estimators import depth_price, trimmed_mean, weighted_median
+
+BOOK = [
+    BookLevel(9.30, 1000),
+    BookLevel(9.31, 2000),
+    BookLevel(9.32, 1500),
+    BookLevel(9.33, 500),
+]
+# A tiny ad far from the market, placed at the top of the book
+SPOOFED = [BookLevel(8.50, 5)] + BOOK
+
+
+def test_weighted_median_ignores_small_outlier():
+    """Test that a small spoofed ad does not move the volume-weighted median."""
+    assert weighted_median(BOOK) == 9.31
+    assert weighted_median(SPOOFED) == 9.31
+    assert weighted_median([]) == 0.0
+
+
+def test_trimmed_mean():
+    """Test that the trimmed mean drops the outer levels and equals the mean without trimming."""
+    levels = [BookLevel(p, 1) for p in (8.0, 9.30, 9.31, 9.32, 9.33, 11.0)]
+    assert trimmed_mean(levels, 0.2) == pytest.approx(9.315)
+    assert trimmed_mean(levels, 0.0) == pytest.approx(sum(l.price for l in levels) / 6)
+
+
+def test_depth_price_respects_order_limits():
+    """Test that the depth price skips ads whose order limits exclude the target amount."""
+    levels = [
+        BookLevel(9.30, 100, min_amount=5000),  # minimum order too large for 200 USDT
+        BookLevel(9.31, 100, max_amount=9.31 * 50),  # at most 50 USDT per order
+        BookLevel(9.32, 1000),
+    ]
+    price = depth_price(levels, 200, ascending=True)
+    assert price == pytest.approx((50 * 9.31 + 150 * 9.32) / 200)
+    # Bids are walked from the highest price
+    assert depth_price(levels[1:], 10, ascending=False) == 9.32
+    assert depth_price([], 10) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_fetches_deep_books_concurrently(monkeypatch):
+    """Test that every book page is fetched concurrently in one refresh."""
+    monkeypatch.setattr(exchange_service.settings, "p2p_book_pages", 3)
+    pages = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "adv/search" in request.url.path:
+            payload = json.loads(request.content)
+            pages.append((payload["tradeType"], payload["page"]))
+            price = "9.30" if payload["tradeType"] == "BUY" else "9.20"
+            ads = [{"adv": {"price": price, "tradableQuantity": "1000"}}] * 20
+            if payload["page"] == 1:
+                ads = [{"adv": {"price": "1.00", "tradableQuantity": "1"}}] + ads
+            return httpx.Response(200, json={"data": ads})
+        return httpx.Response(503)
+
+    service = ExchangeService(transport=httpx.MockTransport(handler))
+    ticks, _ = await service.refresh()
+    binance = next(t for t in ticks if t.exchange == "binance")
+    assert sorted(pages) == [("BUY", 1), ("BUY", 2), ("BUY", 3), ("SELL", 1), ("SELL", 2), ("SELL", 3)]
+    assert (binance.ask, binance.bid) == (9.30, 9.20)
@@ -0,0 +1,110 @@
+"""
+Tests for the internal event bus.
+"""
+import asyncio
+
+import pytest
+
+from app.services.events import EventBus, consume, consume_batches
+from app.utils.metrics import EVENT_DELIVERIES, EVENT_QUEUE_DEPTH
+
+
+async def test_fan_out_to_every_subscriber():
+    """Test that one publish reaches each subscriber once."""
+    bus = EventBus()
+    first = bus.subscribe("first")
+    second = bus.subscribe("second")
+
+    await bus.publish("a")
+
+    assert await first.get() == "a"
+    assert await second.get() == "a"
+    assert len(first) == len(second) == 0
+
+
+async def test_drop_policies():
+    """Test that full non-blocking queues drop the oldest or the newest event."""
+    bus = EventBus()
+    latest = bus.subscribe("latest", maxsize=2, policy="drop_oldest")
+    earliest = bus.subscribe("earliest", maxsize=2, policy="drop_newest")
+
+    for event in range(4):
+        await bus.publish(event)
+
+    assert await latest.get_batch(10) == [2, 3]
+    assert await earliest.get_batch(10) == [0, 1]
+
+
+async def test_blocking_subscriber_applies_back_pressure():
+    """Test that the publisher waits for a full blocking subscriber instead of dropping."""
+    bus = EventBus()
+    slow = bus.subscribe("slow", maxsize=1, policy="block")
+    await bus.publish(1)
+
+    pending = asyncio.create_task(bus.publish(2))
+    await asyncio.sleep(0)
+    assert not pending.done()
+
+    assert await slow.get() == 1
+    await asyncio.wait_for(pending, 1)
+    assert await slow.get() == 2
+
+
+async def test_unsubscribe_and_unknown_policy():
+    """Test that closed subscriptions stop receiving and bad policies are rejected."""
+    bus = EventBus()
+    subscription = bus.subscribe("gone")
+    subscription.close()
+    await bus.publish("a")
+
+    assert len(bus) == 0
+    assert len(subscription) == 0
+    with pytest.raises(ValueError):
+        bus.subscribe("bad", policy="drop_all")
+
+
+async def test_subscribers_sharing_a_name_add_up_in_metrics():
+    """Test that same-named subscribers (streaming clients) sum their depths instead of overwriting."""
+    bus = EventBus()
+    clients = [bus.subscribe("test_shared", maxsize=2, policy="drop_oldest") for _ in range(2)]
+    depth = EVENT_QUEUE_DEPTH.labels("test_shared")
+
+    for event in range(3):
+        await bus.publish(event)
+    assert depth.value == 4
+    assert EVENT_DELIVERIES.labels("test_shared", "dropped").value == 2
+
+    assert await clients[0].get() == 1
+    assert depth.value == 3
+    clients[1].close()
+    assert depth.value == 1
+
+
+async def test_consumers_survive_handler_errors():
+    """Test that consume() keeps going after a failing event and batches drain the queue."""
+    bus = EventBus()
+    seen, batches = [], []
+
+    async def handler(event):
+        if event == "bad":
+            raise RuntimeError("boom")
+        seen.append(event)
+
+    async def batch_handler(events):
+        batches.append(events)
+
+    single = bus.subscribe("single")
+    batched = bus.subscribe("batched")
+    for event in ("a", "bad", "b"):
+        await bus.publish(event)
+
+    tasks = [
+        asyncio.create_task(consume(single, handler)),
+        asyncio.create_task(consume_batches(batched, batch_handler)),
+    ]
+    await asyncio.sleep(0.01)
+    for task in tasks:
+        task.cancel()
+
+    assert seen == ["a", "b"]
+    assert batches == [["a", "bad", "b"]]
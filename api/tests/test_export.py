@@ -0,0 +1,154 @@
+"""
+Tests for streaming history export.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import Database, price_history_service
+from app.models.ticks import Tick
+from app.services.archive import TickArchive
+from app.utils.export import ROLLUP_SCHEMA, TICK_SCHEMA, encode_export, rollup_row
+
+START = datetime(2026, 1, 1)
+
+
+def make_batches(count: int = 3, size: int = 2) -> list[list[Tick]]:
+    return [
+        [
+            Tick("binance", 9.2, 9.25, 9.22, START + timedelta(seconds=5 * (b * size + i)), "realtime")
+            for i in range(size)
+        ]
+        for b in range(count)
+    ]
+
+
+async def aiter_batches(batches):
+    for batch in batches:
+        yield batch
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def test_ndjson_streams_one_chunk_per_batch():
+    """Test that NDJSON output is produced batch by batch, one object per tick."""
+    chunks = [chunk async for chunk in encode_export(aiter_batches(make_batches()), TICK_SCHEMA, "ndjson")]
+
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert len(rows) == 6
+    assert rows[0] == {
+        "exchange": "binance", "bid": 9.2, "ask": 9.25, "last": 9.22,
+        "timestamp": "2026-01-01T00:00:00", "source": "realtime", "pair": "USDT/BOB",
+    }
+
+
+async def test_csv_has_one_header():
+    """Test that CSV output has a single header line, and one even with no rows."""
+    body = await collect(encode_export(aiter_batches(make_batches()), TICK_SCHEMA, "csv"))
+    rows = list(csv.reader(io.StringIO(body.decode())))
+
+    assert rows[0] == [name for name, _ in TICK_SCHEMA]
+    assert len(rows) == 7
+    assert rows[-1][4] == (START + timedelta(seconds=25)).isoformat()
+
+    empty = await collect(encode_export(aiter_batches([]), TICK_SCHEMA, "csv"))
+    assert empty.decode().splitlines() == [",".join(name for name, _ in TICK_SCHEMA)]
+
+
+def test_rollup_rows_are_flat():
+    """Test that rollup documents are flattened in schema order."""
+    row = rollup_row({
+        "timestamp": START,
+        "samples": 12,
+        "best_spread_percent_avg": 0.4,
+        "best_spread_percent_max": 0.6,
+        "best_route": {"buy_exchange": "binance", "sell_exchange": "okx"},
+        "reference": 6.96,
+        "premiums": {"binance": 32.5},
+    })
+    values = dict(zip((name for name, _ in ROLLUP_SCHEMA), row))
+
+    assert len(row) == len(ROLLUP_SCHEMA)
+    assert values["best_buy_exchange"] == "binance"
+    assert values["premium_binance"] == 32.5
+    assert values["premium_okx"] is None
+
+
+async def test_export_endpoint_streams_ticks(client, monkeypatch):
+    """Test that /export streams the selected range from the cursor iterator."""
+    calls = []
+
+    async def iter_history(start, end=None, exchanges=None, batch_size=5000, prefer_secondary=True, pair=None):
+        calls.append((start, end, exchanges))
+        for batch in make_batches():
+            yield batch
+
+    monkeypatch.setattr(Database, "is_connected", classmethod(lambda cls: True))
+    monkeypatch.setattr(price_history_service, "iter_history", iter_history)
+
+    response = await client.get(
+        "/api/v1/export",
+        params={"from": "2026-01-01T00:00:00Z", "to": "2026-01-02T00:00:00Z", "exchanges": "binance", "format": "csv"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    assert len(response.text.splitlines()) == 7
+    assert calls == [(START, START + timedelta(days=1), ["binance"])]
+
+
+async def test_export_endpoint_reads_archived_range(client, mock_exchange_service, monkeypatch, tmp_path):
+    """Test that a range spanning the archive watermark is exported from both tiers."""
+    archived = [
+        Tick("binance", 9.0 + h, 9.5 + h, 9.2 + h, START + timedelta(hours=h), "realtime")
+        for h in range(3)
+    ]
+    hot = [Tick("binance", 20.0, 20.5, 20.2, START + timedelta(days=1, hours=1), "realtime")]
+    archive = TickArchive(str(tmp_path))
+    archive.write_day("binance", START, archived)
+    archive.set_archived_until(START + timedelta(days=1))
+    mock_exchange_service.archives = {archive.pair: archive}
+    calls = []
+
+    async def iter_history(start, end=None, exchanges=None, batch_size=5000, prefer_secondary=True, pair=None):
+        # MongoDB only holds the ticks after the watermark
+        calls.append((start, end))
+        batch = [tick for tick in hot if start <= tick.timestamp < end]
+        if batch:
+            yield batch
+
+    monkeypatch.setattr(Database, "is_connected", classmethod(lambda cls: True))
+    monkeypatch.setattr(price_history_service, "iter_history", iter_history)
+
+    response = await client.get(
+        "/api/v1/export",
+        params={"from": "2026-01-01T01:00:00", "to": "2026-01-03T00:00:00", "format": "ndjson"},
+    )
+
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["bid"] for row in rows] == [10.0, 11.0, 20.0]
+    assert calls[-1] == (START + timedelta(days=1), START + timedelta(days=2))
+
+
+@pytest.mark.parametrize(
+    "params, status",
+    [
+        ({"dataset": "orders"}, 400),
+        ({"format": "xml"}, 400),
+        ({"exchanges": "kraken"}, 400),
+        ({"from": "2026-01-02T00:00:00", "to": "2026-01-01T00:00:00"}, 400),
+        ({}, 503),
+    ],
+)
+async def test_export_endpoint_rejects_bad_requests(client, params, status):
+    """Test validation errors and the unavailable-storage response."""
+    response = await client.get("/api/v1/export", params=params)
+    assert response.status_code == status
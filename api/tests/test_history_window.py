@@ -0,0 +1,135 @@
+"""
+Tests for explicit history windows, buckets and incremental `since` fetches.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.database import price_history_service
+from app.models.ticks import Tick
+from app.services.exchange_service import ExchangeService, floor_timestamp
+
+T0 = datetime(2024, 1, 1, 12, 0)
+
+
+def _ticks() -> list[Tick]:
+    # binance every 30 s for 10 minutes, rising by 0.01 per tick
+    return [
+        Tick("binance", 0.0, 0.0, round(9.0 + i * 0.01, 2), T0 + timedelta(seconds=30 * i))
+        for i in range(20)
+    ]
+
+
+def _fake_history(ticks: list[Tick], calls: list):
+    async def get_history(exchange=None, hours=24, start=None, end=None, exchanges=None, pair=None):
+        calls.append((exchange, start, end))
+        until = end or datetime.max
+        wanted = [exchange] if exchange else exchanges
+        return [
+            t for t in ticks
+            if (not wanted or t.exchange in wanted) and start <= t.timestamp < until
+        ]
+    return patch.object(price_history_service, "get_history", get_history)
+
+
+def test_floor_timestamp():
+    """Test that timestamps are floored to the start of their bucket."""
+    ts = datetime(2024, 1, 1, 12, 7, 31, 500)
+    assert floor_timestamp(ts, timedelta(minutes=5)) == datetime(2024, 1, 1, 12, 5)
+    assert floor_timestamp(ts, timedelta(days=1)) == datetime(2024, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_bucketed_exchange_history():
+    """Test that one exchange history is read for the window and bucketed into OHLC points."""
+    calls = []
+    with _fake_history(_ticks(), calls):
+        series = await ExchangeService().get_history_series(
+            "24h", "binance", start=T0, end=T0 + timedelta(minutes=10), bucket="5m"
+        )
+    assert calls == [("binance", T0, T0 + timedelta(minutes=10))]
+    assert [p.timestamp for p in series.points] == [T0, T0 + timedelta(minutes=5)]
+    first = series.points[0]
+    assert (first.open, first.high, first.low, first.close) == (9.0, 9.09, 9.0, 9.09)
+
+
+@pytest.mark.asyncio
+async def test_since_returns_only_newer_buckets():
+    """Test that `since` re-sends the partial bucket and newer ones only."""
+    calls = []
+    with _fake_history(_ticks(), calls):
+        series = await ExchangeService().get_history_series(
+            "24h", "binance", end=T0 + timedelta(minutes=10), bucket="1m",
+            since=T0 + timedelta(minutes=8, seconds=30),
+        )
+    # The partial 12:08 bucket is re-sent along with newer ones
+    assert calls[0][1] == T0 + timedelta(minutes=8)
+    assert [p.timestamp for p in series.points] == [T0 + timedelta(minutes=8), T0 + timedelta(minutes=9)]
+
+
+@pytest.mark.asyncio
+async def test_history_window_params(client, mock_exchange_service):
+    """Test that from/to/bucket reach the service and bad windows are rejected."""
+    response = await client.get(
+        "/api/v1/prices/history?from=2024-01-01T12:00:00Z&to=2024-01-02T00:00:00Z&bucket=1h"
+    )
+    assert response.status_code == 200
+    kwargs = mock_exchange_service.get_price_history.await_args.kwargs
+    assert kwargs["start"] == T0
+    assert kwargs["end"] == datetime(2024, 1, 2)
+    assert kwargs["bucket"] == "1h"
+
+    response = await client.get("/api/v1/prices/history?from=2024-01-02T00:00:00&to=2024-01-01T00:00:00")
+    assert response.status_code == 400
+
+    response = await client.get("/api/v1/prices/history?bucket=7m")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_all_exchanges_reference_as_of_join():
+    """Test that the all-exchanges series joins each bucket with the last known BCB reference."""
+    calls = []
+    ticks = [
+        Tick("bcb", 0.0, 0.0, 6.96, T0 + timedelta(seconds=30)),
+        Tick("binance", 0.0, 0.0, 9.30, T0 + timedelta(seconds=40)),
+        Tick("okx", 0.0, 0.0, 9.20, T0 + timedelta(seconds=50)),
+        # No BCB tick in the next two minutes: the last known value carries over
+        Tick("binance", 0.0, 0.0, 9.32, T0 + timedelta(minutes=1, seconds=10)),
+        Tick("bcb", 0.0, 0.0, 6.97, T0 + timedelta(minutes=2, seconds=5)),
+        Tick("binance", 0.0, 0.0, 9.34, T0 + timedelta(minutes=2, seconds=10)),
+    ]
+    with _fake_history(ticks, calls):
+        series = await ExchangeService().get_history_series("1h", start=T0, end=T0 + timedelta(minutes=3))
+    assert len(calls) == 1
+    assert [p.close for p in series.points] == [9.25, 9.32, 9.34]
+    assert [p.reference_close for p in series.points] == [6.96, 6.96, 6.97]
+
+
+@pytest.mark.asyncio
+async def test_history_compare_shared_axis():
+    """Test that compared exchanges are read in one query and aligned on one timestamp axis."""
+    calls = []
+    ticks = [
+        Tick("binance", 0.0, 0.0, 9.30, T0 + timedelta(seconds=10)),
+        Tick("okx", 0.0, 0.0, 9.20, T0 + timedelta(seconds=20)),
+        Tick("binance", 0.0, 0.0, 9.35, T0 + timedelta(seconds=50)),
+        Tick("binance", 0.0, 0.0, 9.31, T0 + timedelta(minutes=5, seconds=10)),
+    ]
+    with _fake_history(ticks, calls):
+        result = await ExchangeService().get_history_compare(
+            ["binance", "okx"], "1h", start=T0, end=T0 + timedelta(minutes=10), bucket="5m"
+        )
+    assert len(calls) == 1
+    assert result.timestamps == [T0, T0 + timedelta(minutes=5)]
+    binance, okx = result.series
+    assert (binance.open, binance.high, binance.close) == ([9.30, 9.31], [9.35, 9.31], [9.35, 9.31])
+    assert okx.close == [9.20, None]
+
+
+@pytest.mark.asyncio
+async def test_history_compare_rejects_unknown_exchange(client):
+    """Test that unknown exchanges are rejected with 400."""
+    response = await client.get("/api/v1/prices/history/compare?exchanges=binance,nope")
+    assert response.status_code == 400
@@ -0,0 +1,109 @@
+"""
+Tests for technical indicators and the indicators endpoint.
+"""
+import math
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.config import get_settings
+from app.database import price_history_service
+from app.models import IndicatorsResponse
+from app.models.ticks import Tick
+from app.services.exchange_service import ExchangeService, floor_timestamp
+from app.utils.indicators import bollinger, ema, rsi, sma
+
+CLOSES = [9.2 + 0.05 * math.sin(i / 3) + 0.001 * i for i in range(60)]
+
+
+def test_sma_and_bollinger_match_windows():
+    """Test that the prefix-sum SMA and bands match a per-window computation."""
+    bands = bollinger(CLOSES, 10, k=2.0)
+    averages = sma(CLOSES, 10)
+
+    assert averages[:9] == [None] * 9 and bands["upper"][8] is None
+    for i in range(9, len(CLOSES)):
+        window = CLOSES[i - 9:i + 1]
+        mean = sum(window) / 10
+        std = math.sqrt(sum((x - mean) ** 2 for x in window) / 10)
+        assert averages[i] == pytest.approx(mean, abs=1e-4)
+        assert bands["middle"][i] == averages[i]
+        assert bands["upper"][i] == pytest.approx(mean + 2 * std, abs=1e-4)
+        assert bands["lower"][i] == pytest.approx(mean - 2 * std, abs=1e-4)
+
+
+def test_ema_and_rsi():
+    expected = sum(CLOSES[:5]) / 5
+    for value in CLOSES[5:]:
+        expected += (value - expected) / 3
+    assert ema(CLOSES, 5)[-1] == pytest.approx(expected, abs=1e-4)
+
+    assert rsi([1.0 + i for i in range(20)], 14)[-1] == 100.0
+    assert rsi([20.0 - i for i in range(20)], 14)[-1] == 0.0
+    assert rsi([5.0] * 20, 14)[14:] == [50.0] * 6
+    assert rsi([5.0] * 14, 14) == [None] * 14
+
+
+async def test_service_reads_warm_up_and_caches_per_params():
+    """Test that the warm-up buckets are trimmed and repeated requests reuse the series."""
+    now = floor_timestamp(datetime.utcnow(), timedelta(minutes=1))
+    ticks = [Tick("binance", 0.0, 0.0, 9.0 + 0.01 * i, now - timedelta(minutes=i)) for i in range(120, 0, -1)]
+    calls = []
+
+    async def get_history(exchange=None, hours=24, start=None, end=None, exchanges=None, pair=None):
+        calls.append((start, end))
+        return [t for t in ticks if start <= t.timestamp < end]
+
+    service = ExchangeService()
+    with patch.object(price_history_service, "get_history", get_history):
+        first = await service.get_indicators([("sma", {"period": 10})], "1h", "binance", "1m")
+        again = await service.get_indicators([("sma", {"period": 10})], "1h", "binance", "1m")
+
+    assert len(calls) == 1
+    # Read 10 buckets before the hour, so the first returned point already has a value
+    assert calls[0][1] - calls[0][0] == timedelta(minutes=70)
+    assert first.timestamps[0] >= calls[0][1] - timedelta(hours=1)
+    assert first.indicators[0].values["value"][0] is not None
+    assert again.indicators == first.indicators
+
+
+async def test_cache_stays_bounded():
+    """Test that distinct parameter sets do not grow the cache past its limit and expired keys are purged."""
+    now = floor_timestamp(datetime.utcnow(), timedelta(minutes=1))
+    ticks = [Tick("binance", 0.0, 0.0, 9.0 + 0.01 * i, now - timedelta(minutes=i)) for i in range(120, 0, -1)]
+
+    async def get_history(exchange=None, hours=24, start=None, end=None, exchanges=None, pair=None):
+        return [t for t in ticks if start <= t.timestamp < end]
+
+    service = ExchangeService()
+    with patch.object(price_history_service, "get_history", get_history), \
+            patch.object(get_settings(), "cache_max_entries", 4):
+        for period in range(2, 12):
+            await service.get_indicators([("sma", {"period": period}), ("rsi", {"period": 3})], "1h", "binance", "1m")
+        assert len(service._cache) == len(service._cache_time) == 4
+        # The most recent series is kept together with its indicator values
+        series, computed = service._cache[("indicators", "USDT/BOB", "1h", "binance", "1m", 11)]
+        assert set(computed) == {("sma", (("period", 11),)), ("rsi", (("period", 3),))}
+
+        for key in service._cache_time:
+            service._cache_time[key] -= timedelta(hours=1)
+        service._set_cache("fresh", 1)
+        assert list(service._cache) == ["fresh"]
+
+
+async def test_indicators_endpoint(client, mock_exchange_service):
+    """Test parameter handling and validation of /stats/indicators."""
+    mock_exchange_service.get_indicators = AsyncMock(return_value=IndicatorsResponse(
+        exchange="all", interval="24h", bucket="5m", timestamps=[], close=[], indicators=[],
+    ))
+
+    response = await client.get("/api/v1/stats/indicators?indicators=rsi,bollinger&period=30&k=2.5")
+    assert response.status_code == 200
+    mock_exchange_service.get_indicators.assert_awaited_with(
+        [("rsi", {"period": 30}), ("bollinger", {"period": 30, "k": 2.5})], "24h", None, None, "USDT/BOB"
+    )
+
+    for query in ("indicators=macd", "bucket=2m", "exchange=nope", "period=1"):
+        response = await client.get(f"/api/v1/stats/indicators?{query}")
+        assert response.status_code in (400, 422), query
@@ -0,0 +1,78 @@
+"""
+Tests for structured, rate-limited logging.
+"""
+import json
+import logging
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.utils.logs import JsonFormatter, RateLimitFilter, level_number
+
+
+def _record(msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    """Test that records render as JSON with lazy args and extras."""
+    line = JsonFormatter().format(_record("Stored %s prices", 6, exchange="binance"))
+    payload = json.loads(line)
+
+    assert payload["msg"] == "Stored 6 prices"
+    assert payload["level"] == "INFO"
+    assert payload["exchange"] == "binance"
+
+
+def test_rate_limit_filter_per_message_key():
+    """Test that each message template is limited independently."""
+    limiter = RateLimitFilter(burst=2, window=60.0)
+
+    allowed = [limiter.filter(_record("Binance error: %s", i)) for i in range(5)]
+    assert allowed == [True, True, False, False, False]
+
+    # A different template is not affected
+    assert limiter.filter(_record("OKX error: %s", 1))
+
+
+def test_rate_limit_filter_reports_suppressed_count():
+    """Test that the first record of a new window carries the dropped count."""
+    limiter = RateLimitFilter(burst=1, window=10.0)
+    first = _record("tick")
+    limiter.filter(first)
+    for _ in range(3):
+        limiter.filter(_record("tick"))
+
+    later = _record("tick")
+    later.created = first.created + 11
+    assert limiter.filter(later)
+    assert later.suppressed == 3
+
+
+def test_rate_limit_filter_exempts_errors_and_prunes_keys():
+    """Test that errors always pass and keys of past windows are evicted."""
+    limiter = RateLimitFilter(burst=1, window=10.0)
+    errors = [_record("Fetch error: %s", i) for i in range(3)]
+    for record in errors:
+        record.levelno = logging.ERROR
+    assert all(limiter.filter(record) for record in errors)
+
+    first = _record("Stored %s prices", 1)
+    limiter.filter(first)
+    later = _record("Other %s", 2)
+    later.created = first.created + 25
+    limiter.filter(later)
+    assert list(limiter._state) == [("app.test", "Other %s")]
+
+
+def test_unknown_exempt_level_is_a_config_error():
+    """Test that an unknown exempt level is rejected instead of breaking the filter."""
+    assert level_number("warning") == logging.WARNING
+    with pytest.raises(ValueError, match="Unknown log level"):
+        level_number("ERR")
+    with pytest.raises(ValidationError):
+        Settings(log_rate_limit_exempt_level="ERR")
+    assert Settings(log_rate_limit_exempt_level="warning").log_rate_limit_exempt_level == "WARNING"
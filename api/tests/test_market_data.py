@@ -0,0 +1,58 @@
+"""
+Tests for the synthetic market data generator and tick replay.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.market_data import (
+    MarketDataGenerator,
+    read_ticks_ndjson,
+    replay_ticks,
+    write_ticks_ndjson,
+)
+
+START = datetime(2026, 1, 1)
+
+
+def test_generator_is_deterministic():
+    """Test that the same seed yields identical ticks regardless of batch size."""
+    end = START + timedelta(hours=1)
+    first = MarketDataGenerator(seed=7).generate(START, end)
+    second = [
+        doc
+        for batch in MarketDataGenerator(seed=7).batches(START, end, batch_size=100)
+        for doc in batch
+    ]
+
+    assert first == second
+    assert first != MarketDataGenerator(seed=8).generate(START, end)
+
+
+def test_generator_emits_one_tick_per_exchange_per_refresh():
+    """Test tick count, ordering and bid/ask consistency."""
+    generator = MarketDataGenerator(tick_seconds=5)
+    docs = generator.generate(START, START + timedelta(minutes=10))
+
+    assert len(docs) == 120 * len(generator.profiles)
+    assert [t.timestamp for t in docs] == sorted(t.timestamp for t in docs)
+    assert all(t.bid <= t.last <= t.ask for t in docs)
+
+
+@pytest.mark.asyncio
+async def test_replay_groups_ticks_into_snapshots(tmp_path):
+    """Test that a recording replays one snapshot per refresh."""
+    path = str(tmp_path / "ticks.ndjson")
+    generator = MarketDataGenerator(tick_seconds=5)
+    written = write_ticks_ndjson(path, generator.batches(START, START + timedelta(minutes=1)))
+
+    snapshots = []
+
+    async def collect(snapshot):
+        snapshots.append(snapshot)
+
+    count = await replay_ticks(read_ticks_ndjson(path), collect, speed=0)
+
+    assert count == 12
+    assert sum(len(s) for s in snapshots) == written
+    assert all(len({t.timestamp for t in s}) == 1 for s in snapshots)
@@ -0,0 +1,43 @@
+"""
+Tests for metrics collection and the /metrics endpoint.
+"""
+import pytest
+
+from app.utils.metrics import Registry, Histogram, Counter
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram exposition renders cumulative bucket counts."""
+    registry = Registry()
+    histogram = Histogram(
+        "test_latency_seconds", "Test latency.", ["source"],
+        buckets=(0.1, 1.0), registry=registry,
+    )
+
+    child = histogram.labels("binance")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{source="binance",le="0.1"} 2' in text
+    assert 'test_latency_seconds_bucket{source="binance",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{source="binance",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{source="binance"} 4' in text
+
+
+def test_duplicate_metric_names_rejected():
+    """Test that registering the same metric name twice fails."""
+    with pytest.raises(ValueError):
+        Counter("dollar_tracker_http_requests_total", "Duplicate.")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
+    """Test that /metrics exposes request metrics in Prometheus format."""
+    await client.get("/api/v1/prices/current")
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE dollar_tracker_http_request_seconds histogram" in response.text
+    assert 'route="/api/v1/prices/current"' in response.text
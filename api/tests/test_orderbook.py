@@ -0,0 +1,80 @@
+"""
+Tests for order book prefix sums and the quote endpoint.
+"""
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.models import QuoteResponse
+from app.models.ticks import BookLevel
+from app.services import ExchangeService
+from app.services.orderbook import BookSide, OrderBooks
+from app.utils.estimators import depth_price
+
+T0 = datetime(2024, 1, 1, 12, 0)
+ASKS = [
+    BookLevel(9.32, 300),
+    BookLevel(9.30, 100),
+    BookLevel(9.31, 500, max_amount=9.31 * 200),  # capped at 200 USDT per order
+    BookLevel(9.29, 1000, min_amount=50_000),  # minimum above its capacity: unfillable
+]
+
+
+def test_book_side_quote():
+    """Test fills against one book side, including partial fills beyond its depth."""
+    side = BookSide(ASKS, ascending=True)
+    assert side.prices == [9.30, 9.31, 9.32]
+    assert side.depth == 600
+
+    fill = side.quote(250)
+    assert fill.complete and fill.levels == 2 and fill.worst_price == 9.31
+    assert fill.cost == pytest.approx(100 * 9.30 + 150 * 9.31)
+
+    thin = side.quote(1000)
+    assert not thin.complete and thin.filled == 600
+
+
+def test_quote_matches_linear_walk():
+    """Test that the prefix-sum quote matches walking the book level by level."""
+    levels = [BookLevel(9.2 + i * 0.01, 10 + i * 7) for i in range(40)]
+    side = BookSide(levels, ascending=True)
+    for amount in (1, 10, 95, 500, 2000):
+        assert side.quote(amount).average_price == pytest.approx(depth_price(levels, amount))
+
+
+@pytest.mark.asyncio
+async def test_service_quote_picks_best_complete_fill():
+    """Test that the best quote is the cheapest complete fill when buying and the highest when selling."""
+    service = ExchangeService()
+    service.books.update("binance", ASKS, [BookLevel(9.20, 1000)], T0)
+    service.books.update("okx", [BookLevel(9.305, 1000)], [BookLevel(9.25, 100)], T0)
+
+    buy = await service.get_quote(250, "buy")
+    assert buy.best.exchange == "okx"
+    sell = await service.get_quote(500, "sell")
+    assert sell.best.exchange == "binance"  # okx cannot fill 500
+    assert [q.complete for q in sell.quotes] == [True, False]
+
+
+def test_snapshot_cadence():
+    """Test that depth snapshots are due at most once per interval."""
+    books = OrderBooks()
+    assert not books.snapshot_due(60)
+    books.update("binance", ASKS, [], T0)
+    assert books.snapshot_due(60)
+    assert not books.snapshot_due(60)
+    doc = books.snapshot_documents()[0]
+    assert doc["asks"]["amount"] == [100, 200, 300]
+
+
+@pytest.mark.asyncio
+async def test_quote_endpoint(client, mock_exchange_service):
+    """Test that /prices/quote passes its parameters to the service and validates them."""
+    mock_exchange_service.get_quote = AsyncMock(return_value=QuoteResponse(amount=5000, side="buy", quotes=[]))
+    response = await client.get("/api/v1/prices/quote?amount=5000")
+    assert response.status_code == 200
+    mock_exchange_service.get_quote.assert_awaited_with(5000, "buy", None, "USDT/BOB")
+
+    assert (await client.get("/api/v1/prices/quote?amount=0")).status_code == 422
+    assert (await client.get("/api/v1/prices/quote?amount=5&side=hold")).status_code == 400
@@ -0,0 +1,126 @@
+"""
+Tests for multi-pair fetching, caching, storage queries and the pair parameter.
+"""
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import httpx
+
+from app.config import DEFAULT_PAIR, Settings, get_settings
+from app.database import pair_query
+from app.models.ticks import Tick
+from app.services import ExchangeService
+from app.utils.tickcodec import TickBuffer
+
+PRICES = {("USDT", "BOB"): 9.3, ("USDC", "BOB"): 9.28, ("USDT", "ARS"): 1180.0}
+
+
+def upstream(request: httpx.Request) -> httpx.Response:
+    """One ad per book side, priced by the requested asset/fiat; AirTM is the only DolarBlue source up."""
+    if request.url.path.endswith("/adv/search"):
+        payload = json.loads(request.content)
+        ads = [{"adv": {"price": str(PRICES[payload["asset"], payload["fiat"]]), "tradableQuantity": "100"}}]
+        return httpx.Response(200, json={"data": ads if payload["page"] == 1 else []})
+    if request.url.path.endswith("/tradingOrders/books"):
+        params = request.url.params
+        price = PRICES[params["baseCurrency"], params["quoteCurrency"]]
+        return httpx.Response(200, json={"code": "0", "data": {params["side"]: [{"price": str(price)}]}})
+    if request.url.path.endswith("/fetch/airtm"):
+        return httpx.Response(200, json={"data": {"addValue": 9.4, "withdrawValue": 9.3}})
+    return httpx.Response(503)
+
+
+def test_pairs_list():
+    assert Settings(pairs=" usdt/bob, USDC/BOB,usdt/bob ").pairs_list == ["USDT/BOB", "USDC/BOB"]
+    assert Settings(pairs="").primary_pair == DEFAULT_PAIR
+
+
+async def test_refresh_fetches_and_caches_every_pair():
+    """Test that one refresh fetches all pairs and caches one response per pair."""
+    with patch.object(get_settings(), "pairs", "USDT/BOB,USDC/BOB,USDT/ARS"):
+        service = ExchangeService(transport=httpx.MockTransport(upstream))
+    ticks, primary = await service.refresh()
+
+    assert primary.pair == "USDT/BOB" and primary.base_currency == "USD" and primary.quote_currency == "BOB"
+    assert {(t.pair, t.exchange) for t in ticks} == {
+        ("USDT/BOB", "binance"), ("USDT/BOB", "okx"), ("USDT/BOB", "airtm"),
+        ("USDC/BOB", "binance"), ("USDC/BOB", "okx"),
+        ("USDT/ARS", "binance"), ("USDT/ARS", "okx"),
+    }
+    # Every tick of a refresh carries the same timestamp
+    assert len({t.timestamp for t in ticks}) == 1
+
+    ars = await service.get_current_prices("USDT/ARS")
+    assert ars.quote_currency == "ARS" and ars.average == 1180.0
+    assert await service.get_current_prices() is primary
+    # Books are kept per pair for quotes
+    quote = await service.get_quote(10, "buy", pair="USDC/BOB")
+    assert quote.pair == "USDC/BOB" and quote.best.average_price == 9.28
+    assert quote.best.name == "Binance P2P (USDC)"
+    assert service.pair_books["USDC/BOB"].snapshot_documents()[0]["pair"] == "USDC/BOB"
+
+
+async def test_mock_ticks_carry_the_primary_pair():
+    """Test that the mock fallback of a non-default primary pair is stamped with that pair."""
+    with patch.object(get_settings(), "pairs", "USDC/BOB"):
+        service = ExchangeService(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    ticks, primary = await service.refresh()
+
+    assert [(t.pair, t.source) for t in ticks] == [("USDC/BOB", "mock")]
+    assert primary.prices[0].name == "Binance P2P (USDC)"
+
+
+async def test_cached_dolarblue_quotes_are_not_republished():
+    """Test that a DolarBlue quote kept from an earlier refresh is served but not returned for storage."""
+    service = ExchangeService(transport=httpx.MockTransport(upstream))
+    first, _ = await service.refresh()
+    airtm = next(t for t in first if t.exchange == "airtm")
+
+    def airtm_down(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/fetch/airtm"):
+            return httpx.Response(503)
+        return upstream(request)
+
+    service._transport = httpx.MockTransport(airtm_down)
+    second, primary = await service.refresh()
+
+    assert "airtm" not in {t.exchange for t in second}
+    served = next(p for p in primary.prices if p.exchange == "airtm")
+    assert served.updated_at == airtm.timestamp
+
+
+def test_pair_query_matches_legacy_documents():
+    """Test that history stored without a pair field belongs to the default pair only."""
+    assert pair_query(DEFAULT_PAIR) == {"$in": [DEFAULT_PAIR, None]}
+    assert pair_query("USDT/ARS") == "USDT/ARS"
+    assert Tick.from_document({"exchange": "okx", "timestamp": datetime(2026, 1, 1)}).pair == DEFAULT_PAIR
+
+
+def test_tick_buffer_keeps_pairs_apart():
+    """Test that sealed blocks remember the pair of their ticks."""
+    t0 = datetime(2026, 1, 1)
+    buffer = TickBuffer(maxlen=100, block_size=4)
+    ticks = [
+        Tick("binance", 9.2, 9.3, 9.25, t0 + timedelta(seconds=i), "realtime", pair)
+        for i in range(6)
+        for pair in ("USDT/BOB", "USDT/ARS")
+    ]
+    buffer.extend(ticks)
+
+    assert sorted(buffer) == sorted(ticks)
+
+
+async def test_pair_parameter(client, mock_exchange_service):
+    """Test that routes pass the requested pair and reject pairs that are not configured."""
+    with patch.object(get_settings(), "pairs", "USDT/BOB,USDT/ARS"):
+        response = await client.get("/api/v1/prices/current?pair=usdt/ars")
+        assert response.status_code == 200
+        mock_exchange_service.get_current_prices.assert_awaited_with("USDT/ARS")
+
+        await client.get("/api/v1/prices/current")
+        mock_exchange_service.get_current_prices.assert_awaited_with("USDT/BOB")
+
+        response = await client.get("/api/v1/prices/current?pair=EUR/BOB")
+        assert response.status_code == 400
+        assert "USDT/ARS" in response.json()["detail"]
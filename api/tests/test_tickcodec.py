@@ -0,0 +1,61 @@
+"""
+Tests for the compressed tick block encoding and buffer.
+"""
+import json
+from datetime import datetime, timedelta
+
+from app.models.ticks import Tick
+from app.services.market_data import MarketDataGenerator
+from app.utils.tickcodec import TickBuffer, decode_block, decode_columns, encode_block
+
+START = datetime(2026, 1, 1)
+
+
+def _exchange_ticks(exchange: str = "binance", hours: int = 24) -> list[Tick]:
+    ticks = MarketDataGenerator(seed=9).generate(START, START + timedelta(hours=hours))
+    return [t for t in ticks if t.exchange == exchange]
+
+
+def test_round_trip_is_exact():
+    """Test that blocks decode to the very same ticks, including odd floats and microseconds."""
+    ticks = _exchange_ticks(hours=1)
+    assert decode_block(encode_block(ticks)) == ticks
+
+    jittered = [
+        Tick("okx", 9.20 + i / 100, 9.25, 9.123456789 + i, START + timedelta(seconds=5 * i, microseconds=137 * i),
+             "realtime" if i % 7 else "api")
+        for i in range(200)
+    ]
+    assert decode_block(encode_block(jittered)) == jittered
+
+    for few in ([], jittered[:1], jittered[:2]):
+        assert decode_block(encode_block(few)) == few
+
+
+def test_regular_ticks_compress_well():
+    """Test that a day of 5 s ticks is 10x+ smaller than the same ticks as JSON documents."""
+    ticks = _exchange_ticks()
+    documents = sum(
+        len(json.dumps({**t._asdict(), "timestamp": t.timestamp.isoformat()})) for t in ticks
+    )
+    block = encode_block(ticks)
+
+    assert documents / len(block) > 10
+    columns = decode_columns(block)
+    assert columns["exchange"] == "binance"
+    assert len(columns["timestamp"]) == len(ticks)
+
+
+def test_buffer_is_bounded_and_ordered():
+    """Test that the buffer drops the oldest blocks and iterates in timestamp order."""
+    ticks = MarketDataGenerator(seed=4).generate(START, START + timedelta(hours=2))
+    buffer = TickBuffer(maxlen=1000, block_size=100)
+    buffer.extend(ticks)
+
+    kept = list(buffer)
+    assert len(kept) == len(buffer)
+    assert 1000 - 100 < len(buffer) <= 1000 + 100 * len({t.exchange for t in ticks})
+    assert [t.timestamp for t in kept] == sorted(t.timestamp for t in kept)
+    assert set(kept) <= set(ticks)
+    assert kept[-1].timestamp == ticks[-1].timestamp
+    assert buffer.nbytes < sum(len(repr(t)) for t in kept)
@@ -0,0 +1,96 @@
+"""
+Tests for the warm restart state file.
+"""
+import json
+from datetime import datetime, timedelta
+
+from app.models.schemas import BestPrice, CurrentPricesResponse, ExchangePrice
+from app.models.ticks import Tick
+from app.services.exchange_service import ExchangeService
+from app.services.warm_state import load_warm_state, save_warm_state
+
+
+def make_response() -> CurrentPricesResponse:
+    now = datetime.utcnow()
+    return CurrentPricesResponse(
+        timestamp=now,
+        base_currency="USD",
+        quote_currency="BOB",
+        prices=[
+            ExchangePrice(
+                exchange="binance", name="Binance P2P", bid=9.20, ask=9.25, last=9.22,
+                change_24h=0.5, updated_at=now, volume_24h=None,
+            ),
+        ],
+        average=9.22,
+        best_buy=BestPrice(exchange="binance", price=9.20),
+        best_sell=BestPrice(exchange="binance", price=9.25),
+        source="Binance P2P",
+    )
+
+
+def make_ticks() -> list[Tick]:
+    start = datetime(2026, 1, 1)
+    ticks = []
+    for i in range(3):
+        ts = start + timedelta(seconds=5 * i)
+        ticks.append(Tick("binance", 9.20 + i / 100, 9.25 + i / 100, 9.22 + i / 100, ts, "realtime"))
+        ticks.append(Tick("okx", 9.30, 9.35, 9.32, ts, "realtime"))
+    return ticks
+
+
+def test_round_trip(tmp_path):
+    """Test that saved prices and ticks load back unchanged."""
+    path = str(tmp_path / "state" / "warm.json")
+    response, ticks = make_response(), make_ticks()
+
+    assert save_warm_state(path, response, ticks) == len(ticks)
+    loaded = load_warm_state(path, max_age=60)
+
+    assert loaded is not None
+    assert loaded[0] == response
+    assert loaded[1] == ticks
+
+
+def test_stale_missing_or_corrupt_state_is_ignored(tmp_path):
+    """Test that old, missing and unreadable files are not restored."""
+    path = tmp_path / "warm.json"
+    assert load_warm_state(str(path), max_age=60) is None
+
+    save_warm_state(str(path), make_response(), make_ticks())
+    state = json.loads(path.read_text())
+    state["saved_at"] = (datetime.utcnow() - timedelta(hours=2)).isoformat()
+    path.write_text(json.dumps(state))
+    assert load_warm_state(str(path), max_age=3600) is None
+
+    path.write_text("{not json")
+    assert load_warm_state(str(path), max_age=3600) is None
+
+
+def test_restore_warms_cache_and_analytics():
+    """Test that restoring serves the saved prices and rebuilds the spread state."""
+    service = ExchangeService()
+    response, ticks = make_response(), make_ticks()
+
+    service.restore(response, ticks)
+
+    assert service.latest_prices() == response
+    assert list(service.recent_ticks) == ticks
+    route = service.spreads.best_route()
+    assert route is not None
+    assert (route.buy_exchange, route.sell_exchange) == ("binance", "okx")
+
+
+def test_restore_regroups_refresh_snapshots():
+    """Test that ticks stamped microseconds apart within one refresh are replayed as one snapshot."""
+    service = ExchangeService()
+    ticks = [
+        tick._replace(timestamp=tick.timestamp + timedelta(microseconds=10 * i))
+        for i, tick in enumerate(make_ticks())
+    ]
+    snapshots = []
+    service.spreads.update = lambda snapshot: snapshots.append([t.exchange for t in snapshot])
+
+    service.restore(make_response(), ticks)
+
+    assert snapshots == [["binance", "okx"]] * 3
@@ -0,0 +1,76 @@
+"""
+Tests for the bounded CPU worker pool.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.workers import WorkerPool, WorkerPoolFull
+from app.utils.metrics import WORKER_POOL_ACTIVE, WORKER_POOL_QUEUE_DEPTH, WORKER_POOL_WAIT_SECONDS
+
+
+async def test_offloads_large_jobs_only():
+    """Test that jobs run on a worker thread unless they are below min_items."""
+    pool = WorkerPool(workers=1, max_queue=1, min_items=100, name="test_offload")
+    loop_thread = threading.get_ident()
+
+    assert await pool.run(threading.get_ident, size=10) == loop_thread
+    assert await pool.run(threading.get_ident, size=100) != loop_thread
+    assert await pool.run(sorted, [3, 1, 2], reverse=True) == [3, 2, 1]
+    with pytest.raises(ZeroDivisionError):
+        await pool.run(lambda: 1 / 0)
+    pool.shutdown()
+
+
+async def test_bounded_queue_rejects_and_reports_depth():
+    """Test that jobs beyond workers + max_queue are rejected while the loop stays free."""
+    pool = WorkerPool(workers=1, max_queue=1, name="test_bounded")
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    running = asyncio.create_task(pool.run(blocked))
+    await asyncio.to_thread(started.wait, 5)
+    waiting = asyncio.create_task(pool.run(lambda: "queued"))
+    await asyncio.sleep(0)
+
+    assert (pool.active, pool.queued) == (1, 1)
+    assert WORKER_POOL_QUEUE_DEPTH.labels("test_bounded").value == 1
+    with pytest.raises(WorkerPoolFull):
+        await pool.run(lambda: "rejected")
+
+    # A waiting job whose caller goes away frees its slot without running
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert pool.queued == 0
+
+    release.set()
+    assert await running == "done"
+    assert (pool.active, pool.queued) == (0, 0)
+    # Worker-side metric updates run on the loop, ahead of the job's result
+    assert WORKER_POOL_ACTIVE.labels("test_bounded").value == 0
+    assert WORKER_POOL_WAIT_SECONDS.labels("test_bounded").count == 1
+    pool.shutdown()
+
+
+async def test_full_pool_answers_503(client, mock_exchange_service):
+    pool = WorkerPool(workers=1, max_queue=0, min_items=0, name="test_503")
+    mock_exchange_service.workers = pool
+    release = threading.Event()
+    blocked = asyncio.create_task(pool.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+
+    response = await client.get("/api/v1/prices/history")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    release.set()
+    await blocked
+    assert (await client.get("/api/v1/prices/history")).status_code == 200
+    pool.shutdown()
@@ -5,9 +5,28 @@ export const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:80
 
 export const API_ENDPOINTS = {
     PRICES_CURRENT: `${API_BASE_URL}/api/v1/prices/current`,
+    PRICES_STREAM: `${API_BASE_URL}/api/v1/prices/stream`,
+    PRICES_QUOTE: `${API_BASE_URL}/api/v1/prices/quote`,
     PRICES_HISTORY: `${API_BASE_URL}/api/v1/prices/history`,
+    PRICES_HISTORY_COMPARE: `${API_BASE_URL}/api/v1/prices/history/compare`,
+    DASHBOARD: `${API_BASE_URL}/api/v1/dashboard`,
     STATS_VOLATILITY: `${API_BASE_URL}/api/v1/stats/volatility`,
+    STATS_INDICATORS: `${API_BASE_URL}/api/v1/stats/indicators`,
+    ALERTS: `${API_BASE_URL}/api/v1/alerts`,
+    ALERTS_STREAM: `${API_BASE_URL}/api/v1/alerts/stream`,
     HEALTH: `${API_BASE_URL}/health`,
 };
 
+// Upper bound on chart points requested from the history endpoint (server-side downsampling)
+export const HISTORY_MAX_POINTS = 500;
+
+// Bucket width per history period; bucketed series can be refreshed incrementally with `since`
+export const HISTORY_BUCKETS = {
+    '1h': '1m',
+    '24h': '5m',
+    '7d': '1h',
+    '30d': '4h',
+    '1y': '1d',
+};
+
 export default API_BASE_URL;
@@ -3,7 +3,7 @@ import Card from '../components/common/Card';
 import Badge from '../components/common/Badge';
 import PriceLineChart from '../components/charts/PriceLineChart';
 import { formatCurrency, formatPercent } from '../data/mockData';
-import { API_ENDPOINTS } from '../config/api';
+import { API_ENDPOINTS, HISTORY_MAX_POINTS } from '../config/api';
 
 // Time period options (US2: filtros de tiempo)
 const TIME_PERIODS = [
@@ -50,7 +50,7 @@ function Charts() {
         const fetchHistory = async () => {
             setIsLoading(true);
             try {
-                const response = await fetch(`${API_ENDPOINTS.PRICES_HISTORY}?interval=${selectedPeriod}`);
+                const response = await fetch(`${API_ENDPOINTS.PRICES_HISTORY}?interval=${selectedPeriod}&max_points=${HISTORY_MAX_POINTS}`);
                 if (response.ok) {
                     const data = await response.json();
                     setHistoryData(data.data_points || []);
@@ -3,7 +3,7 @@ import Card from '../components/common/Card';
 import Badge from '../components/common/Badge';
 import PriceLineChart from '../components/charts/PriceLineChart';
 import { formatCurrency, formatPercent } from '../data/mockData';
-import { API_ENDPOINTS } from '../config/api';
+import { API_ENDPOINTS, HISTORY_BUCKETS, HISTORY_MAX_POINTS } from '../config/api';
 
 // Icon components
 const ArrowUpIcon = () => (
@@ -116,16 +116,35 @@ function Dashboard() {
         return () => clearInterval(interval);
     }, []);
 
-    // Fetch historical data based on selected period (every 5 seconds for real-time chart)
+    // Fetch historical data based on selected period, then only new buckets every 60 seconds
     useEffect(() => {
+        let points = [];
+        const bucket = HISTORY_BUCKETS[selectedPeriod];
+
         const fetchHistory = async () => {
+            const last = points.length > 0 ? points[points.length - 1].timestamp : null;
+            const params = new URLSearchParams({ interval: selectedPeriod, max_points: HISTORY_MAX_POINTS });
+            if (bucket) params.set('bucket', bucket);
+            if (bucket && last) params.set('since', last);
             try {
-                const response = await fetch(`${API_ENDPOINTS.PRICES_HISTORY}?interval=${selectedPeriod}`);
+                const response = await fetch(`${API_ENDPOINTS.PRICES_HISTORY}?${params}`);
                 if (!response.ok) throw new Error('Failed to fetch history');
                 const result = await response.json();
-                setHistoryData(result.data_points || []);
+                const fresh = result.data_points || [];
+                if (last) {
+                    // The bucket at `since` is re-sent (it may have been partial): replace it,
+                    // append newer ones and drop the same number from the start of the window
+                    const cutoff = fresh.length > 0 ? fresh[0].timestamp : null;
+                    const kept = cutoff ? points.filter(p => p.timestamp < cutoff) : points;
+                    const merged = kept.concat(fresh);
+                    points = merged.slice(Math.max(0, merged.length - points.length));
+                } else {
+                    points = fresh;
+                }
+                setHistoryData(points);
             } catch (err) {
                 console.error("History Fetch Error:", err);
+                points = [];
                 setHistoryData([]);
             } finally {
                 setIsLoading(false);